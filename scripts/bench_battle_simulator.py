@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark do BattleSimulator contra o laço de GameService.battle.
+
+1. Distribuição: para alguns confrontos fixos compara a taxa de vitória
+   (com o z do teste de duas proporções) e os turnos médios de
+   --check-fights chamadas de battle() com 10x mais lutas simuladas.
+2. Vazão: --fights lutas com atributos sorteados em um lote do simulador,
+   contra --loop-fights chamadas de battle() sobre confrontos sorteados
+   da mesma forma, extrapoladas para --fights.
+3. Varredura: --builds builds contra --npcs NPCs com --sweep-fights lutas
+   por par, como em /api/admin/balance.
+
+    python scripts/bench_battle_simulator.py
+    python scripts/bench_battle_simulator.py --fights 100000 --loop-fights 2000 --check-fights 5000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+from repositories.player_repository import PlayerRepository
+from services.battle_log import BattleVerbosity
+from services.battle_simulator import BattleSimulator, numpy
+from services.game_service import GameService
+from services.npc_registry import NpcRegistry
+from services.player_service import PlayerService
+
+# (jogador, NPC): resultado incerto, vitória certa e luta sem crítico (determinística)
+MATCHUPS = [
+    ({'hp': 150, 'physical_power': 14, 'armor': 6, 'critical_chance': 0.25, 'critical_power': 1.5},
+     {'hp': 100, 'physical_power': 20, 'armor': 8, 'level': 5}),
+    ({'hp': 200, 'physical_power': 30, 'armor': 12, 'critical_chance': 0.1, 'critical_power': 2.0},
+     {'hp': 150, 'physical_power': 15, 'armor': 10, 'level': 3}),
+    ({'hp': 120, 'physical_power': 12, 'armor': 4, 'critical_chance': 0.0, 'critical_power': 1.5},
+     {'hp': 60, 'physical_power': 25, 'armor': 2, 'level': 2}),
+]
+
+def random_matchups(count, rng):
+    """Atributos sorteados de count confrontos, como arrays"""
+    player = {
+        'hp': rng.integers(50, 300, count),
+        'physical_power': rng.integers(5, 60, count),
+        'armor': rng.integers(0, 30, count),
+        'critical_chance': rng.uniform(0.0, 0.5, count),
+        'critical_power': rng.uniform(1.2, 2.5, count),
+    }
+    npc = {
+        'hp': rng.integers(20, 400, count),
+        'physical_power': rng.integers(5, 50, count),
+        'armor': rng.integers(0, 40, count),
+        'level': rng.integers(1, 10, count),
+    }
+    return player, npc
+
+class Arena:
+    """Jogadores e NPCs de verdade para chamar GameService.battle"""
+    def __init__(self):
+        self.player_service = PlayerService(PlayerRepository())
+        self.game_service = GameService(self.player_service)
+        # Sem item de drop: a batalha não mexe no inventário
+        self.registry = NpcRegistry(lambda: None)
+        self.players = 0
+
+    def player(self, build):
+        self.players += 1
+        player = self.player_service.create_player('bench', f'fighter-{self.players}')
+        for name in ('physical_power', 'armor', 'critical_chance', 'critical_power'):
+            setattr(player.stats, name, build[name])
+        return player
+
+    def npc(self, stats):
+        record = {
+            'id': 'bench-npc', 'name': 'Alvo', 'level': int(stats['level']), 'max_hp': int(stats['hp']),
+            'hp': int(stats['hp']), 'damage': int(stats['physical_power']), 'armor': int(stats['armor']),
+            'position': {'x': 0, 'y': 0}
+        }
+        return self.registry.encounter(record)
+
+    def fight(self, player, npc, hp, rng):
+        player.hp = hp
+        victory, log, _ = self.game_service.battle(player, npc, BattleVerbosity.NONE, rng)
+        return victory, log.turns
+
+def check_distribution(arena, simulator, fights, seed):
+    print(f"distribution: {fights} battle() calls vs {fights * 10} simulated fights per matchup")
+    rng = random.Random(seed)
+    for build, stats in MATCHUPS:
+        player, npc = arena.player(build), arena.npc(stats)
+        results = [arena.fight(player, npc, build['hp'], rng) for _ in range(fights)]
+        loop_wins = sum(victory for victory, _ in results) / fights
+        loop_turns = sum(turns for _, turns in results) / fights
+        # O HP em array define o tamanho do lote; os outros atributos são escalares
+        simulated = simulator.simulate(
+            dict(build, hp=numpy.full(fights * 10, build['hp'])), stats, numpy.random.default_rng(seed)
+        )
+        sim_wins = float(simulated.victory.mean())
+        sim_turns = float(simulated.turns.mean())
+        pooled = (loop_wins * fights + sim_wins * len(simulated)) / (fights + len(simulated))
+        spread = math.sqrt(pooled * (1 - pooled) * (1 / fights + 1 / len(simulated)))
+        z = (loop_wins - sim_wins) / spread if spread else 0.0
+        print(f"  win rate {loop_wins:.4f} vs {sim_wins:.4f} (z = {z:+.2f}), mean turns {loop_turns:.3f} vs {sim_turns:.3f}")
+
+def check_throughput(arena, simulator, fights, loop_fights, seed):
+    generator = numpy.random.default_rng(seed)
+    player, npc = random_matchups(fights, generator)
+    started = time.perf_counter()
+    outcomes = simulator.simulate(player, npc, generator)
+    vectorized = time.perf_counter() - started
+
+    # O laço sobre os primeiros confrontos do mesmo sorteio
+    fighters = []
+    for index in range(loop_fights):
+        build = {name: values[index].item() for name, values in player.items()}
+        fighters.append((arena.player(build), arena.npc({name: values[index] for name, values in npc.items()}), build['hp']))
+    rng = random.Random(seed)
+    turns = 0
+    started = time.perf_counter()
+    for fighter, target, hp in fighters:
+        turns += arena.fight(fighter, target, hp, rng)[1]
+    loop = (time.perf_counter() - started) / loop_fights * fights
+
+    print(f"throughput: {fights} random fights")
+    print(f"  simulator {vectorized:.2f} s (mean turns {outcomes.turns.mean():.2f})")
+    print(f"  battle()  {loop:.2f} s extrapolated from {loop_fights} fights (mean turns {turns / loop_fights:.2f})")
+    print(f"  speedup   {loop / vectorized:.0f}x")
+
+def check_sweep(simulator, builds, npcs, fights, seed):
+    generator = numpy.random.default_rng(seed)
+    player, npc = random_matchups(max(builds, npcs), generator)
+    build_list = [{name: values[index].item() for name, values in player.items()} for index in range(builds)]
+    npc_list = [{name: values[index].item() for name, values in npc.items()} for index in range(npcs)]
+    started = time.perf_counter()
+    results = simulator.sweep(build_list, npc_list, fights, generator)
+    elapsed = time.perf_counter() - started
+    print(f"sweep: {builds} builds x {npcs} npcs x {fights} fights = {builds * npcs * fights} fights "
+          f"in {elapsed:.2f} s ({len(results)} pairs)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do BattleSimulator contra GameService.battle")
+    parser.add_argument('--fights', type=int, default=1_000_000, help='lutas do lote de vazão')
+    parser.add_argument('--loop-fights', type=int, default=5000, help='chamadas de battle() medidas')
+    parser.add_argument('--check-fights', type=int, default=20000, help='chamadas de battle() por confronto')
+    parser.add_argument('--builds', type=int, default=1000)
+    parser.add_argument('--npcs', type=int, default=10)
+    parser.add_argument('--sweep-fights', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    if numpy is None:
+        print("Error: battle simulation requires numpy", file=sys.stderr)
+        return 1
+
+    arena = Arena()
+    simulator = BattleSimulator()
+    check_distribution(arena, simulator, args.check_fights, args.seed)
+    check_throughput(arena, simulator, args.fights, args.loop_fights, args.seed)
+    check_sweep(simulator, args.builds, args.npcs, args.sweep_fights, args.seed)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
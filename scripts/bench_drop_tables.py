@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos drops de vários abates de uma vez: o laço antigo de
+GameService.battle (um sorteio por DropItem e um add_item_to_inventory,
+com um save, por drop) contra DropTable.roll(kills) seguido de um único
+add_items_to_inventory. O NPC tem --drop-items itens independentes com
+chance --chance de 1 a 3 unidades cada.
+
+Mede também uma tabela mais rica (12 entradas com pesos, uma tabela
+aninhada, uma faixa garantida e 2 sorteios por abate) e confere que a
+frequência de cada entrada em --picks sorteios fica no peso dela, com e
+sem numpy.
+
+    python scripts/bench_drop_tables.py
+    python scripts/bench_drop_tables.py --kills 10 1000 100000 --picks 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+from domains.item import Item, ItemInstance, ItemType, Rarity
+from domains.npc import DropItem
+from repositories.item_repository import ItemRepository
+from repositories.player_repository import PlayerRepository
+from services import drop_table
+from services.drop_table import DropEntry, DropTable
+from services.player_service import PlayerService
+
+class CountingRepository(PlayerRepository):
+    """Conta os saves do jogador"""
+    saves = 0
+
+    def save(self, item):
+        self.saves += 1
+        return super().save(item)
+
+def resource(items, number):
+    # Recursos empilham: o inventário não enche no meio da medição
+    return items.save(Item(
+        id=str(uuid.uuid4()), created_at=datetime.now(), name=f"Recurso {number}", description="Material de criação",
+        item_type=ItemType.RESOURCE, rarity=Rarity.COMMON, price=10, sell_price=5, is_tradable=True,
+        is_consumable=False, is_equippable=False, is_boostable=False
+    ))
+
+def old_loop(service, player, drop_items, kills, rng):
+    """Os drops como GameService.battle fazia antes, abate por abate"""
+    for _ in range(kills):
+        for drop_item in drop_items:
+            if rng.random() < drop_item.chance:
+                service.add_item_to_inventory(player, drop_item.item, rng.randint(1, drop_item.amount))
+
+def table_roll(service, player, table, kills, rng):
+    service.add_items_to_inventory(player, table.roll(kills, rng))
+
+def measure(function, source, kills, seed):
+    """(ms, saves, unidades recebidas) num jogador novo"""
+    repository = CountingRepository()
+    service = PlayerService(repository)
+    player = service.create_player('bench', 'looter')
+    repository.saves = 0
+    started = time.perf_counter()
+    function(service, player, source, kills, random.Random(seed))
+    elapsed = (time.perf_counter() - started) * 1e3
+    return elapsed, repository.saves, sum(instance.quantity for instance in player.inventory)
+
+def rich_table(items):
+    """12 entradas com pesos (uma delas vazia, outra aninhada), uma faixa garantida e 2 sorteios"""
+    resources = [resource(items, 100 + number) for number in range(14)]
+    nested = DropTable([DropEntry(resources[12], 3), DropEntry(resources[13], 1, 1, 2)])
+    entries = [DropEntry(item, weight, 1, 1 + number % 3) for number, (item, weight)
+               in enumerate(zip(resources[:10], (50, 30, 20, 10, 8, 5, 3, 2, 1, 0.5)))]
+    entries += [DropEntry(None, 40), DropEntry(table=nested, weight=4)]
+    return DropTable(entries, rolls=2, guaranteed=[DropEntry(resources[11], min_amount=5, max_amount=15)])
+
+def check_frequencies(items, picks, seed):
+    """Maior distância entre a frequência de cada entrada e o peso dela"""
+    weights = (50, 30, 20, 10, 8, 5, 3, 2, 1, 0.5, 40)
+    resources = [resource(items, 200 + number) for number in range(len(weights))]
+    table = DropTable([DropEntry(item, weight) for item, weight in zip(resources, weights)])
+    total = sum(weights)
+    counts = {item.id: amount for item, amount in table.roll(picks, random.Random(seed))}
+    return max(abs(counts.get(item.id, 0) / picks - weight / total) for item, weight in zip(resources, weights))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos drops de vários abates")
+    parser.add_argument('--kills', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--drop-items', type=int, default=10, help='drops independentes do NPC')
+    parser.add_argument('--chance', type=float, default=0.1, help='chance de cada drop')
+    parser.add_argument('--picks', type=int, default=400000, help='sorteios da conferência de frequências')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    items = ItemRepository()
+    ItemInstance.template_lookup = items.find_by_id
+    drop_items = [
+        DropItem(id=str(uuid.uuid4()), created_at=datetime.now(), item=resource(items, number), chance=args.chance, amount=3)
+        for number in range(args.drop_items)
+    ]
+    table = DropTable.from_drop_items(drop_items)
+
+    print(f"{args.drop_items} drop items at {args.chance:g} chance, 1-3 units each")
+    print(f"{'kills':>7} {'engine':15} {'ms':>9} {'saves':>7} {'units':>8}")
+    for kills in args.kills:
+        for name, function, source in (('per-unit loop', old_loop, drop_items), ('DropTable.roll', table_roll, table)):
+            elapsed, saves, units = measure(function, source, kills, args.seed)
+            print(f"{kills:7} {name:15} {elapsed:9.2f} {saves:7} {units:8}")
+        expected = kills * args.drop_items * args.chance * 2
+        print(f"{kills:7} {'expected units':15} {'':>9} {'':>7} {expected:8.0f}")
+
+    rich = rich_table(items)
+    rng = random.Random(args.seed)
+    for kills, repeat in ((1, 10000), (100000, 10)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            rich.roll(kills, rng)
+        elapsed = (time.perf_counter() - started) / repeat
+        print(f"rich table: {kills} kills in {elapsed * 1e6:.0f} us ({kills / elapsed / 1e6:.2f}M kills/s)")
+
+    # Desvio padrão esperado da maior fatia (peso 50 de 169.5), para comparar
+    share = 50 / 169.5
+    print(f"frequencies over {args.picks} picks, largest deviation from the weight share "
+          f"(standard error {(share * (1 - share) / args.picks) ** 0.5:.4f}):")
+    if drop_table.numpy is not None:
+        print(f"  numpy  {check_frequencies(items, args.picks, args.seed):.4f}")
+    # Como numa instalação sem numpy
+    module_numpy, drop_table.numpy = drop_table.numpy, None
+    try:
+        print(f"  python {check_frequencies(items, args.picks, args.seed):.4f}")
+    finally:
+        drop_table.numpy = module_numpy
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark do armazenamento do BaseRepository: custo por operação de
+find_by_id, save (de uma entidade alterada) e delete seguido de um save
+novo, de 100 a 1.000.000 entidades. Com o dict o custo fica plano; com
+--baseline mede também a lista com busca linear que o repositório usava
+antes (até --baseline-max entidades, porque ela cresce com o tamanho).
+
+    python scripts/bench_repository.py
+    python scripts/bench_repository.py --sizes 100 10000 --ops 20000 --baseline
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+from domains.base import BaseDomain
+from repositories.base_repository import BaseRepository
+
+class Entity(BaseDomain):
+    value: int
+
+class EntityRepository(BaseRepository[Entity]):
+    model = Entity
+    table_name = 'entities'
+
+class ListRepository:
+    """O armazenamento anterior: uma lista percorrida a cada operação"""
+    def __init__(self):
+        self.items = []
+
+    def find_by_id(self, id):
+        for item in self.items:
+            if item.id == id:
+                return item
+        return None
+
+    def save(self, item):
+        if self.find_by_id(item.id):
+            self.items = [item if x.id == item.id else x for x in self.items]
+        else:
+            self.items.append(item)
+        return item
+
+    def delete(self, id):
+        if self.find_by_id(id):
+            self.items = [x for x in self.items if x.id != id]
+            return True
+        return False
+
+def entity(number):
+    return Entity(id=f'entity-{number}', created_at=datetime(2025, 1, 1), value=number)
+
+def measure(repository, size, ops, rng):
+    """ns por operação de cada tipo"""
+    entities = [entity(number) for number in range(size)]
+    for item in entities:
+        repository.save(item)
+    picks = [entities[rng.randrange(size)] for _ in range(ops)]
+    results = {}
+
+    started = time.perf_counter_ns()
+    for item in picks:
+        repository.find_by_id(item.id)
+    results['find_by_id'] = (time.perf_counter_ns() - started) / ops
+
+    started = time.perf_counter_ns()
+    for number, item in enumerate(picks):
+        # Uma alteração de verdade: salvar uma entidade limpa não faz nada
+        item.value = number
+        repository.save(item)
+    results['save'] = (time.perf_counter_ns() - started) / ops
+
+    # Cada delete é seguido do save de uma entidade nova, mantendo o tamanho
+    victims = dict.fromkeys(item.id for item in picks)
+    fresh = [entity(size + number) for number in range(len(victims))]
+    started = time.perf_counter_ns()
+    for id, item in zip(victims, fresh):
+        repository.delete(id)
+        repository.save(item)
+    results['delete+save'] = (time.perf_counter_ns() - started) / len(fresh)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do armazenamento do BaseRepository")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000, 1000000])
+    parser.add_argument('--ops', type=int, default=100000, help='operações medidas de cada tipo')
+    parser.add_argument('--baseline', action='store_true', help='mede também a lista com busca linear')
+    parser.add_argument('--baseline-max', type=int, default=10000, help='maior tamanho medido na lista')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    engines = [('dict', EntityRepository)]
+    if args.baseline:
+        engines.append(('list', ListRepository))
+    print(f"{'engine':6} {'entities':>9} {'find_by_id ns':>14} {'save ns':>10} {'delete+save ns':>15}")
+    for size in args.sizes:
+        for name, engine in engines:
+            if name == 'list' and size > args.baseline_max:
+                continue
+            # A lista é O(n) por operação: menos operações nos tamanhos grandes
+            ops = args.ops if name == 'dict' else max(100, min(args.ops, 10_000_000 // size))
+            results = measure(engine(), size, ops, random.Random(args.seed))
+            print(f"{name:6} {size:9} {results['find_by_id']:14.0f} {results['save']:10.0f} {results['delete+save']:15.0f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
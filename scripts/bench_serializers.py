@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark da resposta com o jogador: jsonify(player_to_dict(...)) contra
+json_response com os fragmentos de PlayerRevisions.payload, que reaproveita
+o JSON já codificado de cada item. Mede um inventário cheio de 20 espaços
+e um caso de 500, com os itens inalterados entre as respostas (o caso
+comum: ouro, HP e posição mudam) e com um item alterado a cada resposta.
+Confere antes que as duas respostas trazem o mesmo jogador.
+
+    python scripts/bench_serializers.py
+    python scripts/bench_serializers.py --slots 20 500 2000 --repeat 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+from flask import Flask, jsonify
+
+from domains.item import Item, ItemInstance, ItemType, Rarity
+from domains.stats import Stats
+from repositories.item_repository import ItemRepository
+from repositories.player_repository import PlayerRepository
+from serializers import PlayerRevisions, json_response, player_to_dict
+from services.player_service import PlayerService
+
+def template(number):
+    return Item(
+        id=str(uuid.uuid4()),
+        created_at=datetime.now(),
+        name=f"Espada {number}",
+        description="Uma espada comum usada por aventureiros",
+        item_type=ItemType.GENERAL,
+        rarity=Rarity.COMMON,
+        price=100 + number,
+        sell_price=50,
+        is_tradable=True,
+        is_consumable=False,
+        is_equippable=True,
+        is_boostable=True,
+        stats=Stats(
+            id=str(uuid.uuid4()), created_at=datetime.now(), strength=5, intelligence=0, dexterity=2,
+            constitution=0, health=0, mana=0, physical_power=10 + number % 7, magic_resistance=0, speed=1,
+            magic_power=0, armor=2, critical_chance=0.05, critical_power=1.5, luck=1.0
+        )
+    )
+
+def build_player(slots):
+    items = ItemRepository()
+    ItemInstance.template_lookup = items.find_by_id
+    service = PlayerService(PlayerRepository())
+    player = service.create_player('bench', f'bench-{slots}')
+    player.inventory_size = slots
+    for number in range(slots):
+        service.add_item_to_inventory(player, items.save(template(number)))
+    return player
+
+def per_request(build, player, repeat, touch_item):
+    """ms por resposta; a cada resposta o jogador muda como numa rota comum"""
+    items = list(player.inventory)
+    started = time.perf_counter()
+    for number in range(repeat):
+        player.gold += 1
+        if touch_item:
+            items[number % len(items)].enhancement += 1
+        build(player).get_data()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da resposta com o jogador")
+    parser.add_argument('--slots', type=int, nargs='+', default=[20, 500], help='itens no inventário')
+    parser.add_argument('--repeat', type=int, default=200, help='respostas medidas por caso')
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    revisions = PlayerRevisions()
+    builders = {
+        'jsonify(player_to_dict)': lambda player: jsonify({'success': True, 'player': player_to_dict(player)}),
+        'json_response(fragments)': lambda player: json_response({'success': True}, **revisions.payload(player)),
+    }
+    with app.app_context():
+        print(f"{'slots':>5} {'items':11} {'serializer':26} {'ms/response':>11} {'bytes':>8}")
+        for slots in args.slots:
+            player = build_player(slots)
+            plain = json.loads(builders['jsonify(player_to_dict)'](player).get_data())
+            cached = json.loads(builders['json_response(fragments)'](player).get_data())
+            cached.pop('player_revision')
+            if plain != cached:
+                print(f"Error: the two serializers disagree for {slots} slots", file=sys.stderr)
+                return 1
+            for touch_item in (False, True):
+                for name, build in builders.items():
+                    size = len(build(player).get_data())
+                    elapsed = per_request(build, player, args.repeat, touch_item)
+                    label = 'one changed' if touch_item else 'unchanged'
+                    print(f"{slots:5} {label:11} {name:26} {elapsed:11.3f} {size:8}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
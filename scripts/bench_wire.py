@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark do formato das respostas: tamanho e tempo por requisição das
+maiores respostas (/api/admin/items, o jogador completo e o resultado de
+uma batalha com log completo) em JSON, JSON com gzip, MessagePack e
+MessagePack com gzip. Antes confere que a versão MessagePack, com as
+chaves numeradas traduzidas de volta por WIRE_FIELDS, traz os mesmos
+dados que a JSON.
+
+    python scripts/bench_wire.py
+    python scripts/bench_wire.py --items 5000 --inventory 100 --repeat 50
+
+Roda a aplicação no próprio processo (cliente de teste do Flask), com
+banco e log num diretório temporário.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+
+FORMATS = {
+    'json': {},
+    'json+gzip': {'Accept-Encoding': 'gzip'},
+    'msgpack': {'Accept': 'application/msgpack'},
+    'msgpack+gzip': {'Accept': 'application/msgpack', 'Accept-Encoding': 'gzip'},
+}
+
+def load_app(directory):
+    # A configuração é lida na importação do app
+    os.environ['RPG_DATABASE_PATH'] = os.path.join(directory, 'game.db')
+    os.environ['RPG_STATE_LOG_DIR'] = os.path.join(directory, 'game_state')
+    sys.path.insert(0, os.path.abspath(SRC))
+    os.chdir(SRC)
+    import app
+    return app
+
+def decode(response, fields):
+    """Corpo da resposta como JSON, traduzindo as chaves numeradas do MessagePack"""
+    import msgpack
+    data = response.get_data()
+    if response.content_encoding == 'gzip':
+        data = gzip.decompress(data)
+    if response.mimetype != 'application/msgpack':
+        return json.loads(data)
+
+    def named(value):
+        if isinstance(value, dict):
+            return {fields[key] if isinstance(key, int) else key: named(element) for key, element in value.items()}
+        if isinstance(value, list):
+            return [named(element) for element in value]
+        return value
+    return named(msgpack.unpackb(data, strict_map_key=False))
+
+def setup(app, args):
+    """Catálogo grande, um jogador com o inventário cheio e um NPC: (cliente, cabeçalhos, jogador, id do NPC)"""
+    client = app.app.test_client()
+    for number in range(args.items):
+        client.post('/api/admin/items', json={
+            'name': f'Item {number}', 'description': 'Um item de teste do catálogo', 'price': number,
+            'strength': number % 10, 'armor': number % 5, 'is_equippable': True
+        })
+    token = client.post('/api/player', json={'username': 'wire'}).get_json()['session_token']
+    headers = {'X-Session-Token': token}
+    player = app.player_repository.find_by_id(app.session_service.get(token).player_id)
+    player.gold = 10 ** 9
+    player.inventory_size = args.inventory
+    app.record_player_state(app.StateOp.PLAYER_UPDATE, player)
+    market = client.get('/api/market').get_json()['items']
+    equipment = [item for item in market if not item['is_consumable']]
+    for number in range(args.inventory):
+        client.post('/api/market/buy', json={'item_id': equipment[number % len(equipment)]['id']}, headers=headers)
+    npc_id = next(iter(client.get('/api/npcs?area=forest_1').get_json()['npcs']))
+    return client, headers, player, npc_id
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do formato das respostas")
+    parser.add_argument('--items', type=int, default=1200, help='itens criados no catálogo')
+    parser.add_argument('--inventory', type=int, default=20, help='itens no inventário do jogador')
+    parser.add_argument('--repeat', type=int, default=100, help='requisições medidas por rota e formato')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='rpg-wire-') as directory:
+        app = load_app(directory)
+        import serializers
+        if serializers.msgpack is None:
+            print("Error: msgpack is not installed", file=sys.stderr)
+            return 1
+        client, headers, player, npc_id = setup(app, args)
+        fields = client.get('/api/wire/schema').get_json()['fields']
+
+        def battle(extra):
+            # Cada batalha começa igual: jogador e NPC com a vida cheia
+            player.hp = player.max_hp
+            npc = app.GAME_STATE['npcs'][npc_id]
+            npc['hp'] = npc['max_hp']
+            return client.post('/api/battle', json={'npc_id': npc_id, 'verbosity': 'full'}, headers=dict(headers, **extra))
+
+        routes = {
+            'admin items': lambda extra: client.get('/api/admin/items', headers=extra),
+            'full player': lambda extra: client.get('/api/player', headers=dict(headers, **extra)),
+            'battle': battle,
+        }
+        # As rotas de leitura têm que trazer os mesmos dados em todos os formatos
+        for name in ('admin items', 'full player'):
+            expected = decode(routes[name]({}), fields)
+            for format_name, extra in FORMATS.items():
+                if decode(routes[name](extra), fields) != expected:
+                    print(f"Error: {name} as {format_name} differs from JSON", file=sys.stderr)
+                    return 1
+
+        print(f"{args.items} catalog items, {args.inventory} inventory items, mean of {args.repeat} requests")
+        print(f"{'route':12} {'format':13} {'bytes':>8} {'ms/request':>11}")
+        for name, route in routes.items():
+            for format_name, extra in FORMATS.items():
+                size = 0
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    size += len(route(extra).get_data())
+                elapsed = (time.perf_counter() - started) / args.repeat * 1e3
+                print(f"{name:12} {format_name:13} {size // args.repeat:8} {elapsed:11.2f}")
+        app.state_log.close()
+        app.persistence_backend.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
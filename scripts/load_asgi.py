@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do servidor ASGI (uvicorn + asgi.py) contra o servidor
+Flask com threads. Cada sessão abre uma conexão keep-alive, cria um
+jogador e faz --requests requisições alternando GET /api/player e
+POST /api/player/position. Mostra requisições por segundo, p50/p99 de
+cada requisição e o tempo da sessão inteira, contado desde o início da
+sessão (inclui a espera para conectar).
+
+    python scripts/load_asgi.py --sessions 1000
+    python scripts/load_asgi.py --sessions 1000 --rate 50
+
+Sem --rate todas as sessões começam juntas (carga fechada: a latência de
+cada requisição é quase toda fila, concorrência / vazão); com --rate
+começam --rate sessões por segundo e, enquanto o servidor acompanha esse
+ritmo, a latência medida é a dele. Cada servidor roda num processo próprio, com
+banco e log num diretório temporário.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+
+SERVERS = {
+    'flask': lambda port: [sys.executable, '-c', f'import app; app.app.run(port={port}, threaded=True)'],
+    'asgi': lambda port: [
+        sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--log-level', 'warning', '--backlog', '4096'
+    ],
+}
+
+async def request(reader, writer, method, path, token=None, body=None):
+    """(status, corpo, se o servidor fechou a conexão)"""
+    data = json.dumps(body).encode('utf-8') if body is not None else b''
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n"
+    if body is not None:
+        head += "Content-Type: application/json\r\n"
+    if token:
+        head += f"X-Session-Token: {token}\r\n"
+    writer.write(head.encode('latin-1') + b"\r\n" + data)
+    await writer.drain()
+    status = await reader.readline()
+    length, close = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'connection' and 'close' in value.lower():
+            close = True
+    if length:
+        payload = await reader.readexactly(length)
+    else:
+        payload = await reader.read() if close else b''
+    return int(status.split()[1]), payload, close
+
+async def session(port, number, requests, delay, results):
+    await asyncio.sleep(delay)
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        _, payload, close = await request(reader, writer, 'POST', '/api/player', body={'username': f'load{number}'})
+        token = json.loads(payload)['session_token']
+        for step in range(requests):
+            if close:
+                # O servidor Flask fecha a conexão depois de cada resposta
+                writer.close()
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            request_started = time.perf_counter()
+            if step % 2:
+                status, _, close = await request(
+                    reader, writer, 'POST', '/api/player/position', token, {'x': step, 'y': step}
+                )
+            else:
+                status, _, close = await request(reader, writer, 'GET', '/api/player', token)
+            results['latencies'].append(time.perf_counter() - request_started)
+            if status != 200:
+                results['errors'].append(status)
+        writer.close()
+        results['sessions'].append(time.perf_counter() - started)
+    except (OSError, ValueError, KeyError, asyncio.IncompleteReadError) as e:
+        results['errors'].append(type(e).__name__)
+
+def percentile(samples, fraction):
+    return samples[int(fraction * (len(samples) - 1))] * 1e3 if samples else float('nan')
+
+async def run(port, args):
+    results = {'latencies': [], 'sessions': [], 'errors': []}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        session(port, number, args.requests, number / args.rate if args.rate else 0, results)
+        for number in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies, sessions = sorted(results['latencies']), sorted(results['sessions'])
+    print(f"  {len(latencies)} requests, {len(results['errors'])} errors, {len(latencies) / elapsed:.0f} req/s")
+    print(f"  request p50 {percentile(latencies, .5):.1f} ms, p99 {percentile(latencies, .99):.1f} ms")
+    print(f"  session p50 {percentile(sessions, .5):.0f} ms, p99 {percentile(sessions, .99):.0f} ms, "
+          f"{len(sessions)} completed")
+
+def serve(command, directory):
+    env = dict(
+        os.environ,
+        RPG_DATABASE_PATH=os.path.join(directory, 'game.db'),
+        RPG_STATE_LOG_DIR=os.path.join(directory, 'game_state')
+    )
+    return subprocess.Popen(command, cwd=SRC, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_until_listening(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor ASGI contra o Flask")
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=10, help='requisições por sessão, fora a criação')
+    parser.add_argument('--rate', type=float, default=0, help='sessões novas por segundo (0: todas juntas)')
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['flask', 'asgi'])
+    parser.add_argument('--port', type=int, default=5101)
+    args = parser.parse_args(argv)
+
+    for offset, name in enumerate(args.servers):
+        port = args.port + offset
+        with tempfile.TemporaryDirectory(prefix='rpg-load-') as directory:
+            process = serve(SERVERS[name](port), directory)
+            try:
+                if not wait_until_listening(port, process):
+                    print(f"Error: the {name} server did not start", file=sys.stderr)
+                    return 1
+                mode = f"{args.rate:g} sessions/s" if args.rate else "all at once"
+                print(f"{name}: {args.sessions} sessions x {args.requests} requests, {mode}")
+                asyncio.run(run(port, args))
+            finally:
+                process.send_signal(signal.SIGINT)
+                try:
+                    process.wait(10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
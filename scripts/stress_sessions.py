@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Teste de carga concorrente das sessões: vários jogadores, cada um com
+várias threads comprando no mercado e se movendo ao mesmo tempo, mais
+threads de admin criando NPCs, com snapshots frequentes do log de estado.
+Depois confere que o ouro e os itens de cada jogador batem com as compras
+feitas, que nenhuma instância de item se repete e que um servidor
+reiniciado sobre o mesmo banco e o mesmo log recupera o mesmo estado.
+
+    python scripts/stress_sessions.py --players 6 --threads 3 --snapshot-every 30
+
+Roda a aplicação no próprio processo (cliente de teste do Flask), com
+banco e log num diretório temporário.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+START_GOLD = 100000
+
+def load_app(directory):
+    # A configuração é lida na importação do app
+    os.environ['RPG_DATABASE_PATH'] = os.path.join(directory, 'game.db')
+    os.environ['RPG_STATE_LOG_DIR'] = os.path.join(directory, 'game_state')
+    sys.path.insert(0, os.path.abspath(SRC))
+    os.chdir(SRC)
+    import app
+    return app
+
+def player_state(player):
+    """O que precisa sobreviver ao reinício: ouro, posição e (modelo, quantidade) de cada item"""
+    items = sorted((item.template_id, item.quantity) for item in player.inventory)
+    return {'gold': player.gold, 'x': player.x, 'y': player.y, 'items': items}
+
+def run(args):
+    app = load_app(args.directory)
+    app.STATE_LOG_CONFIG['snapshot_every'] = args.snapshot_every
+    client = app.app.test_client()
+    market = client.get('/api/market').get_json()['items']
+    potion = next(item for item in market if item['is_consumable'])
+    sword = next(item for item in market if not item['is_consumable'] and item['item_type'] != 'scroll')
+
+    tokens = []
+    for number in range(args.players):
+        created = client.post('/api/player', json={'username': f'stress{number}'}).get_json()
+        tokens.append(created['session_token'])
+        player = app.player_repository.find_by_id(app.session_service.get(created['session_token']).player_id)
+        player.gold = START_GOLD
+        # Espaço para todas as compras
+        player.inventory_size = args.buys * args.threads
+        app.record_player_state(app.StateOp.PLAYER_UPDATE, player)
+
+    # token -> [espadas, poções] compradas
+    bought = {token: [0, 0] for token in tokens}
+    bought_lock = threading.Lock()
+    errors = []
+
+    def buyer(token):
+        worker = app.app.test_client()
+        headers = {'X-Session-Token': token}
+        for number in range(args.buys):
+            item = potion if number % 2 else sword
+            result = worker.post('/api/market/buy', json={'item_id': item['id']}, headers=headers).get_json()
+            if not result['success']:
+                errors.append(result)
+                continue
+            with bought_lock:
+                bought[token][number % 2] += 1
+            worker.post('/api/player/position', json={'x': number, 'y': number}, headers=headers)
+
+    def admin():
+        worker = app.app.test_client()
+        for number in range(args.admin_ops):
+            worker.post('/api/admin/npcs', json={'name': f'stress-npc-{number}', 'area': 'forest_1'})
+            worker.get('/api/npcs?area=forest_1')
+
+    threads = [threading.Thread(target=buyer, args=(token,)) for token in tokens for _ in range(args.threads)]
+    threads += [threading.Thread(target=admin) for _ in range(args.admin_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Posições pendentes vão para o banco e para o log
+    app.flush_movements()
+
+    problems = [f"request failed: {error}" for error in errors[:5]]
+    seen = set()
+    expected = {}
+    for token in tokens:
+        player = app.player_repository.find_by_id(app.session_service.get(token).player_id)
+        swords, potions = bought[token]
+        gold = START_GOLD - swords * sword['price'] - potions * potion['price']
+        owned_swords = sum(1 for item in player.inventory if item.template_id == sword['id'])
+        owned_potions = sum(item.quantity for item in player.inventory if item.template_id == potion['id'])
+        if (player.gold, owned_swords, owned_potions) != (gold, swords, potions):
+            problems.append(
+                f"{player.username}: gold {player.gold}/{gold}, swords {owned_swords}/{swords}, "
+                f"potions {owned_potions}/{potions}"
+            )
+        for item in player.inventory:
+            if item.id in seen:
+                problems.append(f"{player.username}: duplicated item instance {item.id}")
+            seen.add(item.id)
+        expected[player.id] = player_state(player)
+
+    total = sum(map(sum, bought.values()))
+    print(f"{args.players} players x {args.threads} threads + {args.admin_threads} admin threads: "
+          f"{total} buys, {len(app.GAME_STATE['npcs'])} npcs, {len(problems)} problems")
+    app.state_log.close()
+    app.persistence_backend.close()
+    with open(os.path.join(args.directory, 'expected.json'), 'w') as f:
+        json.dump(expected, f)
+    return problems
+
+def verify(args):
+    """Roda num processo novo: o estado recuperado tem que ser o mesmo"""
+    app = load_app(args.directory)
+    with open(os.path.join(args.directory, 'expected.json')) as f:
+        expected = json.load(f)
+    problems = []
+    for player_id, state in expected.items():
+        player = app.player_repository.find_by_id(player_id)
+        recovered = json.loads(json.dumps(player_state(player))) if player else None
+        if recovered != state:
+            problems.append(f"{player_id}: recovered {recovered}, expected {state}")
+    print(f"restart: {len(expected)} players checked, {len(problems)} problems")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga concorrente das sessões")
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--threads', type=int, default=3, help='threads por jogador')
+    parser.add_argument('--buys', type=int, default=40, help='compras por thread')
+    parser.add_argument('--admin-threads', type=int, default=2)
+    parser.add_argument('--admin-ops', type=int, default=30, help='NPCs criados por thread de admin')
+    parser.add_argument('--snapshot-every', type=int, default=30, help='operações entre snapshots')
+    parser.add_argument('--switch-interval', type=float, default=1e-5,
+                        help='sys.setswitchinterval, menor troca de thread mais vezes')
+    parser.add_argument('--directory', help=argparse.SUPPRESS)
+    parser.add_argument('--verify', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    sys.setswitchinterval(args.switch_interval)
+
+    if args.verify:
+        return 1 if verify(args) else 0
+
+    with tempfile.TemporaryDirectory(prefix='rpg-stress-') as directory:
+        args.directory = directory
+        problems = run(args)
+        # Reinício de verdade: outro processo lendo o mesmo banco e o mesmo log
+        restart = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--verify', '--directory', directory],
+            capture_output=True, text=True
+        )
+        print(restart.stdout, end='')
+        if restart.returncode != 0:
+            problems.append(restart.stderr.strip() or 'restart verification failed')
+    for problem in problems:
+        print(f"Error: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
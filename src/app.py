@@ -1,48 +1,295 @@
 #!/usr/bin/env python3
 import os
+import math
+import atexit
+import contextlib
+import functools
+import threading
+import time
 import uuid
 import json
+from collections import Counter, defaultdict
 from datetime import datetime
-from flask import Flask, jsonify, request, send_from_directory
+from enum import IntEnum
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 
 # Importando domínios e serviços
 from domains.player import Player
-from domains.item import Item, ItemType, Rarity
-from domains.stats import Stats
+from domains.item import Item, ItemInstance, ItemType, Rarity
+from domains.stats import FrozenStats
 from domains.life_skill import LifeSkill
-from domains.npc import NPC, DropItem
 from domains.entity import Harvest, TypeEntity
 
 from repositories.player_repository import PlayerRepository
 from repositories.item_repository import ItemRepository
+from repositories.sqlite_backend import SQLiteBackend
+from repositories.operation_log import OperationLog, decode_payload
 
 from services.player_service import PlayerService
 from services.game_service import GameService
 from services.harvest_service import HarvestService
+from services.session_service import SessionService, StripedLock
+from services.event_service import EventHub, QueueSubscription
+from services.movement_service import MovementService
+from services.catalog_service import CatalogService
+from services.content_service import ContentService
+from services.battle_simulator import BattleSimulator
+from services.battle_log import BattleVerbosity
+from services.npc_registry import NpcRegistry
+from services.rng_service import RngService
+from services.replay_service import REPLAY_HEADERS, SessionRecorder
+
+from serializers import (
+    WIRE_FIELDS, PlayerRevisions, conditional_response, item_json, instance_json, json_list, json_response,
+    negotiate_response, sse_event
+)
 
 # Inicializa o Flask
 app = Flask(__name__, static_folder='static')
 CORS(app)
 
+# Formato das respostas: JSON por padrão, MessagePack com Accept: application/msgpack
+# e gzip nas respostas grandes quando o cliente aceita
+WIRE_CONFIG = {
+    'compress_min_size': 1024,  # bytes
+    'compress_level': 1  # gzip rápido: quase todo o ganho de tamanho por metade do custo do nível 6
+}
+
+@app.after_request
+def encode_response(response):
+    return negotiate_response(response, WIRE_CONFIG['compress_min_size'], WIRE_CONFIG['compress_level'])
+
+# Configuração de persistência (SQLite com gravação em segundo plano)
+PERSISTENCE_CONFIG = {
+    'database_path': os.environ.get('RPG_DATABASE_PATH', 'game.db'),
+    'flush_interval': 2.0,  # segundos entre gravações
+    'max_batch_size': 500  # entidades por transação
+}
+
+persistence_backend = SQLiteBackend(
+    PERSISTENCE_CONFIG['database_path'],
+    flush_interval=PERSISTENCE_CONFIG['flush_interval'],
+    max_batch_size=PERSISTENCE_CONFIG['max_batch_size']
+)
+atexit.register(persistence_backend.close)
+
 # Configuração dos repositórios
-player_repository = PlayerRepository()
-item_repository = ItemRepository()
+player_repository = PlayerRepository(persistence_backend)
+item_repository = ItemRepository(persistence_backend)
+# Os itens dos jogadores guardam só o id do modelo, resolvido no repositório
+# de itens, então os modelos são carregados antes dos jogadores
+item_repository.load()
+ItemInstance.template_lookup = item_repository.find_by_id
+player_repository.load()
+
+def adopt_item_templates(player):
+    """
+    Registros antigos trazem o modelo embutido em cada item do jogador;
+    os que o repositório ainda não conhece passam a ser guardados nele
+    """
+    for instance in (*player.inventory, *player.equipment):
+        if instance.template_id not in item_repository:
+            try:
+                item_repository.save(instance.template)
+            except ValueError:
+                app.logger.warning("Item %s references unknown template %s", instance.id, instance.template_id)
 
 # Configuração dos serviços
-player_service = PlayerService(player_repository)
+player_service = PlayerService(player_repository, compact_stats=os.environ.get('RPG_COMPACT_STATS') == '1')
+for loaded_player in player_repository.find_all():
+    adopt_item_templates(loaded_player)
 game_service = GameService(player_service)
-harvest_service = HarvestService(player_service)
+# Posições coalescidas: gravadas e anunciadas uma vez por tick do mundo
+movement_service = MovementService(max_batch_size=256)
+# Modelos de recurso novos vão para o log: os jogadores só guardam o id deles
+harvest_service = HarvestService(
+    player_service, item_repository,
+    on_new_resource=lambda item: record_operation(StateOp.ADD_TEMPLATE, {'item': item.model_dump(mode='json')})
+)
+# Importação e exportação em massa do conteúdo (NDJSON)
+catalog_service = CatalogService(batch_size=1000, export_chunk_size=500)
+# Um template validado por tipo de NPC; cada batalha só cria a instância
+npc_registry = NpcRegistry(drop_item=item_repository.first)
+# Sorteios de batalhas, coletas e forjas: um fluxo por encontro, derivado
+# da semente (RPG_RNG_SEED fixa a semente; sem ela cada execução sorteia a
+# sua). Com RPG_SESSION_RECORD as requisições e os ticks do mundo são
+# gravados; com RPG_REPLAY=1 o relógio do mundo para e os ticks vêm do
+# replay_cli.py, que reexecuta a gravação contra um servidor com a mesma semente
+RNG_CONFIG = {
+    'seed': int(os.environ['RPG_RNG_SEED']) if os.environ.get('RPG_RNG_SEED') else None,
+    'record_path': os.environ.get('RPG_SESSION_RECORD'),
+    'replay': os.environ.get('RPG_REPLAY') == '1'
+}
+rng_service = RngService(RNG_CONFIG['seed'])
+session_recorder = SessionRecorder(RNG_CONFIG['record_path'], rng_service.seed) if RNG_CONFIG['record_path'] else None
+if session_recorder is not None:
+    atexit.register(session_recorder.close)
+
+    # Registrado depois de encode_response, então roda antes dele e vê o JSON
+    @app.after_request
+    def record_request(response):
+        if request.path.startswith('/api/') and response.is_json and not response.is_streamed:
+            body = request.get_json(silent=True) if request.is_json else None
+            if body is not None or not request.content_length:
+                session_recorder.record(
+                    request.method,
+                    request.path,
+                    request.query_string.decode('latin-1'),
+                    {name: request.headers[name] for name in REPLAY_HEADERS if name in request.headers},
+                    body,
+                    response.get_json(silent=True)
+                )
+        return response
+
+# Nível de detalhe do log de /api/battle quando o cliente não pede outro
+# (none, summary ou full)
+BATTLE_CONFIG = {
+    'default_verbosity': os.environ.get('RPG_BATTLE_LOG', 'full')
+}
+# Balanceamento: lutas simuladas em lote, sem log
+battle_simulator = BattleSimulator(max_turns=10000)
+BALANCE_CONFIG = {
+    'max_fights': 2_000_000  # total de lutas por requisição
+}
+
+# Conteúdo do mundo: definições em content/world.json, compiladas para um
+# pacote binário (recompilado quando as definições mudam) e lidas por área
+CONTENT_CONFIG = {
+    'source_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content', 'world.json'),
+    'pack_path': os.environ.get(
+        'RPG_CONTENT_PACK', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content', 'world.pack')
+    )
+}
+content_service = ContentService(CONTENT_CONFIG['pack_path'], CONTENT_CONFIG['source_path'])
 
 # Estado global do jogo (em um projeto real seria um banco de dados)
 GAME_STATE = {
-    'current_player': None,
     'resources': {},
     'npcs': {},
     'market_items': [],
-    'last_regen_time': datetime.now()  # Para regeneração de vida/mana
 }
 
+# Cada cliente controla seu jogador por uma sessão; as requisições de um
+# mesmo jogador são serializadas pelo lock dele e as de jogadores
+# diferentes rodam em paralelo
+session_service = SessionService()
+# Locks do estado compartilhado do mundo ('market', 'resources', 'npcs').
+# Ficam sempre por último: quem tem um deles não pega o lock de um jogador
+world_locks = StripedLock()
+
+def current_session():
+    """Sessão da requisição (cabeçalho X-Session-Token)"""
+    return resolve_session(request.headers.get('X-Session-Token'))
+
+def resolve_session(token):
+    """Sessão de um token; sem token não há sessão (cada cliente usa a sua)"""
+    if token is None:
+        return None
+    return session_service.get(token)
+
+def player_route(view):
+    """Executa a rota com o lock do jogador da sessão, recebendo (sessão, jogador)"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        session = current_session()
+        if session is None:
+            error = 'Invalid session' if 'X-Session-Token' in request.headers else 'Missing session token'
+            return jsonify({'success': False, 'error': error})
+        with session.lock:
+            player = player_repository.find_by_id(session.player_id)
+            return view(session, player, *args, **kwargs)
+    return wrapper
+
+# Versões do catálogo (mercado, recursos e NPCs por área) usadas nas ETags.
+# A época muda a cada reinício e reset, então uma ETag antiga nunca coincide
+# com uma versão nova mesmo depois que os contadores voltam a zero
+CATALOG_VERSIONS = {
+    'epoch': uuid.uuid4().hex[:12],
+    'counters': Counter()
+}
+
+def bump_catalog_version(collection, area=None):
+    counters = CATALOG_VERSIONS['counters']
+    counters[collection] += 1
+    if area is not None:
+        counters[(collection, area)] += 1
+
+def catalog_version(collection, area=None):
+    return CATALOG_VERSIONS['counters'][collection if area is None else (collection, area)]
+
+def catalog_etag(name, version):
+    return f"{name}-{CATALOG_VERSIONS['epoch']}-{version}"
+
+# Configuração do log de operações do GAME_STATE (recuperação após falhas)
+STATE_LOG_CONFIG = {
+    'directory': os.environ.get('RPG_STATE_LOG_DIR', 'game_state'),
+    'fsync_interval': 0.05,  # segundos entre fsyncs agrupados
+    'snapshot_every': 10000  # operações entre snapshots (compactação do log)
+}
+
+state_log = OperationLog(STATE_LOG_CONFIG['directory'], fsync_interval=STATE_LOG_CONFIG['fsync_interval'])
+atexit.register(state_log.close)
+
+# Operações registradas no log de estado
+class StateOp(IntEnum):
+    CREATE_PLAYER = 1
+    PLAYER_UPDATE = 2
+    POSITION = 3
+    HARVEST = 4
+    BATTLE = 5
+    BUY = 6
+    FORGE = 7
+    ADD_ITEM = 8
+    ADD_RESOURCE = 9
+    ADD_NPC = 10
+    # Modelo de item fora do mercado (ex.: recurso criado pela coleta)
+    ADD_TEMPLATE = 11
+
+# Operações que carregam os campos alterados do jogador (ver record_player_state)
+PLAYER_STATE_OPS = {
+    StateOp.CREATE_PLAYER, StateOp.PLAYER_UPDATE, StateOp.HARVEST,
+    StateOp.BATTLE, StateOp.BUY, StateOp.FORGE
+}
+
+# Estados do jogador já enviados, base das respostas delta (X-Player-Revision)
+player_revisions = PlayerRevisions(history=32, max_players=1024)
+
+def player_payload(player):
+    """
+    Jogador na resposta: só o que mudou desde a revisão que o cliente
+    informou no cabeçalho X-Player-Revision, ou o snapshot completo com a
+    revisão atual quando ele não informa uma ou ela é antiga demais
+    """
+    return player_revisions.payload(player, request.headers.get('X-Player-Revision', type=int))
+
+# Canal de eventos (Server-Sent Events) que substitui o polling de regen,
+# recursos e NPCs
+event_hub = EventHub()
+EVENTS_CONFIG = {
+    'tick_interval': 1,  # segundos entre ticks do mundo (respawn e regeneração)
+    'keepalive': 15.0  # segundos entre comentários de keep-alive no stream
+}
+WORLD_TOPIC = 'world'
+
+def area_topic(area):
+    return f"area:{area}"
+
+def player_topic(player_id):
+    return f"player:{player_id}"
+
+def publish_event(topic, event, data):
+    # Sem assinantes o evento nem é codificado
+    if event_hub.has_subscribers(topic):
+        event_hub.publish(topic, sse_event(event, data))
+
+def event_topics(token, area):
+    """Tópicos que a sessão do token recebe estando na área; None se a sessão não existe"""
+    session = resolve_session(token)
+    if session is None:
+        return None
+    return [WORLD_TOPIC, area_topic(area), player_topic(session.player_id)]
+
 # Configurações de regeneração
 REGEN_CONFIG = {
     'hp_regen_percent': 0.05,  # 5% por minuto
@@ -50,18 +297,18 @@ REGEN_CONFIG = {
     'regen_interval': 60  # segundos
 }
 
-# Verificar e aplicar regeneração ao jogador
-def check_and_apply_regen():
-    if not GAME_STATE['current_player']:
-        return
-    
+# Verificar e aplicar regeneração a vários jogadores (pares sessão, jogador)
+# de uma vez; retorna os jogadores cujo HP ou mana mudaram
+def apply_regen(entries):
     now = datetime.now()
-    seconds_passed = (now - GAME_STATE['last_regen_time']).total_seconds()
-    
-    # Verificar se passou tempo suficiente para regenerar
-    if seconds_passed >= REGEN_CONFIG['regen_interval']:
-        player = GAME_STATE['current_player']
+    changed = {}
+    mana_gains = []
+    for session, player in entries:
+        seconds_passed = (now - session.last_regen_time).total_seconds()
         
+        # Verificar se passou tempo suficiente para regenerar
+        if seconds_passed < REGEN_CONFIG['regen_interval']:
+            continue
         # Calcular regeneração com base no tempo passado
         intervals = seconds_passed / REGEN_CONFIG['regen_interval']
         
@@ -70,286 +317,353 @@ def check_and_apply_regen():
         new_hp = min(player.hp + hp_regen, player.max_hp)
         if new_hp > player.hp:
             player.hp = new_hp
+            changed[player.id] = player
         
-        # Regenerar Mana
-        mana_regen = int(player.stats.mana * REGEN_CONFIG['mana_regen_percent'] * intervals)
-        if player.stats.mana > 0 and mana_regen > 0:
-            new_mana = min(player.stats.mana + mana_regen, player.stats.mana)
-            player.stats.mana = new_mana
+        # Regenerar Mana (limitada a max_mana)
+        mana_regen = int(player.max_mana * REGEN_CONFIG['mana_regen_percent'] * intervals)
+        if player.stats.mana < player.max_mana and mana_regen > 0:
+            mana_gains.append((player, mana_regen, player.max_mana))
         
         # Atualizar o tempo da última regeneração
-        GAME_STATE['last_regen_time'] = now
+        session.last_regen_time = now
+    
+    # No modo compacto a mana do lote inteiro é somada direto na coluna
+    for player in player_service.regenerate_mana(mana_gains):
+        changed[player.id] = player
+    return list(changed.values())
+
+def check_and_apply_regen(session, player):
+    return bool(apply_regen([(session, player)]))
+
+def flush_movements():
+    """Grava e anuncia a última posição de cada jogador que se moveu desde o tick anterior"""
+    for player_id, (x, y, area, _) in movement_service.drain().items():
+        lock = session_service.player_lock(player_id)
+        if lock is None:
+            continue
+        with lock:
+            player = player_repository.save(player_repository.find_by_id(player_id))
+            record_operation(StateOp.POSITION, {'player_id': player_id, 'x': player.x, 'y': player.y})
+        publish_event(area_topic(area), 'player_moved', {'id': player_id, 'x': x, 'y': y})
+
+def world_tick(seconds):
+    """
+    Avança o mundo: posições coalescidas, respawn dos recursos e
+    regeneração dos jogadores conectados ao canal de eventos
+    """
+    flush_movements()
+    for harvest_id in harvest_service.update_respawn_timers(seconds):
+        resource = GAME_STATE['resources'].get(harvest_id)
+        if resource:
+            publish_event(area_topic(resource['area']), 'resource_respawned', {'id': harvest_id})
+    
+    # Uma sessão por jogador conectado ao canal de eventos, regenerados em lote
+    regenerating = {}
+    for session in session_service.find_all():
+        if session.player_id not in regenerating and event_hub.has_subscribers(player_topic(session.player_id)):
+            regenerating[session.player_id] = session
+    if not regenerating:
+        return
+    with contextlib.ExitStack() as locks:
+        # Em ordem de id: as rotas seguram uma trava de jogador por vez
+        entries = []
+        for player_id in sorted(regenerating):
+            session = regenerating[player_id]
+            locks.enter_context(session.lock)
+            entries.append((session, player_repository.find_by_id(player_id)))
+        for player in apply_regen(entries):
+            record_player_state(StateOp.PLAYER_UPDATE, player)
+            publish_event(player_topic(player.id), 'regen', {'hp': player.hp, 'max_hp': player.max_hp, 'mana': player.stats.mana, 'max_mana': player.max_mana})
+
+def run_world_ticker():
+    interval = EVENTS_CONFIG['tick_interval']
+    while True:
+        time.sleep(interval)
+        try:
+            world_tick(interval)
+            if session_recorder is not None:
+                session_recorder.record_tick(interval)
+        except Exception:
+            app.logger.exception("World tick failed")
 
 # API para verificar e aplicar regeneração periodicamente
 @app.route('/api/player/regen', methods=['GET'])
-def player_regeneration():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
-    
-    check_and_apply_regen()
-    
-    return jsonify({
-        'success': True,
-        'player': player_to_dict(GAME_STATE['current_player'])
-    })
+@player_route
+def player_regeneration(session, player):
+    if check_and_apply_regen(session, player):
+        record_player_state(StateOp.PLAYER_UPDATE, player)
+    
+    return json_response(
+        {'success': True},
+        **player_payload(player)
+    )
 
+# Criar os itens iniciais do mercado
 # Inicializar o estado do jogo
 def initialize_game():
-    # Criar alguns itens básicos
-    sword = Item(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        name="Espada de Ferro",
-        description="Uma espada básica feita de ferro",
-        item_type=ItemType.GENERAL,
-        rarity=Rarity.COMMON,
-        price=50,
-        sell_price=20,
-        is_tradable=True,
-        is_consumable=False,
-        is_equippable=True,
-        is_boostable=False,
-        stats=Stats(
-            id=str(uuid.uuid4()),
-            created_at=datetime.now(),
-            strength=0,
-            intelligence=0,
-            dexterity=0,
-            constitution=0,
-            health=0,
-            mana=0,
-            physical_power=5,
-            magic_resistance=0,
-            speed=0,
-            magic_power=0,
-            armor=0,
-            critical_chance=0.05,
-            critical_power=0.1,
-            luck=0
-        )
-    )
-    item_repository.save(sword)
-    GAME_STATE['market_items'].append(sword)
-    
-    # Criar armadura
-    armor = Item(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        name="Armadura de Couro",
-        description="Uma armadura básica feita de couro",
-        item_type=ItemType.GENERAL,
-        rarity=Rarity.COMMON,
-        price=40,
-        sell_price=15,
-        is_tradable=True,
-        is_consumable=False,
-        is_equippable=True,
-        is_boostable=False,
-        stats=Stats(
-            id=str(uuid.uuid4()),
-            created_at=datetime.now(),
-            strength=0,
-            intelligence=0,
-            dexterity=0,
-            constitution=0,
-            health=0,
-            mana=0,
-            physical_power=0,
-            magic_resistance=0,
-            speed=0,
-            magic_power=0,
-            armor=3,
-            critical_chance=0,
-            critical_power=0,
-            luck=0
-        )
-    )
-    item_repository.save(armor)
-    GAME_STATE['market_items'].append(armor)
-    
-    # Criar poção
-    potion = Item(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        name="Poção de Cura",
-        description="Recupera 50 pontos de vida",
-        item_type=ItemType.GENERAL,
-        rarity=Rarity.COMMON,
-        price=10,
-        sell_price=5,
-        is_tradable=True,
-        is_consumable=True,
-        is_equippable=False,
-        is_boostable=False,
-        stats=Stats(
-            id=str(uuid.uuid4()),
-            created_at=datetime.now(),
-            strength=0,
-            intelligence=0,
-            dexterity=0,
-            constitution=0,
-            health=50,  # Poção restaura 50 de vida
-            mana=0,
-            physical_power=0,
-            magic_resistance=0,
-            speed=0,
-            magic_power=0,
-            armor=0,
-            critical_chance=0.0,
-            critical_power=0.0,
-            luck=0.0
-        )
-    )
-    item_repository.save(potion)
-    GAME_STATE['market_items'].append(potion)
-    
-    # Criar pergaminho de aprimoramento
-    scroll = Item(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        name="Pergaminho de Aprimoramento",
-        description="Aprimora um item +1",
-        item_type=ItemType.SCROLL,
-        rarity=Rarity.COMMON,
-        price=100,
-        sell_price=30,
-        is_tradable=True,
-        is_consumable=True,
-        is_equippable=False,
-        is_boostable=True,
-        stats=Stats(
-            id=str(uuid.uuid4()),
-            created_at=datetime.now(),
-            strength=0,
-            intelligence=0,
-            dexterity=0,
-            constitution=0,
-            health=0,
-            mana=0,
-            physical_power=0,
-            magic_resistance=0,
-            speed=0,
-            magic_power=0,
-            armor=0,
-            critical_chance=0.0,
-            critical_power=0.0,
-            luck=0.0
-        )
-    )
-    item_repository.save(scroll)
-    GAME_STATE['market_items'].append(scroll)
-    
-    # Criar recursos para colheita
-    minerals = [
-        create_harvest("Ferro", TypeEntity.MINING, 3, 60),
-        create_harvest("Cobre", TypeEntity.MINING, 4, 45),
-        create_harvest("Prata", TypeEntity.MINING, 2, 90),
-    ]
-    plants = [
-        create_harvest("Ervas", TypeEntity.GATHERING, 5, 30),
-        create_harvest("Flores", TypeEntity.GATHERING, 3, 40),
-    ]
-    trees = [
-        create_harvest("Carvalho", TypeEntity.LUMBERING, 3, 120),
-        create_harvest("Pinheiro", TypeEntity.LUMBERING, 4, 90),
-    ]
-    
-    # Registrar todos os recursos no serviço de colheita
-    for resource in minerals + plants + trees:
-        harvest_service.register_harvest(resource)
-        GAME_STATE['resources'][resource.id] = {
-            'id': resource.id,
-            'name': resource.name,
-            'type': resource.type_entity.value,
-            'position': {
-                'x': 0,  # Será definido no frontend
-                'y': 0
-            },
-            'area': 'forest_1'  # Floresta inicial
-        }
-    
-    # Criar NPCs
-    create_enemy("Lobo Selvagem", 1, 40, 5, 3, 'forest_1')
-    create_enemy("Goblin", 2, 60, 8, 5, 'forest_1')
-    create_enemy("Bandido", 3, 80, 10, 8, 'forest_2')
-    create_enemy("Ogro", 5, 150, 15, 12, 'forest_2')
-    create_enemy("Dragão Jovem", 10, 300, 25, 20, 'forest_3')
-
-def create_harvest(name, type_entity, drop_amount, respawn_time):
-    """Método auxiliar para criar entidades de colheita"""
-    return Harvest(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        name=name,
-        description=f"Um recurso que pode ser coletado através de {type_entity.value}",
-        type_entity=type_entity,
-        drop_amount=drop_amount,
-        respawn_time=respawn_time,
-        hp=10,
-        is_collidable=True
-    )
+    # Itens já persistidos voltam ao mercado em vez de serem recriados; os
+    # modelos de recurso criados pela coleta não são vendidos nele
+    market_items = [item for item in item_repository.find_all() if item.item_type != ItemType.RESOURCE]
+    if market_items:
+        GAME_STATE['market_items'].extend(market_items)
+    else:
+        seed_market()
+    # Recursos e NPCs vêm do pacote de conteúdo quando alguém entra na área (enter_area)
 
-def create_enemy(name, level, hp, damage, armor, area):
-    """Cria um inimigo no mundo"""
-    npc_stats = Stats(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        strength=level * 2,
-        intelligence=level,
-        dexterity=int(level * 1.5),
-        constitution=level * 2,
-        health=hp,
-        mana=level * 10,
-        physical_power=damage,
-        magic_resistance=level,
-        speed=level,
-        magic_power=level,
-        armor=armor,
-        critical_chance=0.03,
-        critical_power=1.3,
-        luck=1.0
-    )
-    
-    drop_item = DropItem(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        item=item_repository.items[0] if item_repository.items else None,
-        chance=0.5,
-        amount=1
-    )
-    
-    enemy = NPC(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        name=name,
-        description=f"Um {name} hostil",
-        stats=npc_stats,
-        x=0,  # Será definido no frontend
-        y=0,
-        hp=hp,
-        max_hp=hp,
-        level=level,
-        drop_items=[drop_item]
-    )
-    
-    GAME_STATE['npcs'][enemy.id] = {
-        'id': enemy.id,
-        'name': enemy.name,
-        'level': enemy.level,
-        'hp': enemy.hp,
-        'max_hp': enemy.max_hp,
-        'position': {
-            'x': 0,  # Será definido no frontend
-            'y': 0
-        },
-        'area': area,
-        'type': 'enemy'
+def seed_market():
+    """Salva os itens do pacote de conteúdo e os coloca no mercado"""
+    market_items = content_service.market_items()
+    item_repository.save_all(market_items)
+    GAME_STATE['market_items'].extend(market_items)
+
+def referenced_template_ids():
+    """Ids dos modelos de item usados por algum jogador (inventário ou equipamento)"""
+    return {
+        instance.template_id
+        for player in player_repository.find_all()
+        for instance in (*player.inventory, *player.equipment)
     }
-    
-    return enemy
 
-# Inicializa o estado do jogo ao iniciar o servidor
-initialize_game()
+def enter_area(area):
+    """Carrega do pacote os recursos e NPCs da área na primeira vez que alguém entra nela"""
+    content_service.load_area(area, apply_area_content)
+
+def enter_all_areas():
+    for area in content_service.areas:
+        enter_area(area)
+
+def apply_area_content(area, resources, npcs):
+    # Os ids do pacote são fixos: conteúdo já restaurado do snapshot é só substituído
+    import_resources(resources)
+    import_npcs(npcs)
+    npc_registry.register(npcs)
+
+def dump_game_state():
+    """
+    Serializa o GAME_STATE para um snapshot. Os jogadores são copiados sem
+    travar: quem mudar durante a cópia registra o estado completo no log
+    depois do ponto do snapshot, e o replay corrige a cópia
+    """
+    # Lidas antes do mundo: uma área só entra na lista depois de aplicada
+    loaded_areas = content_service.loaded_areas
+    sessions = session_service.find_all()
+    players = [player_repository.find_by_id(player_id) for player_id in dict.fromkeys(session.player_id for session in sessions)]
+    with world_locks('market'):
+        market_items = list(GAME_STATE['market_items'])
+    market_ids = {item.id for item in market_items}
+    templates = [item for item in item_repository.find_all() if item.id not in market_ids]
+    with world_locks('resources'):
+        harvests = [harvest for harvest, _ in list(harvest_service.active_harvests.values())]
+        resources = dict(GAME_STATE['resources'])
+    with world_locks('npcs'):
+        npcs = dict(GAME_STATE['npcs'])
+    return {
+        'players': [player.model_dump(mode='json') for player in players],
+        'sessions': {session.token: session.player_id for session in sessions},
+        'market_items': [item.model_dump(mode='json') for item in market_items],
+        # Modelos fora do mercado (recursos, itens retirados dele) que os jogadores podem ter
+        'item_templates': [item.model_dump(mode='json') for item in templates],
+        'harvests': [harvest.model_dump(mode='json') for harvest in harvests],
+        'resources': resources,
+        'npcs': npcs,
+        'loaded_areas': loaded_areas
+    }
+
+# Pedido de snapshot: gerado numa thread própria, fora da requisição que
+# fez o log passar do limite (e das travas que ela segura)
+snapshot_requested = threading.Event()
+
+def record_operation(op, payload):
+    """Registra uma mutação no log e pede um snapshot quando o log cresce demais"""
+    state_log.append(op, payload)
+    if state_log.operations_since_snapshot >= STATE_LOG_CONFIG['snapshot_every']:
+        snapshot_requested.set()
+
+def run_snapshotter():
+    while True:
+        snapshot_requested.wait()
+        snapshot_requested.clear()
+        try:
+            state_log.snapshot(dump_game_state)
+        except Exception:
+            app.logger.exception("State snapshot failed")
+
+def record_player_state(op, player, **extra):
+    # Ponto único de gravação do jogador por requisição: só os campos
+    # alterados vão para o banco e para o log (todos os salvos desde o
+    # registro anterior, inclusive por outros caminhos; o jogador inteiro
+    # quando ele é novo)
+    player = player_repository.save(player)
+    fields = player_repository.take_changes(player.id)
+    record_operation(op, {'player_id': player.id, 'player': player.model_dump(mode='json', include=fields), **extra})
+
+def import_items(items):
+    """
+    Aplica itens já validados de uma vez. Como em /api/admin/items, eles
+    entram no mercado, exceto os modelos de recurso (criados pela coleta);
+    um id já existente é substituído no lugar
+    """
+    with world_locks('market'):
+        item_repository.save_all(items)
+        market_items = GAME_STATE['market_items']
+        positions = {item.id: position for position, item in enumerate(market_items)}
+        for item in items:
+            if item.item_type == ItemType.RESOURCE:
+                continue
+            if item.id in positions:
+                market_items[positions[item.id]] = item
+            else:
+                positions[item.id] = len(market_items)
+                market_items.append(item)
+        bump_catalog_version('market')
+
+def import_resources(entries):
+    with world_locks('resources'):
+        for entry in entries:
+            harvest_service.register_harvest(entry['harvest'])
+            GAME_STATE['resources'][entry['resource']['id']] = entry['resource']
+        for area in {entry['resource']['area'] for entry in entries}:
+            bump_catalog_version('resources', area)
+
+def import_npcs(npcs):
+    with world_locks('npcs'):
+        for npc in npcs:
+            GAME_STATE['npcs'][npc['id']] = npc
+        for area in {npc['area'] for npc in npcs}:
+            bump_catalog_version('npcs', area)
+
+CATALOG_IMPORTERS = {
+    'items': import_items,
+    'resources': import_resources,
+    'npcs': import_npcs
+}
+
+def catalog_export(collection):
+    """
+    (registros, codificador) de uma coleção no formato lido por
+    CatalogService.read. Só as referências são copiadas; cada registro é
+    codificado quando chega a vez dele no stream
+    """
+    if collection == 'items':
+        return item_repository.find_all(), Item.model_dump_json
+    if collection == 'resources':
+        with world_locks('resources'):
+            active_harvests = harvest_service.active_harvests
+            entries = [
+                (active_harvests[resource_id][0], resource)
+                for resource_id, resource in GAME_STATE['resources'].items()
+                if resource_id in active_harvests
+            ]
+        return entries, lambda entry: json.dumps({'harvest': entry[0].model_dump(mode='json'), 'resource': entry[1]})
+    with world_locks('npcs'):
+        npcs = list(GAME_STATE['npcs'].values())
+    return npcs, json.dumps
+
+def restore_player(data):
+    player = Player.model_validate(data)
+    adopt_item_templates(player)
+    replaced = player_repository.find_by_id(player.id)
+    player = player_repository.save(player_service.compact(player))
+    if replaced is not None:
+        # O objeto carregado do banco sai de cena: as colunas dele ficam livres
+        player_service.release(replaced)
+    # O estado restaurado já está no log
+    player_repository.take_changes(player.id)
+    return player
+
+def restore_item_template(data):
+    item_repository.save(Item.model_validate(data))
+
+def restore_market_item(data):
+    item = Item.model_validate(data)
+    item_repository.save(item)
+    # Operações registradas durante um snapshot podem já estar nele
+    if all(existing.id != item.id for existing in GAME_STATE['market_items']):
+        GAME_STATE['market_items'].append(item)
+
+def restore_resource(harvest_data, resource):
+    harvest_service.register_harvest(Harvest.model_validate(harvest_data))
+    GAME_STATE['resources'][resource['id']] = resource
+
+def restore_game_state():
+    """
+    Reconstrói o GAME_STATE a partir do último snapshot e das operações
+    registradas depois dele. Retorna False se não houver nada salvo.
+    """
+    snapshot, operations = state_log.recover()
+    if snapshot is None and not operations:
+        return False
+    
+    # Estado completo de cada jogador (snapshot ou criação) e, em ordem, os
+    # campos alterados registrados depois dele
+    last_players = {}
+    player_changes = defaultdict(list)
+    sessions = {}
+    if snapshot:
+        for item_data in snapshot.get('item_templates', ()):
+            restore_item_template(item_data)
+        for item_data in snapshot['market_items']:
+            restore_market_item(item_data)
+        resources = snapshot['resources']
+        for harvest_data in snapshot['harvests']:
+            restore_resource(harvest_data, resources[harvest_data['id']])
+        GAME_STATE['npcs'] = snapshot['npcs']
+        # Snapshots anteriores ao pacote de conteúdo já têm o mundo inteiro
+        content_service.mark_loaded(snapshot.get('loaded_areas', content_service.areas))
+        last_players = {player['id']: player for player in snapshot['players']}
+        sessions = dict(snapshot['sessions'])
+    
+    for op, data in operations:
+        if op == StateOp.CREATE_PLAYER:
+            payload = decode_payload(data)
+            last_players[payload['player_id']] = payload['player']
+            player_changes.pop(payload['player_id'], None)
+            sessions[payload['session']] = payload['player_id']
+        elif op in PLAYER_STATE_OPS:
+            payload = decode_payload(data)
+            player_changes[payload['player_id']].append(payload['player'])
+        elif op == StateOp.POSITION:
+            position = decode_payload(data)
+            player_changes[position['player_id']].append({'x': position['x'], 'y': position['y']})
+        elif op == StateOp.ADD_ITEM:
+            restore_market_item(decode_payload(data)['item'])
+        elif op == StateOp.ADD_TEMPLATE:
+            restore_item_template(decode_payload(data)['item'])
+        elif op == StateOp.ADD_RESOURCE:
+            payload = decode_payload(data)
+            restore_resource(payload['harvest'], payload['resource'])
+        elif op == StateOp.ADD_NPC:
+            npc = decode_payload(data)['npc']
+            GAME_STATE['npcs'][npc['id']] = npc
+    
+    for player_id in last_players.keys() | player_changes.keys():
+        player_data = last_players.get(player_id)
+        if player_data is None:
+            # Sem estado completo no log: as alterações valem sobre o que está no banco
+            player = player_repository.find_by_id(player_id)
+            if player is None:
+                continue
+            player_data = player.model_dump(mode='json')
+        for changes in player_changes.get(player_id, ()):
+            player_data.update(changes)
+        restore_player(player_data)
+    for token, player_id in sessions.items():
+        session_service.open(player_id, token)
+    
+    return True
+
+# Inicializa o estado do jogo ao iniciar o servidor, recuperando o que foi salvo
+if not restore_game_state():
+    initialize_game()
+    state_log.snapshot(dump_game_state)
+# Só depois da restauração: os jogadores restaurados já foram compactados
+# e os carregados do banco que eles substituíram não precisam ser
+for loaded_player in player_repository.find_all():
+    player_service.compact(loaded_player)
+
+threading.Thread(target=run_snapshotter, name='state-snapshotter', daemon=True).start()
+if not RNG_CONFIG['replay']:
+    threading.Thread(target=run_world_ticker, name='world-ticker', daemon=True).start()
 
 # Rotas para servir arquivos estáticos
 @app.route('/')
@@ -367,56 +681,103 @@ def create_player():
     account_id = "default_account"
     username = data.get('username', 'Unknown')
     
-    player = player_service.create_player(account_id, username)
-    GAME_STATE['current_player'] = player
-    
-    return jsonify({
-        'success': True,
-        'player': player_to_dict(player)
-    })
+    try:
+        player = player_service.create_player(account_id, username)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)})
+    session = session_service.open(player.id)
+    with session.lock:
+        record_player_state(StateOp.CREATE_PLAYER, player, session=session.token)
+        
+        return json_response(
+            {'success': True, 'session_token': session.token},
+            **player_payload(player)
+        )
 
 # API para obter dados do jogador atual
 @app.route('/api/player', methods=['GET'])
-def get_player():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
-    
-    return jsonify({
-        'success': True,
-        'player': player_to_dict(GAME_STATE['current_player'])
-    })
+@player_route
+def get_player(session, player):
+    return json_response(
+        {'success': True},
+        **player_payload(player)
+    )
 
 # API para atualizar posição do jogador
 @app.route('/api/player/position', methods=['POST'])
-def update_position():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
+@player_route
+def update_position(session, player):
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Invalid position'}), 400
+    area = data.get('area', 'city')
+    enter_area(area)
+    
+    # Sem 't' a posição vale como a mais recente (ver MovementService.submit)
+    position = {'x': data.get('x', 0), 'y': data.get('y', 0)}
+    if 't' in data:
+        position['t'] = data['t']
+    
+    # Gravada no próximo tick do mundo junto com as demais posições
+    try:
+        move = movement_service.submit(player.id, area, [position])
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Invalid position'}), 400
+    if move:
+        player.x, player.y = move[0], move[1]
     
+    response = {
+        'success': True,
+        'position': {'x': player.x, 'y': player.y, 'area': area}
+    }
+    # Clientes que usam o protocolo delta recebem também as mudanças do jogador
+    if 'X-Player-Revision' not in request.headers:
+        return jsonify(response)
+    return json_response(response, **player_payload(player))
+
+# API para enviar um trecho do movimento de uma vez
+@app.route('/api/player/path', methods=['POST'])
+@player_route
+def update_path(session, player):
+    """
+    Recebe as posições acumuladas pelo cliente desde o último envio,
+    {'area': ..., 'positions': [{'x', 'y', 't'}, ...]} com t em ms. Só a
+    mais recente vale; lotes mais antigos que a última posição aceita são
+    ignorados
+    """
     data = request.json
-    x = data.get('x', 0)
-    y = data.get('y', 0)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Invalid positions'}), 400
     area = data.get('area', 'city')
+    enter_area(area)
     
-    GAME_STATE['current_player'].x = x
-    GAME_STATE['current_player'].y = y
+    try:
+        move = movement_service.submit(player.id, area, data.get('positions', []))
+    except (KeyError, TypeError):
+        return jsonify({'success': False, 'error': 'Invalid positions'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if move:
+        player.x, player.y = move[0], move[1]
     
-    return jsonify({
+    response = {
         'success': True,
-        'position': {'x': x, 'y': y, 'area': area}
-    })
+        'accepted': move is not None,
+        'position': {'x': player.x, 'y': player.y, 'area': area}
+    }
+    # Clientes que usam o protocolo delta recebem também as mudanças do jogador
+    if 'X-Player-Revision' not in request.headers:
+        return jsonify(response)
+    return json_response(response, **player_payload(player))
 
 # API para distribuir pontos de atributo
 @app.route('/api/player/attributes', methods=['POST'])
-def distribute_attribute_points():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
-    
+@player_route
+def distribute_attribute_points(session, player):
     data = request.json
     attribute = data.get('attribute')
     points = data.get('points', 1)
     
-    player = GAME_STATE['current_player']
-    
     if player.attribute_points < points:
         return jsonify({'success': False, 'error': 'Not enough attribute points'})
     
@@ -429,6 +790,7 @@ def distribute_attribute_points():
         player.stats.magic_resistance += int(points * 0.5)
         player.stats.magic_power += int(points * 0.8)
         player.stats.mana += points * 2
+        player.max_mana += points * 2
         player.stats.luck += points * 0.05
     elif attribute == 'dexterity':
         player.stats.dexterity += points
@@ -448,142 +810,124 @@ def distribute_attribute_points():
     
     # Deduzir os pontos gastos
     player.attribute_points -= points
+    record_player_state(StateOp.PLAYER_UPDATE, player)
     
-    return jsonify({
-        'success': True,
-        'player': player_to_dict(player)
-    })
+    return json_response(
+        {'success': True},
+        **player_payload(player)
+    )
 
 # API para equipar um item
 @app.route('/api/player/equip', methods=['POST'])
-def equip_item():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
-    
+@player_route
+def equip_item(session, player):
     data = request.json
     item_id = data.get('item_id')
     
     try:
-        player = player_service.equip_item(GAME_STATE['current_player'], item_id)
-        GAME_STATE['current_player'] = player
+        player = player_service.equip_item(player, item_id)
+        record_player_state(StateOp.PLAYER_UPDATE, player)
         
-        return jsonify({
-            'success': True,
-            'player': player_to_dict(player)
-        })
+        return json_response(
+            {'success': True},
+            **player_payload(player)
+        )
     except ValueError as e:
         return jsonify({'success': False, 'error': str(e)})
 
 # API para coletar recurso
 @app.route('/api/harvest', methods=['POST'])
-def harvest_resource():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
-    
+@player_route
+def harvest_resource(session, player):
     data = request.json
     harvest_id = data.get('harvest_id')
     
-    success, message, items = harvest_service.harvest_resource(GAME_STATE['current_player'], harvest_id)
+    with player_repository.deferred():
+        success, message, items = harvest_service.harvest_resource(
+            player, harvest_id, rng_service.stream('harvest', player.username)
+        )
+    record_player_state(StateOp.HARVEST, player)
+    
+    resource = GAME_STATE['resources'].get(harvest_id)
+    if items and resource:
+        _, respawn_time = harvest_service.active_harvests.get(harvest_id, (None, 0))
+        publish_event(area_topic(resource['area']), 'resource_harvested', {
+            'id': harvest_id,
+            'respawn_time': respawn_time
+        })
     
-    return jsonify({
-        'success': success,
-        'message': message,
-        'items': [item_to_dict(item) for item in items]
-    })
+    fragments = {'items': json_list(instance_json(item) for item in items)}
+    # Clientes que usam o protocolo delta recebem também as mudanças do jogador
+    if 'X-Player-Revision' in request.headers:
+        fragments.update(player_payload(player))
+    return json_response(
+        {
+            'success': success,
+            'message': message
+        },
+        **fragments
+    )
 
 # API para batalhar
 @app.route('/api/battle', methods=['POST'])
-def battle():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
-    
+@player_route
+def battle(session, player):
     data = request.json
     npc_id = data.get('npc_id')
+    try:
+        verbosity = BattleVerbosity.parse(data.get('verbosity', BATTLE_CONFIG['default_verbosity']))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)})
     
     # Encontrar o NPC pelo ID
     npc_data = GAME_STATE['npcs'].get(npc_id)
     if not npc_data:
         return jsonify({'success': False, 'error': 'NPC not found'})
     
-    # Criar um objeto NPC para a batalha
-    npc_stats = Stats(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        strength=npc_data['level'] * 2,
-        intelligence=npc_data['level'],
-        dexterity=int(npc_data['level'] * 1.5),
-        constitution=npc_data['level'] * 2,
-        health=npc_data['hp'],
-        mana=npc_data['level'] * 10,
-        physical_power=npc_data['level'] * 2,
-        magic_resistance=npc_data['level'],
-        speed=npc_data['level'],
-        magic_power=npc_data['level'],
-        armor=npc_data['level'],
-        critical_chance=0.03,
-        critical_power=1.3,
-        luck=1.0
-    )
-    
-    drop_item = DropItem(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        item=item_repository.items[0] if item_repository.items else None,
-        chance=0.5,
-        amount=1
-    )
+    # Instância do NPC para a batalha, sobre o template do tipo dele
+    npc = npc_registry.encounter(npc_data)
     
-    npc = NPC(
-        id=npc_id,
-        created_at=datetime.now(),
-        name=npc_data['name'],
-        description=f"Um {npc_data['name']} hostil",
-        stats=npc_stats,
-        x=npc_data['position']['x'],
-        y=npc_data['position']['y'],
-        hp=npc_data['hp'],
-        max_hp=npc_data['max_hp'],
-        level=npc_data['level'],
-        drop_items=[drop_item]
-    )
-    
-    victory, battle_log, rewards = game_service.battle(GAME_STATE['current_player'], npc)
+    # Cada drop salvaria o jogador; o bloco junta tudo em uma gravação
+    with player_repository.deferred():
+        victory, battle_log, rewards = game_service.battle(
+            player, npc, verbosity, rng_service.stream('battle', player.username)
+        )
     
     # Aplicar consequências da batalha (o serviço já atualizou o jogador)
     if victory:
         # Chance de ganhar atributos ao derrotar inimigos poderosos
         if npc.level >= 5:
-            GAME_STATE['current_player'].attribute_points += 2
+            player.attribute_points += 2
+    record_player_state(StateOp.BATTLE, player)
     
-    return jsonify({
-        'success': True,
-        'victory': victory,
-        'battle_log': battle_log,
-        'rewards': rewards,
-        'player': player_to_dict(GAME_STATE['current_player'])
-    })
+    return json_response(
+        {
+            'success': True,
+            'victory': victory,
+            'battle_log': battle_log.render(verbosity),
+            'rewards': rewards
+        },
+        **player_payload(player)
+    )
 
 # API para comprar item do mercado
 @app.route('/api/market/buy', methods=['POST'])
-def buy_item():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
-    
+@player_route
+def buy_item(session, player):
     data = request.json
     item_id = data.get('item_id')
     
     # Encontrar o item pelo ID
     item = None
-    for market_item in GAME_STATE['market_items']:
-        if market_item.id == item_id:
-            item = market_item
-            break
+    with world_locks('market'):
+        for market_item in GAME_STATE['market_items']:
+            if market_item.id == item_id:
+                item = market_item
+                break
     
     if not item:
         return jsonify({'success': False, 'error': 'Item not found'})
     
-    player = GAME_STATE['current_player']
-    
     # Verificar se tem ouro suficiente
     if player.gold < item.price:
         return jsonify({'success': False, 'error': 'Not enough gold'})
@@ -591,212 +935,159 @@ def buy_item():
     # Deduzir o ouro
     player.gold -= item.price
     
-    # Adicionar o item ao inventário (criando uma cópia)
-    new_item = Item(
-        id=str(uuid.uuid4()),
-        created_at=datetime.now(),
-        name=item.name,
-        description=item.description,
-        item_type=item.item_type,
-        rarity=item.rarity,
-        price=item.price,
-        sell_price=item.sell_price,
-        is_tradable=item.is_tradable,
-        is_consumable=item.is_consumable,
-        is_equippable=item.is_equippable,
-        is_boostable=item.is_boostable,
-        stats=item.stats
-    )
-    
+    # Adicionar o item ao inventário (uma instância que aponta para o modelo do mercado)
     try:
-        player_service.add_item_to_inventory(player, new_item)
+        new_item = player_service.add_item_to_inventory(player, item)
     except ValueError as e:
         # Devolver o ouro se não conseguiu adicionar
         player.gold += item.price
         return jsonify({'success': False, 'error': str(e)})
+    record_player_state(StateOp.BUY, player)
     
-    return jsonify({
-        'success': True,
-        'player': player_to_dict(player),
-        'item': item_to_dict(new_item)
-    })
+    return json_response(
+        {'success': True},
+        **player_payload(player),
+        item=instance_json(new_item)
+    )
 
 # API para aprimorar um item
 @app.route('/api/forge', methods=['POST'])
-def enhance_item():
-    if not GAME_STATE['current_player']:
-        return jsonify({'success': False, 'error': 'No player created'})
-    
+@player_route
+def enhance_item(session, player):
     data = request.json
     item_id = data.get('item_id')
     scroll_id = data.get('scroll_id')
     
-    player = GAME_STATE['current_player']
-    
     # Encontrar o item a ser aprimorado
-    item_to_enhance = None
-    for item in player.inventory:
-        if item.id == item_id:
-            item_to_enhance = item
-            break
+    item_to_enhance = player.inventory.get(item_id)
     
     if not item_to_enhance:
         return jsonify({'success': False, 'error': 'Item not found in inventory'})
     
+    if item_to_enhance.quantity > 1:
+        return jsonify({'success': False, 'error': 'Cannot enhance a stacked item'})
+    
     # Encontrar o pergaminho
-    scroll = None
-    for item in player.inventory:
-        if item.id == scroll_id and item.item_type == ItemType.SCROLL:
-            scroll = item
-            break
+    scroll = player.inventory.get(scroll_id)
     
-    if not scroll:
+    if not scroll or scroll.item_type != ItemType.SCROLL:
         return jsonify({'success': False, 'error': 'Scroll not found in inventory'})
     
     # Verificar o nível atual de aprimoramento
-    current_level = 0
-    if "+" in item_to_enhance.name:
-        try:
-            current_level = int(item_to_enhance.name.split("+")[1])
-        except:
-            pass
+    current_level = item_to_enhance.enhancement
     
     # Calcular chance de sucesso
     success_chance = max(0.05, 1.0 - (current_level * 0.05))
     
-    import random
-    success = random.random() < success_chance
+    success = rng_service.stream('forge', player.username).random() < success_chance
     
-    # Remover o pergaminho do inventário
-    player.inventory = [item for item in player.inventory if item.id != scroll.id]
+    # Consumir um pergaminho da pilha
+    player_service.remove_item_from_inventory(player, scroll.id)
     
     if success:
         # Aprimorar o item
-        item_to_enhance.name = item_to_enhance.name.split("+")[0] + f" +{current_level + 1}"
+        item_to_enhance.enhancement = current_level + 1
         
-        # Melhorar atributos
+        # Melhorar atributos (copy-on-write: o bloco de atributos é compartilhado)
         if item_to_enhance.stats:
-            item_to_enhance.stats.physical_power = item_to_enhance.stats.physical_power * 1.1 if item_to_enhance.stats.physical_power else 1
-            item_to_enhance.stats.armor = item_to_enhance.stats.armor * 1.1 if item_to_enhance.stats.armor else 1
+            stats = item_to_enhance.stats
+            item_to_enhance.stats_override = stats.evolve(
+                physical_power=math.ceil(stats.physical_power * 1.1) if stats.physical_power else 1,
+                armor=math.ceil(stats.armor * 1.1) if stats.armor else 1
+            )
         
         message = f"Aprimoramento bem-sucedido! {item_to_enhance.name}"
     else:
         message = "Aprimoramento falhou!"
+    record_player_state(StateOp.FORGE, player)
     
-    return jsonify({
-        'success': True,
-        'enhancement_success': success,
-        'message': message,
-        'success_chance': success_chance * 100,
-        'player': player_to_dict(player)
-    })
+    return json_response(
+        {
+            'success': True,
+            'enhancement_success': success,
+            'message': message,
+            'success_chance': success_chance * 100
+        },
+        **player_payload(player)
+    )
+
+# Canal de eventos do cliente (Server-Sent Events)
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Eventos da área (?area=) e do jogador da sessão. Como o EventSource do
+    navegador não envia cabeçalhos, o token também pode vir em ?token=.
+    Aqui cada cliente conectado ocupa uma thread; no servidor ASGI (asgi.py)
+    este caminho é atendido direto no event loop.
+    """
+    token = request.headers.get('X-Session-Token', request.args.get('token'))
+    topics = event_topics(token, request.args.get('area', 'city'))
+    if topics is None:
+        return jsonify({'success': False, 'error': 'Invalid session'})
+    subscription = event_hub.subscribe(QueueSubscription(topics))
+    
+    def stream():
+        try:
+            yield b': connected\n\n'
+            while not subscription.lagged:
+                frame = subscription.get(timeout=EVENTS_CONFIG['keepalive'])
+                yield frame if frame is not None else b': keep-alive\n\n'
+            # Cliente atrasado: ele reconecta e busca o estado completo
+            yield sse_event('lagged', {})
+        finally:
+            event_hub.unsubscribe(subscription)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 # API para obter recursos disponíveis
 @app.route('/api/resources', methods=['GET'])
 def get_resources():
     area = request.args.get('area', 'city')
+    enter_area(area)
     
-    # Filtrar recursos pela área atual
-    area_resources = {k: v for k, v in GAME_STATE['resources'].items() if v['area'] == area}
+    def build():
+        # Filtrar recursos pela área atual
+        with world_locks('resources'):
+            area_resources = {k: v for k, v in GAME_STATE['resources'].items() if v['area'] == area}
+        return jsonify({
+            'success': True,
+            'resources': area_resources
+        })
     
-    return jsonify({
-        'success': True,
-        'resources': area_resources
-    })
+    return conditional_response(catalog_etag('resources', catalog_version('resources', area)), build)
 
 # API para obter NPCs disponíveis
 @app.route('/api/npcs', methods=['GET'])
 def get_npcs():
     area = request.args.get('area', 'city')
+    enter_area(area)
     
-    # Filtrar NPCs pela área atual
-    area_npcs = {k: v for k, v in GAME_STATE['npcs'].items() if v['area'] == area}
+    def build():
+        # Filtrar NPCs pela área atual
+        with world_locks('npcs'):
+            area_npcs = {k: v for k, v in GAME_STATE['npcs'].items() if v['area'] == area}
+        return jsonify({
+            'success': True,
+            'npcs': area_npcs
+        })
     
-    return jsonify({
-        'success': True,
-        'npcs': area_npcs
-    })
+    return conditional_response(catalog_etag('npcs', catalog_version('npcs', area)), build)
 
 # API para obter itens do mercado
 @app.route('/api/market', methods=['GET'])
 def get_market_items():
-    return jsonify({
-        'success': True,
-        'items': [item_to_dict(item) for item in GAME_STATE['market_items']]
-    })
-
-# Funções auxiliares para conversão de objetos em dicionários
-def player_to_dict(player):
-    return {
-        'id': player.id,
-        'username': player.username,
-        'equipment': [item_to_dict(item) for item in player.equipment],
-        'inventory': [item_to_dict(item) for item in player.inventory],
-        'stats': stats_to_dict(player.stats),
-        'life_skills': life_skills_to_dict(player.life_skills),
-        'position': {'x': player.x, 'y': player.y},
-        'hp': player.hp,
-        'max_hp': player.max_hp,
-        'level': player.level,
-        'exp': player.exp,
-        'next_level_exp': player.next_level_exp,
-        'gold': player.gold,
-        'inventory_size': player.inventory_size,
-        'attribute_points': player.attribute_points
-    }
-
-def item_to_dict(item):
-    if not item:
-        return None
-    
-    return {
-        'id': item.id,
-        'name': item.name,
-        'description': item.description,
-        'item_type': item.item_type.value,
-        'rarity': item.rarity.value,
-        'price': item.price,
-        'sell_price': item.sell_price,
-        'is_tradable': item.is_tradable,
-        'is_consumable': item.is_consumable,
-        'is_equippable': item.is_equippable,
-        'is_boostable': item.is_boostable,
-        'stats': stats_to_dict(item.stats) if item.stats else None
-    }
-
-def stats_to_dict(stats):
-    if not stats:
-        return None
-    
-    return {
-        'strength': stats.strength,
-        'intelligence': stats.intelligence,
-        'dexterity': stats.dexterity,
-        'constitution': stats.constitution,
-        'health': stats.health,
-        'mana': stats.mana,
-        'physical_power': stats.physical_power,
-        'magic_resistance': stats.magic_resistance,
-        'speed': stats.speed,
-        'magic_power': stats.magic_power,
-        'armor': stats.armor,
-        'critical_chance': stats.critical_chance,
-        'critical_power': stats.critical_power,
-        'luck': stats.luck
-    }
+    return conditional_response(
+        catalog_etag('market', catalog_version('market')),
+        lambda: json_response(
+            {'success': True},
+            items=json_list(item_json(item) for item in GAME_STATE['market_items'])
+        )
+    )
 
-def life_skills_to_dict(life_skills):
-    if not life_skills:
-        return None
-    
-    return {
-        'cooking': life_skills.cooking,
-        'fishing': life_skills.fishing,
-        'mining': life_skills.mining,
-        'gathering': life_skills.gathering,
-        'lumbering': life_skills.lumbering,
-        'crafting': life_skills.crafting
-    }
+# API com as chaves numéricas das respostas MessagePack (chave = posição na lista)
+@app.route('/api/wire/schema', methods=['GET'])
+def get_wire_schema():
+    return jsonify({'success': True, 'fields': list(WIRE_FIELDS)})
 
 # API para obter dados de admin
 @app.route('/admin')
@@ -809,9 +1100,7 @@ def add_item():
     data = request.json
     
     try:
-        stats = Stats(
-            id=str(uuid.uuid4()),
-            created_at=datetime.now(),
+        stats = FrozenStats.intern(
             strength=int(data.get('strength', 0)),
             intelligence=int(data.get('intelligence', 0)),
             dexterity=int(data.get('dexterity', 0)),
@@ -845,12 +1134,15 @@ def add_item():
         )
         
         item_repository.save(item)
-        GAME_STATE['market_items'].append(item)
+        with world_locks('market'):
+            GAME_STATE['market_items'].append(item)
+            bump_catalog_version('market')
+        record_operation(StateOp.ADD_ITEM, {'item': item.model_dump(mode='json')})
         
-        return jsonify({
-            'success': True,
-            'item': item_to_dict(item)
-        })
+        return json_response(
+            {'success': True},
+            item=item_json(item)
+        )
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -873,11 +1165,7 @@ def add_resource():
             is_collidable=bool(data.get('is_collidable', True))
         )
         
-        # Registrar o recurso
-        harvest_service.register_harvest(resource)
-        
-        # Adicionar ao mapa
-        GAME_STATE['resources'][resource.id] = {
+        resource_data = {
             'id': resource.id,
             'name': resource.name,
             'type': resource.type_entity.value,
@@ -888,9 +1176,20 @@ def add_resource():
             'area': data.get('area', 'forest_1')
         }
         
+        # Registrar o recurso e adicionar ao mapa
+        with world_locks('resources'):
+            harvest_service.register_harvest(resource)
+            GAME_STATE['resources'][resource.id] = resource_data
+            bump_catalog_version('resources', resource_data['area'])
+        record_operation(StateOp.ADD_RESOURCE, {
+            'harvest': resource.model_dump(mode='json'),
+            'resource': resource_data
+        })
+        publish_event(area_topic(resource_data['area']), 'resource_added', resource_data)
+        
         return jsonify({
             'success': True,
-            'resource': GAME_STATE['resources'][resource.id]
+            'resource': resource_data
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -907,7 +1206,7 @@ def add_npc():
         level = int(data.get('level', 1))
         hp = int(data.get('hp', 50))
         
-        GAME_STATE['npcs'][npc_id] = {
+        npc = {
             'id': npc_id,
             'name': name,
             'level': level,
@@ -920,10 +1219,19 @@ def add_npc():
             'area': data.get('area', 'forest_1'),
             'type': 'enemy'
         }
+        # Sem damage/armor os atributos de combate são derivados do nível
+        for stat in ('damage', 'armor'):
+            if data.get(stat) is not None:
+                npc[stat] = int(data[stat])
+        with world_locks('npcs'):
+            GAME_STATE['npcs'][npc_id] = npc
+            bump_catalog_version('npcs', npc['area'])
+        record_operation(StateOp.ADD_NPC, {'npc': npc})
+        publish_event(area_topic(npc['area']), 'npc_added', npc)
         
         return jsonify({
             'success': True,
-            'npc': GAME_STATE['npcs'][npc_id]
+            'npc': npc
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -931,50 +1239,199 @@ def add_npc():
 # API para listar todos os itens (admin)
 @app.route('/api/admin/items', methods=['GET'])
 def list_items():
-    items = [item_to_dict(item) for item in item_repository.items]
-    return jsonify({
-        'success': True,
-        'items': items
-    })
+    # Inclui os recursos criados pela coleta, então segue a versão do repositório
+    return conditional_response(
+        catalog_etag('items', item_repository.version),
+        lambda: json_response(
+            {'success': True},
+            items=json_list(item_json(item) for item in item_repository.find_all())
+        )
+    )
 
 # API para listar todos os recursos (admin)
 @app.route('/api/admin/resources', methods=['GET'])
 def list_resources():
-    return jsonify({
-        'success': True,
-        'resources': list(GAME_STATE['resources'].values())
-    })
+    enter_all_areas()
+    return conditional_response(
+        catalog_etag('all-resources', catalog_version('resources')),
+        lambda: jsonify({
+            'success': True,
+            'resources': list(GAME_STATE['resources'].values())
+        })
+    )
 
 # API para listar todos os NPCs (admin)
 @app.route('/api/admin/npcs', methods=['GET'])
 def list_npcs():
+    enter_all_areas()
+    return conditional_response(
+        catalog_etag('all-npcs', catalog_version('npcs')),
+        lambda: jsonify({
+            'success': True,
+            'npcs': list(GAME_STATE['npcs'].values())
+        })
+    )
+
+# API para simular lutas em massa e medir o balanceamento (admin)
+@app.route('/api/admin/balance', methods=['POST'])
+def simulate_balance():
+    """
+    Cada build ({hp, physical_power, armor, critical_chance,
+    critical_power}) luta fights vezes contra cada NPC (npc_ids, ou todos),
+    com as mesmas regras de /api/battle mas sem afetar o jogo
+    """
+    data = request.json or {}
+    
+    try:
+        builds = data.get('builds') or []
+        fights = int(data.get('fights', 1000))
+        npc_ids = data.get('npc_ids')
+        if npc_ids is None:
+            enter_all_areas()
+        with world_locks('npcs'):
+            if npc_ids is None:
+                npcs = list(GAME_STATE['npcs'].values())
+            else:
+                npcs = [GAME_STATE['npcs'].get(npc_id) for npc_id in npc_ids]
+        if any(npc is None for npc in npcs):
+            raise ValueError("NPC not found")
+        if fights < 1 or len(builds) * len(npcs) * fights > BALANCE_CONFIG['max_fights']:
+            raise ValueError(f"Total fights must be between 1 and {BALANCE_CONFIG['max_fights']}")
+        
+        player_stats = []
+        for build in builds:
+            player_stats.append({
+                'hp': int(build['hp']),
+                'physical_power': int(build['physical_power']),
+                'armor': int(build.get('armor', 0)),
+                'critical_chance': float(build.get('critical_chance', 0.0)),
+                'critical_power': float(build.get('critical_power', 1.0))
+            })
+        npc_stats = []
+        for npc in npcs:
+            stats = npc_registry.template(npc).stats
+            npc_stats.append({'hp': npc['hp'], 'physical_power': stats.physical_power, 'armor': stats.armor})
+        
+        results = battle_simulator.sweep(player_stats, npc_stats, fights)
+        for result in results:
+            result['npc'] = npcs[result['npc']]['id']
+        
+        return jsonify({
+            'success': True,
+            'fights': fights,
+            'results': results
+        })
+    except KeyError as e:
+        return jsonify({'success': False, 'error': f"Missing build field: {e.args[0]}"})
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+# API para exportar itens, recursos ou NPCs em NDJSON (admin)
+@app.route('/api/admin/<collection>/export', methods=['GET'])
+def export_catalog(collection):
+    if collection not in CatalogService.COLLECTIONS:
+        return jsonify({'success': False, 'error': f"Unknown collection: {collection}"})
+    
+    if collection != 'items':
+        enter_all_areas()
+    records, encode = catalog_export(collection)
+    return Response(
+        catalog_service.export(records, encode),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={collection}.ndjson'}
+    )
+
+# API para importar itens, recursos ou NPCs de um NDJSON (admin)
+@app.route('/api/admin/<collection>/import', methods=['POST'])
+def import_catalog(collection):
+    """
+    O corpo é lido em streaming e validado em lotes. Um erro em qualquer
+    linha rejeita a importação inteira; se tudo for válido, o conteúdo é
+    aplicado de uma vez e um snapshot o torna durável de uma vez também
+    """
+    try:
+        entities = catalog_service.read(collection, request.stream)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    CATALOG_IMPORTERS[collection](entities)
+    state_log.snapshot(dump_game_state)
+    publish_event(WORLD_TOPIC, 'catalog_imported', {'collection': collection, 'count': len(entities)})
+    
     return jsonify({
         'success': True,
-        'npcs': list(GAME_STATE['npcs'].values())
+        'imported': len(entities)
     })
 
 # API para limpar dados (admin)
 @app.route('/api/admin/reset', methods=['POST'])
 def reset_game():
-    GAME_STATE['resources'] = {}
-    GAME_STATE['npcs'] = {}
-    GAME_STATE['market_items'] = []
-    
-    # Reinicializar o jogo
-    initialize_game()
+    def clear_world():
+        with world_locks('market'), world_locks('resources'), world_locks('npcs'):
+            GAME_STATE['resources'] = {}
+            GAME_STATE['npcs'] = {}
+            GAME_STATE['market_items'] = []
+            # Os modelos que algum jogador ainda tem ficam: os itens dele só guardam o id
+            item_repository.clear(keep=referenced_template_ids())
+            harvest_service.active_harvests.clear()
+            npc_registry.clear()
+            rng_service.reset()
+            # Nova época: todas as ETags do catálogo emitidas antes deixam de valer
+            CATALOG_VERSIONS['epoch'] = uuid.uuid4().hex[:12]
+            CATALOG_VERSIONS['counters'].clear()
+            
+            # Reinicializar o mercado; as áreas voltam a ser carregadas do pacote sob demanda
+            seed_market()
+    
+    content_service.reset(clear_world)
+    
+    # Compactar o log a partir do novo estado
+    state_log.snapshot(dump_game_state)
+    publish_event(WORLD_TOPIC, 'world_reset', {})
     
     return jsonify({
         'success': True,
         'message': 'Game state has been reset'
     })
 
-# API para salvar estado atual (admin) - em um caso real, salvaria em banco de dados
+# API para consultar a semente dos sorteios (admin)
+@app.route('/api/admin/rng', methods=['GET'])
+def rng_info():
+    # O replay_cli.py confere a semente antes de reexecutar uma sessão
+    return jsonify({
+        'success': True,
+        'seed': rng_service.seed,
+        'recording': session_recorder is not None,
+        'replay': RNG_CONFIG['replay']
+    })
+
+# API para avançar o relógio do mundo no modo replay (admin)
+@app.route('/api/admin/tick', methods=['POST'])
+def replay_tick():
+    if not RNG_CONFIG['replay']:
+        return jsonify({'success': False, 'error': 'World ticks are only driven by requests in replay mode'})
+    
+    try:
+        world_tick(int((request.json or {}).get('seconds', EVENTS_CONFIG['tick_interval'])))
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    return jsonify({'success': True})
+
+# API para salvar estado atual (admin)
 @app.route('/api/admin/save', methods=['POST'])
 def save_game_state():
-    # Em um caso real, aqui salvaríamos o estado do jogo em um banco de dados
+    # Força a gravação síncrona de tudo que ainda está pendente
+    try:
+        saved = persistence_backend.flush()
+        state_log.snapshot(dump_game_state)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
     return jsonify({
         'success': True,
-        'message': 'Game state has been saved'
+        'message': 'Game state has been saved',
+        'saved': saved
     })
 
 if __name__ == "__main__":
@@ -0,0 +1,267 @@
+"""
+Ponto de entrada ASGI do servidor do jogo.
+
+    cd src && uvicorn asgi:app --port 5000
+
+Expõe as mesmas rotas do app Flask (app.py) e usa os mesmos serviços e
+repositórios. O servidor ASGI cuida das conexões no event loop, então um
+cliente lento ou uma conexão keep-alive ociosa não prende uma thread. Só
+a execução da rota usa uma thread de um pool limitado. Rotas que
+bloqueiam (gravação síncrona no banco) ou que simulam muito (batalhas)
+rodam em outro pool, para não atrasar as rotas rápidas.
+
+O canal de eventos (/api/events) é atendido direto no event loop: cada
+cliente conectado custa uma corrotina, não uma thread.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from werkzeug.exceptions import ClientDisconnected
+
+from app import app as flask_app, event_hub, event_topics, EVENTS_CONFIG
+from serializers import sse_event
+from services.event_service import AsyncSubscription
+
+# Configuração dos pools de execução das rotas
+ASGI_CONFIG = {
+    'request_workers': int(os.environ.get('RPG_ASGI_WORKERS', 32)),
+    'blocking_workers': int(os.environ.get('RPG_ASGI_BLOCKING_WORKERS', 4)),
+    # Rotas que bloqueiam ou fazem simulações pesadas
+    'blocking_routes': {
+        '/api/battle',
+        '/api/admin/save',
+        '/api/admin/reset',
+        '/api/admin/items/import',
+        '/api/admin/resources/import',
+        '/api/admin/npcs/import',
+        '/api/admin/balance',
+    },
+}
+
+class AsgiBridge:
+    """
+    Aplicação ASGI que atende cada requisição HTTP chamando o app WSGI em
+    um pool de threads. O corpo da requisição chega à rota em streaming
+    (ver AsgiInput) e a resposta é enviada de forma assíncrona.
+    """
+    def __init__(self, wsgi_app, request_workers=32, blocking_workers=4, blocking_routes=(), routes=None):
+        self.wsgi_app = wsgi_app
+        # Rotas assíncronas atendidas no próprio loop: caminho -> handler ASGI
+        self.routes = dict(routes or {})
+        self.request_executor = ThreadPoolExecutor(request_workers, thread_name_prefix='asgi-request')
+        self.blocking_executor = ThreadPoolExecutor(blocking_workers, thread_name_prefix='asgi-blocking')
+        self.blocking_routes = set(blocking_routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.request_executor.shutdown(wait=True)
+                self.blocking_executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        handler = self.routes.get(scope['path'])
+        if handler is not None:
+            await handler(scope, receive, send)
+            return
+        
+        # A primeira mensagem já traz o corpo inteiro na maioria das
+        # requisições; só corpos maiores são lidos aos poucos pela rota
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        loop = asyncio.get_running_loop()
+        body = message.get('body', b'')
+        if message.get('more_body', False):
+            body = AsgiInput(receive, loop, body)
+
+        executor = self.blocking_executor if scope['path'] in self.blocking_routes else self.request_executor
+        environ = build_environ(scope, body)
+        status, headers, content = await loop.run_in_executor(executor, self._call_wsgi, environ)
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        if isinstance(content, bytes):
+            await send({'type': 'http.response.body', 'body': content})
+            return
+
+        # Resposta em streaming: cada bloco é gerado no pool quando o anterior já foi enviado
+        chunks = iter(content)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(executor, next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(content, 'close'):
+                await loop.run_in_executor(executor, content.close)
+
+    def _call_wsgi(self, environ):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ]
+
+        result = self.wsgi_app(environ, start_response)
+        # Sem Content-Length é um stream (ex.: exportação NDJSON): os blocos são lidos sob demanda
+        if all(name != b'content-length' for name, _ in response['headers']):
+            return response['status'], response['headers'], result
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], content
+
+class AsgiInput(io.RawIOBase):
+    """
+    wsgi.input que lê o corpo da requisição sob demanda: cada leitura feita
+    pela rota (na thread do pool) busca a próxima mensagem no event loop.
+    Uma importação NDJSON grande é processada enquanto ainda está chegando,
+    sem juntar o corpo inteiro na memória antes.
+    """
+    def __init__(self, receive, loop, first_chunk=b''):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = bytearray(first_chunk)
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer and self._more:
+            self._fill()
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        return size
+
+    def _fill(self):
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if message['type'] == 'http.disconnect':
+            self._more = False
+            raise ClientDisconnected()
+        self._buffer += message.get('body', b'')
+        self._more = message.get('more_body', False)
+
+async def stream_events(scope, receive, send):
+    """Versão assíncrona de /api/events (ver app.stream_events)"""
+    params = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    headers = dict(scope.get('headers', ()))
+    token = headers.get(b'x-session-token')
+    token = token.decode('latin-1') if token is not None else params.get('token', [None])[0]
+    topics = event_topics(token, params.get('area', ['city'])[0])
+    if topics is None:
+        await send_json(send, {'success': False, 'error': 'Invalid session'})
+        return
+    
+    subscription = event_hub.subscribe(AsyncSubscription(topics, asyncio.get_running_loop()))
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache')]
+        })
+        await send({'type': 'http.response.body', 'body': b': connected\n\n', 'more_body': True})
+        while not subscription.lagged:
+            getter = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnected}, timeout=EVENTS_CONFIG['keepalive'], return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter not in done:
+                getter.cancel()
+                if disconnected in done:
+                    return
+                frames = [b': keep-alive\n\n']
+            else:
+                # Junta o que já chegou em um único envio
+                frames = [getter.result()]
+                while not subscription.queue.empty():
+                    frames.append(subscription.queue.get_nowait())
+            await send({'type': 'http.response.body', 'body': b''.join(frames), 'more_body': True})
+        # Cliente atrasado: ele reconecta e busca o estado completo
+        await send({'type': 'http.response.body', 'body': sse_event('lagged', {})})
+    finally:
+        disconnected.cancel()
+        event_hub.unsubscribe(subscription)
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+async def send_json(send, data, status=200):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': json.dumps(data).encode('utf-8')})
+
+def build_environ(scope, body):
+    """
+    Monta o environ WSGI (PEP 3333) de uma requisição HTTP ASGI. body são
+    os bytes do corpo inteiro ou um AsgiInput que o lê em streaming
+    """
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server_name),
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BufferedReader(body) if isinstance(body, AsgiInput) else io.BytesIO(body),
+        # O stream termina junto com o corpo (mesmo se veio chunked)
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', ()):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+            continue
+        key = 'HTTP_' + name
+        # Cabeçalhos repetidos viram uma lista separada por vírgulas
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    if isinstance(body, bytes):
+        environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+app = AsgiBridge(
+    flask_app,
+    request_workers=ASGI_CONFIG['request_workers'],
+    blocking_workers=ASGI_CONFIG['blocking_workers'],
+    blocking_routes=ASGI_CONFIG['blocking_routes'],
+    routes={'/api/events': stream_events}
+)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Importa e exporta o conteúdo do jogo (itens, recursos e NPCs) em NDJSON,
+pelas rotas /api/admin/<coleção>/import e /export de um servidor rodando.
+
+    python catalog_cli.py export items -o items.ndjson
+    python catalog_cli.py import npcs npcs.ndjson
+    python catalog_cli.py export resources | python catalog_cli.py import resources - --url http://outro:5000
+
+O arquivo é enviado e recebido em blocos, então nem o cliente nem o
+servidor montam o catálogo inteiro em memória para transferi-lo.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import urllib.request
+
+COLLECTIONS = ('items', 'resources', 'npcs')
+CHUNK_SIZE = 64 * 1024
+
+def export_collection(url, collection, output):
+    with urllib.request.urlopen(f"{url}/api/admin/{collection}/export") as response:
+        if response.headers.get_content_type() != 'application/x-ndjson':
+            raise RuntimeError(json.load(response).get('error', 'Export failed'))
+        shutil.copyfileobj(response, output, CHUNK_SIZE)
+
+def import_collection(url, collection, source):
+    headers = {'Content-Type': 'application/x-ndjson'}
+    try:
+        headers['Content-Length'] = str(os.fstat(source.fileno()).st_size - source.tell())
+        body = source
+    except (OSError, ValueError):
+        # Entrada sem tamanho conhecido (ex.: um pipe): envio chunked
+        body = iter(lambda: source.read(CHUNK_SIZE), b'')
+    request = urllib.request.Request(
+        f"{url}/api/admin/{collection}/import", data=body, headers=headers, method='POST'
+    )
+    with urllib.request.urlopen(request) as response:
+        result = json.load(response)
+    if not result.get('success'):
+        raise RuntimeError(result.get('error', 'Import failed'))
+    return result['imported']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa/exporta itens, recursos e NPCs em NDJSON")
+    parser.add_argument('--url', default=os.environ.get('RPG_SERVER_URL', 'http://localhost:5000'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='grava a coleção em NDJSON')
+    export_parser.add_argument('collection', choices=COLLECTIONS)
+    export_parser.add_argument('-o', '--output', default='-', help='arquivo de saída (- para stdout)')
+
+    import_parser = commands.add_parser('import', help='importa um NDJSON (tudo ou nada)')
+    import_parser.add_argument('collection', choices=COLLECTIONS)
+    import_parser.add_argument('file', help='arquivo NDJSON (- para stdin)')
+
+    args = parser.parse_args(argv)
+    url = args.url.rstrip('/')
+    try:
+        if args.command == 'export':
+            if args.output == '-':
+                export_collection(url, args.collection, sys.stdout.buffer)
+            else:
+                with open(args.output, 'wb') as output:
+                    export_collection(url, args.collection, output)
+        else:
+            if args.file == '-':
+                imported = import_collection(url, args.collection, sys.stdin.buffer)
+            else:
+                with open(args.file, 'rb') as source:
+                    imported = import_collection(url, args.collection, source)
+            print(f"Imported {imported} {args.collection}", file=sys.stderr)
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,55 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from datetime import datetime
+from typing import Optional, Set
 
 class BaseDomain(BaseModel):
     id: str
     created_at: datetime
+    # Fields assigned since the entity was last saved
+    _dirty_fields: Set[str] = PrivateAttr(default_factory=set)
+    # Encoded JSON fragment cached by serializers; dropped on any change
+    _encoded: Optional[str] = PrivateAttr(default=None)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._dirty_fields.add(name)
+            self.__pydantic_private__['_encoded'] = None
+
+    def mark_dirty(self, *fields: str) -> None:
+        """Flags fields changed in place (e.g. list appends), which assignment tracking cannot see"""
+        self._dirty_fields.update(fields)
+        self.__pydantic_private__['_encoded'] = None
+
+    @property
+    def dirty_fields(self) -> Set[str]:
+        """Own changed fields plus fields holding a nested domain that changed"""
+        fields = set(self._dirty_fields)
+        for name in type(self).model_fields:
+            if name not in fields and _has_dirty_domain(self.__dict__.get(name)):
+                fields.add(name)
+        return fields
+
+    @property
+    def is_dirty(self) -> bool:
+        if self._dirty_fields:
+            return True
+        return any(_has_dirty_domain(self.__dict__.get(name)) for name in type(self).model_fields)
+
+    def mark_clean(self) -> None:
+        self._dirty_fields.clear()
+        for name in type(self).model_fields:
+            value = self.__dict__.get(name)
+            if isinstance(value, list):
+                for element in value:
+                    if isinstance(element, BaseDomain):
+                        element.mark_clean()
+            elif hasattr(value, 'mark_clean'):
+                value.mark_clean()
+
+def _has_dirty_domain(value) -> bool:
+    if isinstance(value, list):
+        return any(isinstance(element, BaseDomain) and element.is_dirty for element in value)
+    # Nested domains and containers that track their own changes
+    # (CompactRecord, Inventory) expose is_dirty
+    return getattr(value, 'is_dirty', False)
@@ -0,0 +1,217 @@
+import array
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Type
+from pydantic_core import core_schema
+
+try:
+    import numpy
+except ImportError:  # optional: without numpy, bulk operations loop in Python
+    numpy = None
+
+# array typecode per field annotation
+TYPECODES = {int: 'q', float: 'd'}
+NUMPY_DTYPES = {'q': 'int64', 'd': 'float64'}
+
+class CompactRecord:
+    """
+    Attribute view over one slot of a ColumnTable. Subclasses set model to
+    the pydantic domain they mirror and get one property per value field,
+    so code written against the model (including getattr/setattr by name)
+    keeps working.
+    """
+    __slots__ = ('_table', '_slot')
+    model: Type = None
+    fields: tuple = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.fields = tuple(name for name in cls.model.model_fields if name not in ('id', 'created_at'))
+        for name in cls.fields:
+            setattr(cls, name, _column_property(name))
+
+    def __init__(self, table: 'ColumnTable', slot: int):
+        self._table = table
+        self._slot = slot
+
+    @property
+    def id(self) -> str:
+        return self._table.ids[self._slot]
+
+    @property
+    def created_at(self) -> datetime:
+        return self._table.created_at[self._slot]
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._table.dirty[self._slot])
+
+    def mark_clean(self) -> None:
+        self._table.dirty[self._slot] = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'id': self.id, 'created_at': self.created_at}
+        for name in self.fields:
+            data[name] = self._table.columns[name][self._slot]
+        return data
+
+    def to_model(self):
+        return self.model(**self.to_dict())
+
+    def __repr__(self) -> str:
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.fields)
+        return f"{type(self).__name__}(slot={self._slot}, {values})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        # Records are accepted as they are and serialize like the model they
+        # mirror, so a persisted player reloads with a plain model
+        return core_schema.is_instance_schema(
+            cls,
+            serialization=core_schema.plain_serializer_function_ser_schema(cls.to_dict)
+        )
+
+def _column_property(name: str) -> property:
+    def getter(record):
+        return record._table.columns[name][record._slot]
+
+    def setter(record, value):
+        record._table.columns[name][record._slot] = value
+        record._table.dirty[record._slot] = 1
+
+    return property(getter, setter)
+
+class ColumnTable:
+    """
+    Fixed-schema records stored as one contiguous typed array per field,
+    indexed by slot. Bulk operations (regen, buffs, balancing passes) run
+    over a whole column at once instead of object by object.
+    """
+    def __init__(self, record_class: Type[CompactRecord]):
+        self.record_class = record_class
+        annotations = record_class.model.model_fields
+        self.columns: Dict[str, array.array] = {
+            name: array.array(TYPECODES[annotations[name].annotation]) for name in record_class.fields
+        }
+        self.ids: List[Optional[str]] = []
+        self.created_at: List[Optional[datetime]] = []
+        self.live = bytearray()
+        self.dirty = bytearray()
+        self._free: List[int] = []
+        # store/release change the slot layout; values are written in place
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self._free)
+
+    def store(self, source) -> CompactRecord:
+        """Copies a model (or another record) into a free slot and returns its view"""
+        values = [getattr(source, name) for name in self.columns]
+        with self._lock:
+            if self._free:
+                slot = self._free.pop()
+                for column, value in zip(self.columns.values(), values):
+                    column[slot] = value
+                self.ids[slot] = source.id
+                self.created_at[slot] = source.created_at
+                self.live[slot] = 1
+                self.dirty[slot] = 0
+            else:
+                slot = len(self.ids)
+                for column, value in zip(self.columns.values(), values):
+                    column.append(value)
+                self.ids.append(source.id)
+                self.created_at.append(source.created_at)
+                self.live.append(1)
+                self.dirty.append(0)
+        return self.record_class(self, slot)
+
+    def release(self, record: CompactRecord) -> None:
+        slot = record._slot
+        with self._lock:
+            self.live[slot] = 0
+            self.dirty[slot] = 0
+            self.ids[slot] = None
+            self.created_at[slot] = None
+            self._free.append(slot)
+
+    def add(self, name: str, delta, slots: Optional[Sequence[int]] = None) -> None:
+        """
+        Adds delta to the field of every record, or only of the given slots;
+        with slots, delta may also be a sequence with one value per slot
+        """
+        self._apply(name, lambda values: values + _per_slot(delta, values), slots)
+
+    def scale(self, name: str, factor: float, slots: Optional[Sequence[int]] = None) -> None:
+        """Multiplies the field of every record (or of the given slots) by factor"""
+        self._apply(name, lambda values: values * _per_slot(factor, values), slots)
+
+    def clamp(self, name: str, low=None, high=None, slots: Optional[Sequence[int]] = None) -> None:
+        """Keeps the field of every record (or of the given slots) between low and high"""
+        self._apply(name, lambda values: _clip(values, _per_slot(low, values), _per_slot(high, values)), slots)
+
+    def _apply(self, name: str, func, slots: Optional[Sequence[int]] = None) -> None:
+        with self._lock:
+            if slots is None:
+                self._apply_locked(name, func)
+            else:
+                self._apply_slots_locked(name, func, slots)
+
+    def _apply_locked(self, name: str, func) -> None:
+        column = self.columns[name]
+        if numpy is not None and len(column):
+            view = numpy.frombuffer(column, dtype=NUMPY_DTYPES[column.typecode])
+            # Float math, truncated back into int columns like int() does
+            view[:] = func(view.astype(numpy.float64))
+            # Release the buffer so the array can grow again
+            del view
+        else:
+            cast = int if column.typecode == 'q' else float
+            column[:] = array.array(column.typecode, (cast(func(value)) for value in column))
+        # Every live record changed
+        self.dirty[:] = self.live
+
+    def _apply_slots_locked(self, name: str, func, slots: Sequence[int]) -> None:
+        column = self.columns[name]
+        if not slots:
+            return
+        if numpy is not None:
+            view = numpy.frombuffer(column, dtype=NUMPY_DTYPES[column.typecode])
+            index = numpy.asarray(slots, dtype=numpy.int64)
+            view[index] = func(view[index].astype(numpy.float64))
+            del view
+        else:
+            cast = int if column.typecode == 'q' else float
+            values = func(_Values(column[slot] for slot in slots))
+            for slot, value in zip(slots, values):
+                column[slot] = cast(value)
+        for slot in slots:
+            self.dirty[slot] = 1
+
+class _Values(list):
+    """Element-wise arithmetic for the pure Python path of slot operations"""
+    def __add__(self, other):
+        return _Values(value + _at(other, i) for i, value in enumerate(self))
+
+    def __mul__(self, other):
+        return _Values(value * _at(other, i) for i, value in enumerate(self))
+
+def _at(operand, i):
+    return operand[i] if isinstance(operand, (list, tuple)) else operand
+
+def _per_slot(operand, values):
+    # Per-slot operands line up with the gathered values
+    if numpy is not None and isinstance(values, numpy.ndarray) and isinstance(operand, (list, tuple)):
+        return numpy.asarray(operand, dtype=numpy.float64)
+    return operand
+
+def _clip(values, low, high):
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return numpy.clip(values, low, high)
+    if isinstance(values, _Values):
+        return _Values(_clip(value, _at(low, i), _at(high, i)) for i, value in enumerate(values))
+    if low is not None:
+        values = max(low, values)
+    if high is not None:
+        values = min(high, values)
+    return values
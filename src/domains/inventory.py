@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+from pydantic_core import core_schema
+from domains.item import ItemInstance, ItemType
+
+class Inventory:
+    """
+    Ordered container of ItemInstance with id, type and stack indexes.
+    Lookups, removal and moves between containers are O(1); capacity
+    (None for unlimited) is enforced on add. Serializes as a plain list.
+    """
+    def __init__(self, items: Iterable[ItemInstance] = (), capacity: Optional[int] = None):
+        self.capacity = capacity
+        # id -> instance; dict order is the slot order shown to the player
+        self._items: Dict[str, ItemInstance] = {}
+        self._by_type: Dict[ItemType, Dict[str, None]] = {}
+        # template id -> id of the instance holding its stack
+        self._stacks: Dict[str, str] = {}
+        self._changed = False
+        for item in items:
+            self._insert(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[ItemInstance]:
+        return iter(self._items.values())
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._items
+
+    def __getitem__(self, index: int) -> ItemInstance:
+        return list(self._items.values())[index]
+
+    def __repr__(self) -> str:
+        return f"Inventory({list(self._items.values())!r})"
+
+    @property
+    def free_slots(self) -> Optional[int]:
+        if self.capacity is None:
+            return None
+        return max(0, self.capacity - len(self._items))
+
+    def has_room(self, slots: int = 1) -> bool:
+        return self.capacity is None or len(self._items) + slots <= self.capacity
+
+    def get(self, item_id: str) -> Optional[ItemInstance]:
+        return self._items.get(item_id)
+
+    def find_by_type(self, item_type: ItemType) -> List[ItemInstance]:
+        return [self._items[item_id] for item_id in self._by_type.get(item_type, ())]
+
+    def find_stack(self, template_id: str) -> Optional[ItemInstance]:
+        item_id = self._stacks.get(template_id)
+        return self._items[item_id] if item_id is not None else None
+
+    def add(self, item: ItemInstance) -> ItemInstance:
+        if not self.has_room():
+            raise ValueError("Inventory is full")
+        self._insert(item)
+        self._changed = True
+        return item
+
+    def remove(self, item_id: str) -> ItemInstance:
+        item = self._items.pop(item_id, None)
+        if item is None:
+            raise ValueError("Item not found in inventory")
+        bucket = self._by_type[item.item_type]
+        del bucket[item_id]
+        if not bucket:
+            del self._by_type[item.item_type]
+        if self._stacks.get(item.template_id) == item_id:
+            del self._stacks[item.template_id]
+        self._changed = True
+        return item
+
+    def move_to(self, other: 'Inventory', item_id: str) -> ItemInstance:
+        """Moves an instance into another container, leaving both untouched if it does not fit"""
+        if item_id not in self._items:
+            raise ValueError("Item not found in inventory")
+        if not other.has_room():
+            raise ValueError("Inventory is full")
+        return other.add(self.remove(item_id))
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._changed or any(item.is_dirty for item in self._items.values())
+
+    def mark_clean(self) -> None:
+        self._changed = False
+        for item in self._items.values():
+            item.mark_clean()
+
+    def _insert(self, item: ItemInstance) -> None:
+        self._items[item.id] = item
+        self._by_type.setdefault(item.item_type, {})[item.id] = None
+        if item.is_stackable:
+            self._stacks.setdefault(item.template_id, item.id)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        list_schema = handler.generate_schema(List[ItemInstance])
+        return core_schema.union_schema(
+            [
+                core_schema.is_instance_schema(cls),
+                core_schema.no_info_after_validator_function(cls, list_schema),
+            ],
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                list, return_schema=list_schema
+            ),
+        )
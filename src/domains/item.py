@@ -1,6 +1,8 @@
 from domains.base import BaseDomain
 from domains.stats import Stats
 from enum import Enum
+from typing import Callable, ClassVar, Optional
+from pydantic import ConfigDict, PrivateAttr, field_validator, model_validator
 
 class Rarity(Enum):
     COMMON = "common"
@@ -19,6 +21,9 @@ class ItemType(Enum):
     
 
 class Item(BaseDomain):
+    """Immutable item template; players hold ItemInstance objects that point to one"""
+    model_config = ConfigDict(frozen=True)
+
     name: str
     description: str
     item_type: ItemType
@@ -29,6 +34,122 @@ class Item(BaseDomain):
     is_consumable: bool
     is_equippable: bool
     is_boostable: bool
-    stats: Stats
+    stats: Optional[Stats] = None
+
+    # Item stats are shared immutable blocks; see FrozenStats
+    @field_validator('stats')
+    @classmethod
+    def _intern_stats(cls, stats: Optional[Stats]) -> Optional[Stats]:
+        return stats.freeze() if stats is not None else None
+
+    @property
+    def is_stackable(self) -> bool:
+        return self.is_consumable or self.item_type == ItemType.RESOURCE
+
+class ItemInstance(BaseDomain):
+    """
+    An item owned by a player: a reference to its template plus the
+    per-instance data. Only template_id is stored and serialized; the
+    template itself is resolved through template_lookup.
+    """
+    template_id: str
+    quantity: int = 1
+    enhancement: int = 0
+    # Set by the forge; otherwise the template stats apply
+    stats_override: Optional[Stats] = None
+    _template: Optional[Item] = PrivateAttr(default=None)
+
+    # Resolves a template id to the shared template (ItemRepository.find_by_id);
+    # bound once at startup
+    template_lookup: ClassVar[Optional[Callable[[str], Optional[Item]]]] = None
+
+    @classmethod
+    def of(cls, template: Item, **fields) -> 'ItemInstance':
+        """New instance pointing to an already resolved template"""
+        instance = cls(template_id=template.id, **fields)
+        instance._template = template
+        return instance
+
+    @model_validator(mode='wrap')
+    @classmethod
+    def _resolve_template(cls, data, handler):
+        # Rows written before instances referenced their template embed a
+        # full copy of it; it is only used when the lookup does not know the id
+        embedded = None
+        if isinstance(data, dict) and 'template' in data:
+            data = dict(data)
+            embedded = data.pop('template')
+            data.setdefault('template_id', embedded['id'] if isinstance(embedded, dict) else embedded.id)
+        instance = handler(data)
+        if instance._template is None:
+            template = cls.template_lookup(instance.template_id) if cls.template_lookup else None
+            if template is None and embedded is not None:
+                template = Item.model_validate(embedded)
+            instance._template = template
+        return instance
+
+    @field_validator('stats_override')
+    @classmethod
+    def _intern_stats(cls, stats: Optional[Stats]) -> Optional[Stats]:
+        return stats.freeze() if stats is not None else None
+
+    @property
+    def template(self) -> Item:
+        template = self._template
+        if template is None:
+            # Not known when the instance was loaded (e.g. created later by a replay)
+            template = self.template_lookup(self.template_id) if self.template_lookup else None
+            if template is None:
+                raise ValueError(f"Unknown item template: {self.template_id}")
+            self._template = template
+        return template
+
+    @property
+    def name(self) -> str:
+        if self.enhancement:
+            return f"{self.template.name} +{self.enhancement}"
+        return self.template.name
+
+    @property
+    def description(self) -> str:
+        return self.template.description
+
+    @property
+    def item_type(self) -> ItemType:
+        return self.template.item_type
+
+    @property
+    def rarity(self) -> Rarity:
+        return self.template.rarity
+
+    @property
+    def price(self) -> int:
+        return self.template.price
+
+    @property
+    def sell_price(self) -> int:
+        return self.template.sell_price
+
+    @property
+    def is_tradable(self) -> bool:
+        return self.template.is_tradable
+
+    @property
+    def is_consumable(self) -> bool:
+        return self.template.is_consumable
+
+    @property
+    def is_equippable(self) -> bool:
+        return self.template.is_equippable
+
+    @property
+    def is_boostable(self) -> bool:
+        return self.template.is_boostable
 
+    @property
+    def is_stackable(self) -> bool:
+        return self.template.is_stackable
 
+    @property
+    def stats(self) -> Optional[Stats]:
+        return self.stats_override if self.stats_override is not None else self.template.stats
@@ -1,4 +1,5 @@
 from domains.base import BaseDomain
+from domains.columnar import CompactRecord
 
 class LifeSkill(BaseDomain):
     cooking: float
@@ -6,4 +7,9 @@ class LifeSkill(BaseDomain):
     mining: float
     gathering: float
     lumbering: float
-    crafting: float
\ No newline at end of file
+    crafting: float
+
+class LifeSkillRecord(CompactRecord):
+    """LifeSkill stored in a ColumnTable slot (see PlayerService compact mode)"""
+    __slots__ = ()
+    model = LifeSkill
@@ -1,6 +1,7 @@
 from domains.base import BaseDomain
 from domains.item import Item
 from domains.stats import Stats
+from pydantic import field_validator
 
 class DropItem(BaseDomain):
     item: Item
@@ -17,4 +18,10 @@ class NPC(BaseDomain):
     max_hp: int
     level: int
     drop_items: list[DropItem]
-    stats: Stats
\ No newline at end of file
+    stats: Stats
+
+    # NPC stats are shared immutable blocks; see FrozenStats
+    @field_validator('stats')
+    @classmethod
+    def _intern_stats(cls, stats: Stats) -> Stats:
+        return stats.freeze()
\ No newline at end of file
@@ -1,22 +1,46 @@
 from domains.base import BaseDomain
-from domains.item import Item
-from domains.stats import Stats
-from domains.life_skill import LifeSkill
+from domains.inventory import Inventory
+from domains.stats import Stats, StatsRecord
+from domains.life_skill import LifeSkill, LifeSkillRecord
+from typing import Union
+from pydantic import model_validator
 
 class Player(BaseDomain):
     account_id: str
     username: str
-    equipment: list[Item]
-    inventory: list[Item]
-    stats: Stats
-    life_skills: LifeSkill
+    equipment: Inventory
+    inventory: Inventory
+    stats: Union[Stats, StatsRecord]
+    life_skills: Union[LifeSkill, LifeSkillRecord]
     x: int
     y: int
     hp: int
     max_hp: int
+    # stats.mana is the current mana; regeneration refills it up to max_mana
+    max_mana: int
     level: int
     exp: int
     next_level_exp: int
     gold: int
     inventory_size: int
-    attribute_points: int
\ No newline at end of file
+    attribute_points: int
+
+    @model_validator(mode='before')
+    @classmethod
+    def _default_max_mana(cls, data):
+        # Players saved before max_mana existed had their full mana in stats.mana
+        if isinstance(data, dict) and 'max_mana' not in data and data.get('stats') is not None:
+            stats = data['stats']
+            data = dict(data, max_mana=stats['mana'] if isinstance(stats, dict) else stats.mana)
+        return data
+
+    @model_validator(mode='after')
+    def _bind_inventory_size(self) -> 'Player':
+        self.inventory.capacity = self.inventory_size
+        return self
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # The inventory's capacity always follows inventory_size
+        if name in ('inventory', 'inventory_size'):
+            self.inventory.capacity = self.inventory_size
\ No newline at end of file
@@ -1,4 +1,9 @@
+import uuid
+import weakref
+from datetime import datetime
+from pydantic import ConfigDict
 from domains.base import BaseDomain
+from domains.columnar import CompactRecord
 
 class Stats(BaseDomain):
     strength: int
@@ -16,3 +21,46 @@ class Stats(BaseDomain):
     critical_power: float
     luck: float
 
+    def freeze(self) -> 'FrozenStats':
+        """Returns the shared immutable block with the same values"""
+        if isinstance(self, FrozenStats):
+            return self
+        return FrozenStats.intern(**{name: getattr(self, name) for name in STAT_FIELDS})
+
+# Value fields of a stats block, in declaration order
+STAT_FIELDS = tuple(name for name in Stats.model_fields if name not in BaseDomain.model_fields)
+
+class FrozenStats(Stats):
+    """
+    Immutable stats block shared by every item/NPC with the same values.
+    Get instances through FrozenStats.intern(); change them with evolve(),
+    which returns another shared block (copy-on-write).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    def evolve(self, **changes) -> 'FrozenStats':
+        values = {name: getattr(self, name) for name in STAT_FIELDS}
+        values.update(changes)
+        return FrozenStats.intern(**values)
+
+    @classmethod
+    def intern(cls, **values) -> 'FrozenStats':
+        key = tuple(values.get(name, 0) for name in STAT_FIELDS)
+        stats = _STATS_POOL.get(key)
+        if stats is None:
+            stats = cls(
+                id=str(uuid.uuid5(_STATS_NAMESPACE, repr(key))),
+                created_at=datetime.now(),
+                **dict(zip(STAT_FIELDS, key))
+            )
+            _STATS_POOL[key] = stats
+        return stats
+
+class StatsRecord(CompactRecord):
+    """Stats stored in a ColumnTable slot (see PlayerService compact mode)"""
+    __slots__ = ()
+    model = Stats
+
+# Blocks live while something references them
+_STATS_POOL: 'weakref.WeakValueDictionary[tuple, FrozenStats]' = weakref.WeakValueDictionary()
+_STATS_NAMESPACE = uuid.UUID('6f0d7c4e-2b1a-4c55-9d8e-3f6a1b2c4d5e')
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Reexecuta uma sessão gravada (RPG_SESSION_RECORD) contra um servidor
+limpo iniciado com a mesma semente e em modo replay (o relógio do mundo
+avança com os ticks gravados), conferindo cada resposta com a gravada e
+medindo o tempo de cada rota.
+
+    RPG_RNG_SEED=<semente da gravação> RPG_REPLAY=1 python app.py
+    python replay_cli.py sessao.ndjson --url http://localhost:5000
+
+Com a mesma semente e o mesmo estado inicial as respostas são idênticas
+(tirando ids gerados e datas), então duas versões do servidor podem ser
+comparadas sobre exatamente a mesma carga, sem ruído estatístico. A
+regeneração por tempo real (/api/player/regen) não é reproduzida.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+from services.replay_service import SessionReplayer, read_session
+
+def tick(url, seconds):
+    request = urllib.request.Request(
+        f"{url}/api/admin/tick", data=json.dumps({'seconds': seconds}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}, method='POST'
+    )
+    with urllib.request.urlopen(request) as response:
+        result = json.load(response)
+    if not result.get('success'):
+        raise ValueError(result.get('error', 'Tick failed'))
+
+def call(url, entry, replayer):
+    path = entry['path'] + (f"?{entry['query']}" if entry.get('query') else '')
+    headers = {name: str(value) for name, value in replayer.translate(entry.get('headers') or {}).items()}
+    data = None
+    if entry.get('body') is not None:
+        data = json.dumps(replayer.translate(entry['body'])).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    request = urllib.request.Request(url + path, data=data, headers=headers, method=entry['method'])
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reexecuta uma sessão gravada e confere as respostas")
+    parser.add_argument('session', help='arquivo gravado com RPG_SESSION_RECORD')
+    parser.add_argument('--url', default=os.environ.get('RPG_SERVER_URL', 'http://localhost:5000'))
+    parser.add_argument('--force', action='store_true', help='reexecuta mesmo com outra semente')
+    parser.add_argument('--max-differences', type=int, default=10, help='divergências mostradas')
+    args = parser.parse_args(argv)
+    url = args.url.rstrip('/')
+
+    try:
+        seed, entries = read_session(args.session)
+        with urllib.request.urlopen(f"{url}/api/admin/rng") as response:
+            server = json.load(response)
+        if (server['seed'] != seed or not server.get('replay')) and not args.force:
+            print(f"Error: the server must run with the recording's seed in replay mode; "
+                  f"restart it with RPG_RNG_SEED={seed} RPG_REPLAY=1", file=sys.stderr)
+            return 1
+
+        replayer = SessionReplayer()
+        timings = defaultdict(list)
+        divergent = shown = replayed = 0
+        started = time.perf_counter()
+        for entry in entries:
+            if 'tick' in entry:
+                if server.get('replay'):
+                    tick(url, entry['tick'])
+                continue
+            request_started = time.perf_counter()
+            live = call(url, entry, replayer)
+            timings[f"{entry['method']} {entry['path']}"].append(time.perf_counter() - request_started)
+            replayed += 1
+            differences = replayer.compare(entry['response'], live)
+            if differences:
+                divergent += 1
+                for difference in differences[:max(0, args.max_differences - shown)]:
+                    print(f"#{replayed} {entry['method']} {entry['path']}: {difference}", file=sys.stderr)
+                shown += len(differences)
+        elapsed = time.perf_counter() - started
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{replayed} requests in {elapsed:.3f} s, {divergent} divergent")
+    print(f"{'route':40} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9}")
+    for route, samples in sorted(timings.items()):
+        print(f"{route:40} {len(samples):6} {statistics.mean(samples) * 1e3:9.3f} "
+              f"{statistics.median(samples) * 1e3:9.3f} {max(samples) * 1e3:9.3f}")
+    return 1 if divergent else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,34 +1,215 @@
-from typing import TypeVar, Generic, List, Optional
+import threading
+from contextlib import contextmanager
+from operator import attrgetter
+from typing import Any, Callable, Container, TypeVar, Generic, Dict, List, Optional, Sequence, Set, Type
 from domains.base import BaseDomain
 
 T = TypeVar('T', bound=BaseDomain)
 
+class Index:
+    """Secondary index from a key extracted from each entity to the ids that hold it"""
+    def __init__(self, name: str, key: Optional[Callable[[Any], Any]] = None, unique: bool = False):
+        self.name = name
+        self.key = key or attrgetter(name)
+        self.unique = unique
+
 class BaseRepository(Generic[T]):
-    def __init__(self):
-        self.items: List[T] = []
-    
+    # Subclasses declare their model, table and secondary indexes here
+    model: Type[T] = None
+    table_name: str = None
+    indexes: Sequence[Index] = ()
+
+    def __init__(self, backend=None):
+        # Optional persistence backend (e.g. SQLiteBackend); saves and deletes
+        # are staged on it and written behind the request
+        self.backend = backend
+        if backend is not None:
+            backend.register(self.table_name)
+        # Dicts keep insertion order, so find_all still returns items in the
+        # order they were first saved while lookups stay O(1)
+        self._storage: Dict[str, T] = {}
+        # index name -> key -> ids (a dict used as an ordered set)
+        self._buckets: Dict[str, Dict[Any, Dict[str, None]]] = {index.name: {} for index in self.indexes}
+        # index name -> id -> key the entity is currently filed under
+        self._index_keys: Dict[str, Dict[str, Any]] = {index.name: {} for index in self.indexes}
+        # Per-thread saves collected by deferred()
+        self._deferred = threading.local()
+        # Guards storage and indexes; request threads save different
+        # entities concurrently
+        self._lock = threading.RLock()
+        # Bumped on every stored change; lets callers tag cached views (ETags)
+        self.version = 0
+
+    @property
+    def items(self) -> List[T]:
+        return list(self._storage.values())
+
+    def __len__(self) -> int:
+        return len(self._storage)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._storage
+
     def find_by_id(self, id: str) -> Optional[T]:
-        for item in self.items:
-            if item.id == id:
-                return item
-        return None
-    
+        return self._storage.get(id)
+
     def find_all(self) -> List[T]:
-        return self.items
-    
+        return list(self._storage.values())
+
+    def first(self) -> Optional[T]:
+        return next(iter(self._storage.values()), None)
+
+    def find_where(self, **criteria) -> List[T]:
+        """Answers equality queries over indexed fields by intersecting their buckets"""
+        if not criteria:
+            return self.find_all()
+        with self._lock:
+            buckets = sorted((self._bucket(name, key) for name, key in criteria.items()), key=len)
+            smallest, others = buckets[0], buckets[1:]
+            return [self._storage[id] for id in smallest if all(id in bucket for bucket in others)]
+
     def save(self, item: T) -> T:
-        existing = self.find_by_id(item.id)
-        if existing:
-            # Replace existing item
-            self.items = [item if x.id == item.id else x for x in self.items]
-        else:
-            # Add new item
-            self.items.append(item)
+        """
+        Stores the entity and stages its dirty fields on the backend.
+
+        Saving an entity that is already stored and not dirty is a no-op.
+        Assignments mark fields dirty, and so do changes inside nested
+        domains and tracked containers (Inventory, CompactRecord); a plain
+        list or dict mutated in place does not, so callers must flag it
+        with mark_dirty() first or the change is never written.
+        """
+        pending = getattr(self._deferred, 'pending', None)
+        if pending is not None:
+            pending[item.id] = item
+            return item
+
+        with self._lock:
+            existing = self._storage.get(item.id)
+            # Nothing changed since the last save
+            if existing is item and not item.is_dirty:
+                return item
+            # Check every unique index before touching anything, so a rejected
+            # save leaves the repository unchanged
+            for index in self.indexes:
+                if index.unique:
+                    self._check_unique(index, item)
+            # Replacing an existing key keeps its original position
+            self._storage[item.id] = item
+            for index in self.indexes:
+                self._reindex(index, item)
+            # Known entities only need their changed fields written
+            fields = item.dirty_fields if existing is item else None
+            if self.backend is not None:
+                self.backend.stage_save(self.table_name, item.id, item, fields)
+            self._saved(item, fields)
+            item.mark_clean()
+            self.version += 1
         return item
-    
+
+    def save_all(self, items: Sequence[T]) -> Sequence[T]:
+        """
+        Saves a batch under one lock acquisition, so readers that take the
+        lock see all of it or none of it. Unique indexes are checked for the
+        whole batch first; a rejected batch leaves the repository unchanged.
+        """
+        with self._lock:
+            for index in self.indexes:
+                if not index.unique:
+                    continue
+                holders = {}
+                for item in items:
+                    self._check_unique(index, item)
+                    key = index.key(item)
+                    if holders.setdefault(key, item.id) != item.id:
+                        raise ValueError(f"Duplicate {index.name}: {key}")
+            for item in items:
+                self.save(item)
+        return items
+
+    @contextmanager
+    def deferred(self):
+        """Coalesces every save made by this thread inside the block into one save per entity"""
+        if getattr(self._deferred, 'pending', None) is not None:
+            # Nested block: the outermost one does the saving
+            yield
+            return
+        self._deferred.pending = {}
+        try:
+            yield
+        finally:
+            pending, self._deferred.pending = self._deferred.pending, None
+            for item in pending.values():
+                self.save(item)
+
     def delete(self, id: str) -> bool:
-        existing = self.find_by_id(id)
-        if existing:
-            self.items = [x for x in self.items if x.id != id]
-            return True
-        return False 
\ No newline at end of file
+        with self._lock:
+            if self._storage.pop(id, None) is None:
+                return False
+            for index in self.indexes:
+                self._unindex(index.name, id)
+            self._deleted(id)
+            if self.backend is not None:
+                self.backend.stage_delete(self.table_name, id)
+            self.version += 1
+        return True
+
+    def clear(self, keep: Container[str] = ()) -> None:
+        """Deletes every entity except those whose id is in keep"""
+        for id in list(self._storage):
+            if id not in keep:
+                self.delete(id)
+
+    def load(self) -> int:
+        """Fills the repository from its backend without staging anything back"""
+        if self.backend is None:
+            return 0
+        backend, self.backend = self.backend, None
+        try:
+            for data in backend.load(self.table_name):
+                self.save(self.model.model_validate_json(data))
+        finally:
+            self.backend = backend
+        return len(self._storage)
+
+    def _saved(self, item: T, fields: Optional[Set[str]]) -> None:
+        """Called under the lock for every stored change; fields is None for a new or replaced entity"""
+
+    def _deleted(self, id: str) -> None:
+        """Called under the lock when an entity is deleted"""
+
+    def _bucket(self, index_name: str, key: Any) -> Dict[str, None]:
+        if index_name not in self._buckets:
+            raise KeyError(f"No index named '{index_name}'")
+        return self._buckets[index_name].get(key, {})
+
+    def _find_by_index(self, index_name: str, key: Any) -> List[T]:
+        with self._lock:
+            return [self._storage[id] for id in self._bucket(index_name, key)]
+
+    def _first_by_index(self, index_name: str, key: Any) -> Optional[T]:
+        with self._lock:
+            id = next(iter(self._bucket(index_name, key)), None)
+            return self._storage[id] if id is not None else None
+
+    def _check_unique(self, index: Index, item: T) -> None:
+        key = index.key(item)
+        holder = next(iter(self._buckets[index.name].get(key, {})), None)
+        if holder is not None and holder != item.id:
+            raise ValueError(f"Duplicate {index.name}: {key}")
+
+    def _reindex(self, index: Index, item: T) -> None:
+        keys = self._index_keys[index.name]
+        new_key = index.key(item)
+        if item.id in keys:
+            if keys[item.id] == new_key:
+                return
+            self._unindex(index.name, item.id)
+        self._buckets[index.name].setdefault(new_key, {})[item.id] = None
+        keys[item.id] = new_key
+
+    def _unindex(self, index_name: str, id: str) -> None:
+        old_key = self._index_keys[index_name].pop(id)
+        bucket = self._buckets[index_name][old_key]
+        del bucket[id]
+        if not bucket:
+            del self._buckets[index_name][old_key]
@@ -0,0 +1,59 @@
+import json
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Tuple
+
+# File layout: magic, index length, index (JSON: section name -> [offset,
+# length]), then each section as zlib-compressed JSON. Opening a pack only
+# reads the index, so it costs the same whatever the world size; a section
+# is read and decoded when it is first asked for.
+MAGIC = b'RPGPACK\x01'
+INDEX_HEADER = struct.Struct('<I')
+
+def write_content_pack(path: str, sections: Dict[str, Any]) -> None:
+    """Writes sections (name -> JSON-serializable value) to a pack file, atomically replacing it"""
+    blobs = []
+    index = {}
+    offset = 0
+    for name, value in sections.items():
+        blob = zlib.compress(json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+        index[name] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+    encoded_index = json.dumps(index, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(INDEX_HEADER.pack(len(encoded_index)))
+        f.write(encoded_index)
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class ContentPack:
+    """Read side of a pack written by write_content_pack"""
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a content pack: {path}")
+            (index_length,) = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+            self._index: Dict[str, Tuple[int, int]] = json.loads(f.read(index_length))
+            self._data_start = f.tell()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def sections(self) -> Iterable[str]:
+        return self._index.keys()
+
+    def read(self, name: str) -> Any:
+        offset, length = self._index[name]
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_start + offset)
+            blob = f.read(length)
+        return json.loads(zlib.decompress(blob))
@@ -1,19 +1,28 @@
-from repositories.base_repository import BaseRepository
+from repositories.base_repository import BaseRepository, Index
 from domains.item import Item, ItemType, Rarity
 from typing import List
 
 class ItemRepository(BaseRepository[Item]):
+    model = Item
+    table_name = 'items'
+    indexes = (
+        Index('name'),
+        Index('item_type'),
+        Index('rarity'),
+        Index('is_tradable'),
+        Index('is_consumable'),
+        Index('is_equippable'),
+        Index('is_boostable'),
+    )
+
     def find_by_name(self, name: str) -> Item:
-        for item in self.items:
-            if item.name == name:
-                return item
-        return None
-    
+        return self._first_by_index('name', name)
+
     def find_by_type(self, item_type: ItemType) -> List[Item]:
-        return [item for item in self.items if item.item_type == item_type]
-    
+        return self._find_by_index('item_type', item_type)
+
     def find_by_rarity(self, rarity: Rarity) -> List[Item]:
-        return [item for item in self.items if item.rarity == rarity]
-    
+        return self._find_by_index('rarity', rarity)
+
     def find_equippable(self) -> List[Item]:
-        return [item for item in self.items if item.is_equippable] 
\ No newline at end of file
+        return self._find_by_index('is_equippable', True)
@@ -0,0 +1,209 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Any, List, Optional, Tuple
+
+# Frame header: payload length, crc32 of (opcode + payload), sequence, opcode
+FRAME_HEADER = struct.Struct('<IIQB')
+SNAPSHOT_OPCODE = 0
+# crc32 of each possible opcode byte, used as the seed for the payload crc
+OPCODE_CRC = [zlib.crc32(bytes((opcode,))) for opcode in range(256)]
+
+def encode_payload(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def decode_payload(data: bytes) -> Any:
+    return json.loads(data)
+
+class OperationLog:
+    """
+    Append-only log of state mutations plus periodic snapshots.
+
+    Each operation is a binary frame (header + JSON payload) appended to
+    the log file. Appends only reach the OS buffer; a background thread
+    groups them into one fsync every fsync_interval seconds. snapshot()
+    atomically replaces the snapshot file, then the log with one holding
+    only the operations recorded after it (each written to a temporary
+    file, fsynced and renamed over the old one), so a crash at any point
+    leaves either the old or the new file, and recovery only replays the
+    operations recorded after the snapshot.
+    """
+    LOG_FILE = 'state.log'
+    SNAPSHOT_FILE = 'state.snapshot'
+
+    def __init__(self, directory: str, fsync_interval: float = 0.05):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, self.LOG_FILE)
+        self.snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+
+        self.sequence = 0
+        self.snapshot_sequence = 0
+        self._lock = threading.Lock()
+        # Held for a whole snapshot, so two snapshots never interleave
+        self._snapshot_lock = threading.Lock()
+        self._unsynced = False
+        self._closed = threading.Event()
+        self._file = None
+        self._syncer = None
+
+    @property
+    def operations_since_snapshot(self) -> int:
+        return self.sequence - self.snapshot_sequence
+
+    def recover(self) -> Tuple[Optional[Any], List[Tuple[int, bytes]]]:
+        """
+        Reads the latest snapshot and the operations logged after it, then
+        opens the log for appending. Returns (snapshot state or None,
+        [(opcode, raw payload)]); payloads are left encoded so callers can
+        skip decoding operations that a later one supersedes.
+        """
+        snapshot = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'rb') as f:
+                frames, _ = self._read_frames(f.read())
+            if frames:
+                self.snapshot_sequence, _, data = frames[0]
+                snapshot = decode_payload(data)
+        self.sequence = self.snapshot_sequence
+
+        operations = []
+        valid_length = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                frames, valid_length = self._read_frames(f.read())
+            for sequence, opcode, data in frames:
+                # Frames already folded into the snapshot survive a crash
+                # between writing the snapshot and replacing the log
+                if sequence > self.snapshot_sequence:
+                    operations.append((opcode, data))
+                    self.sequence = sequence
+
+        self._open(valid_length)
+        return snapshot, operations
+
+    def append(self, opcode: int, payload: Any) -> int:
+        """Appends one operation; it becomes durable on the next group fsync"""
+        data = encode_payload(payload)
+        with self._lock:
+            if self._file is None:
+                self._open(None)
+            self.sequence += 1
+            self._file.write(self._frame(self.sequence, opcode, data))
+            self._unsynced = True
+            return self.sequence
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync_locked()
+
+    def snapshot(self, state: Any, blocking: bool = True) -> bool:
+        """
+        Writes a full snapshot of state and compacts the log.
+
+        state may also be a callable that builds it. It then runs without
+        blocking appends, and the operations appended meanwhile stay in the
+        log to be replayed on top of the snapshot, so they must be safe to
+        apply to a state that may already include them. Returns False,
+        without waiting, when another snapshot is running and blocking is False.
+        """
+        if not self._snapshot_lock.acquire(blocking):
+            return False
+        try:
+            with self._lock:
+                if self._file is None:
+                    self._open(None)
+                sequence = self.sequence
+                self._file.flush()
+                offset = self._file.tell()
+            data = encode_payload(state() if callable(state) else state)
+            with self._lock:
+                self._replace(self.snapshot_path, self._frame(sequence, SNAPSHOT_OPCODE, data))
+                self.snapshot_sequence = sequence
+                # Keep only the frames appended after the snapshot point
+                self._file.flush()
+                self._file.seek(offset)
+                tail = self._file.read()
+                self._replace(self.log_path, tail)
+                self._file.close()
+                self._file = open(self.log_path, 'ab+')
+                self._unsynced = False
+        finally:
+            self._snapshot_lock.release()
+        return True
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+
+    def _open(self, valid_length: Optional[int]) -> None:
+        self._file = open(self.log_path, 'ab+')
+        # Drop a torn frame left by a crash mid-write
+        if valid_length is not None:
+            self._file.truncate(valid_length)
+        if self._syncer is None:
+            self._syncer = threading.Thread(target=self._run, name='operation-log-sync', daemon=True)
+            self._syncer.start()
+
+    def _replace(self, path: str, data: bytes) -> None:
+        """Durably replaces the file at path with data"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        # The rename itself is only durable once the directory is synced
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _sync_locked(self) -> None:
+        if self._file is None or not self._unsynced:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = False
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.fsync_interval):
+            with self._lock:
+                self._sync_locked()
+
+    @staticmethod
+    def _frame(sequence: int, opcode: int, data: bytes) -> bytes:
+        crc = zlib.crc32(data, OPCODE_CRC[opcode])
+        return FRAME_HEADER.pack(len(data), crc, sequence, opcode) + data
+
+    @staticmethod
+    def _read_frames(buffer: bytes) -> Tuple[List[Tuple[int, int, bytes]], int]:
+        """Parses frames until the end of the buffer or the first torn/corrupt one"""
+        frames = []
+        header_size = FRAME_HEADER.size
+        unpack = FRAME_HEADER.unpack_from
+        crc32 = zlib.crc32
+        offset, end = 0, len(buffer)
+        while offset + header_size <= end:
+            length, crc, sequence, opcode = unpack(buffer, offset)
+            start = offset + header_size
+            stop = start + length
+            if stop > end:
+                break
+            data = buffer[start:stop]
+            if crc32(data, OPCODE_CRC[opcode]) != crc:
+                break
+            frames.append((sequence, opcode, data))
+            offset = stop
+        return frames, offset
@@ -1,15 +1,51 @@
-from repositories.base_repository import BaseRepository
+from repositories.base_repository import BaseRepository, Index
 from domains.player import Player
+from typing import Dict, List, Optional, Set
 
 class PlayerRepository(BaseRepository[Player]):
+    model = Player
+    table_name = 'players'
+    indexes = (
+        Index('username', unique=True),
+        Index('account_id'),
+    )
+
+    def __init__(self, backend=None):
+        super().__init__(backend)
+        # player id -> fields saved since the last take_changes() (None: the whole player)
+        self._changes: Dict[str, Optional[Set[str]]] = {}
+
+    def load(self) -> int:
+        # Loaded players are not changes
+        count = super().load()
+        self._changes.clear()
+        return count
+
+    def take_changes(self, player_id: str) -> Optional[Set[str]]:
+        """
+        Fields saved since the previous call for this player, whichever code
+        path saved them; None when the whole player was stored (new or replaced)
+        """
+        with self._lock:
+            return self._changes.pop(player_id, set())
+
     def find_by_account_id(self, account_id: str) -> Player:
-        for player in self.items:
-            if player.account_id == account_id:
-                return player
-        return None
-    
+        return self._first_by_index('account_id', account_id)
+
+    def find_all_by_account_id(self, account_id: str) -> List[Player]:
+        return self._find_by_index('account_id', account_id)
+
     def find_by_username(self, username: str) -> Player:
-        for player in self.items:
-            if player.username == username:
-                return player
-        return None 
\ No newline at end of file
+        return self._first_by_index('username', username)
+
+    def _saved(self, player: Player, fields: Optional[Set[str]]) -> None:
+        if player.id not in self._changes:
+            self._changes[player.id] = None if fields is None else set(fields)
+        elif self._changes[player.id] is not None:
+            if fields is None:
+                self._changes[player.id] = None
+            else:
+                self._changes[player.id].update(fields)
+
+    def _deleted(self, id: str) -> None:
+        self._changes.pop(id, None)
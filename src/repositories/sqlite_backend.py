@@ -0,0 +1,185 @@
+import json
+import logging
+import sqlite3
+import threading
+from itertools import islice
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SQLiteBackend:
+    """
+    Write-behind persistence for repositories on a local SQLite file.
+
+    Repositories stage dirty entities, encoded to JSON right away by the
+    thread that saves them (which holds the entity's lock, so the encoded
+    state is consistent); a writer thread only stores the encoded rows, in
+    transactions of up to max_batch_size rows every flush_interval seconds,
+    so request handlers never wait on the disk.
+    """
+    def __init__(self, path: str, flush_interval: float = 2.0, max_batch_size: int = 500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+
+        # (table, id) -> (encoded JSON of each field to write, whether they
+        # are the whole entity), or None to delete it
+        self._pending: Dict[Tuple[str, str], Optional[Tuple[Dict[str, str], bool]]] = {}
+        self._pending_lock = threading.Lock()
+        # Only one flush writes at a time, so batches land in staging order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+
+        self._writer = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._writer.start()
+
+    def register(self, table: str) -> None:
+        """Creates the table for a repository if it does not exist yet"""
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        with self._flush_lock:
+            self._connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}" (id TEXT PRIMARY KEY, data TEXT NOT NULL)'
+            )
+
+    def load(self, table: str) -> Iterator[str]:
+        """Returns the stored JSON of every entity, in insertion order"""
+        with self._flush_lock:
+            rows = self._connection.execute(f'SELECT data FROM "{table}" ORDER BY rowid').fetchall()
+        return (data for (data,) in rows)
+
+    def stage_save(self, table: str, id: str, entity, fields: Optional[Iterable[str]] = None) -> None:
+        """
+        Encodes an entity and stages it to be written on the next flush.
+        With fields, only those top-level fields are updated in the stored
+        document. The caller must keep the entity from changing meanwhile.
+        """
+        key = (table, id)
+        if fields is not None:
+            values = _encode_fields(entity, frozenset(fields))
+            with self._pending_lock:
+                if key not in self._pending:
+                    self._stage_locked(key, (values, False))
+                    return
+                staged = self._pending[key]
+                if staged is not None:
+                    # Newer values win; a whole-entity write stays one
+                    self._stage_locked(key, ({**staged[0], **values}, staged[1]))
+                    return
+            # A delete is pending, so the stored document must be rewritten whole
+        values = _encode_fields(entity, None)
+        with self._pending_lock:
+            self._stage_locked(key, (values, True))
+
+    def stage_delete(self, table: str, id: str) -> None:
+        """Stages an entity to be deleted on the next flush"""
+        with self._pending_lock:
+            self._stage_locked((table, id), None)
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Synchronously writes everything pending and returns the number of rows"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return written
+                try:
+                    self._write_batch(batch)
+                except Exception:
+                    self._requeue(batch)
+                    raise
+                written += len(batch)
+
+    def close(self) -> None:
+        """Stops the writer thread and writes whatever is still pending"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        self._connection.close()
+
+    def _stage_locked(self, key: Tuple[str, str], staged) -> None:
+        # Re-inserting moves the key to the end, keeping change order
+        self._pending.pop(key, None)
+        self._pending[key] = staged
+        if len(self._pending) >= self.max_batch_size:
+            self._wake.set()
+
+    def _take_batch(self) -> List[Tuple[Tuple[str, str], Optional[object]]]:
+        with self._pending_lock:
+            keys = list(islice(self._pending, self.max_batch_size))
+            return [(key, self._pending.pop(key)) for key in keys]
+
+    def _requeue(self, batch) -> None:
+        with self._pending_lock:
+            for key, staged in batch:
+                if key not in self._pending:
+                    self._pending[key] = staged
+                elif staged is not None and self._pending[key] is not None:
+                    # A newer version was staged while we were writing; it must
+                    # still cover the fields of the write that failed
+                    values, whole = self._pending[key]
+                    if not whole:
+                        self._pending[key] = ({**staged[0], **values}, staged[1])
+
+    def _write_batch(self, batch) -> None:
+        upserts: Dict[str, list] = {}
+        updates: Dict[Tuple[str, Tuple[str, ...]], list] = {}
+        deletes: Dict[str, list] = {}
+        for (table, id), staged in batch:
+            if staged is None:
+                deletes.setdefault(table, []).append((id,))
+                continue
+            values, whole = staged
+            if whole:
+                data = '{' + ','.join(f'{json.dumps(name)}:{value}' for name, value in values.items()) + '}'
+                upserts.setdefault(table, []).append((id, data))
+            elif values:
+                names = tuple(sorted(values))
+                row = [values[name] for name in names]
+                row.append(id)
+                updates.setdefault((table, names), []).append(row)
+
+        cursor = self._connection.cursor()
+        cursor.execute("BEGIN")
+        try:
+            for table, rows in deletes.items():
+                cursor.executemany(f'DELETE FROM "{table}" WHERE id = ?', rows)
+            for table, rows in upserts.items():
+                cursor.executemany(
+                    f'INSERT INTO "{table}" (id, data) VALUES (?, ?) '
+                    'ON CONFLICT(id) DO UPDATE SET data = excluded.data',
+                    rows
+                )
+            for (table, names), rows in updates.items():
+                paths = ', '.join(f"'$.{name}', json(?)" for name in names)
+                cursor.executemany(f'UPDATE "{table}" SET data = json_set(data, {paths}) WHERE id = ?', rows)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to write batch to SQLite")
+
+def _encode_fields(entity, fields: Optional[FrozenSet[str]]) -> Dict[str, str]:
+    """JSON of each top-level field of entity (all of them when fields is None), in model order"""
+    values = entity.model_dump(mode='json', include=fields)
+    return {name: json.dumps(value, separators=(',', ':'), ensure_ascii=False) for name, value in values.items()}
@@ -0,0 +1,430 @@
+import gzip
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from flask import Response, request
+
+try:
+    import msgpack
+except ImportError:  # opcional: sem msgpack as respostas são sempre JSON
+    msgpack = None
+
+# Conversão de objetos de domínio para as respostas da API.
+#
+# Itens e instâncias guardam o próprio fragmento JSON já codificado
+# (BaseDomain._encoded), descartado sempre que um campo muda; assim um
+# inventário grande só recodifica os itens que mudaram desde a última
+# resposta. Os campos do jogador (hp, posição, stats...) mudam quase a
+# cada requisição e são codificados sempre.
+
+def player_to_dict(player):
+    return {
+        'id': player.id,
+        'username': player.username,
+        'equipment': [instance_to_dict(item) for item in player.equipment],
+        'inventory': [instance_to_dict(item) for item in player.inventory],
+        'stats': stats_to_dict(player.stats),
+        'life_skills': life_skills_to_dict(player.life_skills),
+        'position': {'x': player.x, 'y': player.y},
+        'hp': player.hp,
+        'max_hp': player.max_hp,
+        'max_mana': player.max_mana,
+        'level': player.level,
+        'exp': player.exp,
+        'next_level_exp': player.next_level_exp,
+        'gold': player.gold,
+        'inventory_size': player.inventory_size,
+        'attribute_points': player.attribute_points
+    }
+
+def item_to_dict(item):
+    if not item:
+        return None
+
+    return {
+        'id': item.id,
+        'name': item.name,
+        'description': item.description,
+        'item_type': item.item_type.value,
+        'rarity': item.rarity.value,
+        'price': item.price,
+        'sell_price': item.sell_price,
+        'is_tradable': item.is_tradable,
+        'is_consumable': item.is_consumable,
+        'is_equippable': item.is_equippable,
+        'is_boostable': item.is_boostable,
+        'stats': stats_to_dict(item.stats) if item.stats else None
+    }
+
+def instance_to_dict(instance):
+    # Mesmo formato de item_to_dict, mais os dados da instância
+    data = item_to_dict(instance)
+    data['template_id'] = instance.template_id
+    data['quantity'] = instance.quantity
+    data['enhancement'] = instance.enhancement
+    return data
+
+def stats_to_dict(stats):
+    if not stats:
+        return None
+
+    return {
+        'strength': stats.strength,
+        'intelligence': stats.intelligence,
+        'dexterity': stats.dexterity,
+        'constitution': stats.constitution,
+        'health': stats.health,
+        'mana': stats.mana,
+        'physical_power': stats.physical_power,
+        'magic_resistance': stats.magic_resistance,
+        'speed': stats.speed,
+        'magic_power': stats.magic_power,
+        'armor': stats.armor,
+        'critical_chance': stats.critical_chance,
+        'critical_power': stats.critical_power,
+        'luck': stats.luck
+    }
+
+def life_skills_to_dict(life_skills):
+    if not life_skills:
+        return None
+
+    return {
+        'cooking': life_skills.cooking,
+        'fishing': life_skills.fishing,
+        'mining': life_skills.mining,
+        'gathering': life_skills.gathering,
+        'lumbering': life_skills.lumbering,
+        'crafting': life_skills.crafting
+    }
+
+def encode(value):
+    return json.dumps(value, separators=(',', ':'))
+
+class Fragment(str):
+    """
+    Fragmento JSON já codificado. Guarda a versão MessagePack na primeira
+    conversão, então um item em cache também é empacotado uma vez só.
+    schema diz que tipo de objeto ele é (ver WIRE_FIELDS); sem schema as
+    chaves ficam como texto.
+    """
+    packed = None
+    schema = None
+
+    def pack(self):
+        if self.packed is None:
+            self.packed = _pack_value(json.loads(self), self.schema)
+        return self.packed
+
+class FragmentList(Fragment):
+    """Lista de fragmentos (json_list); o MessagePack reaproveita o de cada parte"""
+    parts = ()
+
+    def pack(self):
+        return msgpack.Packer().pack_array_header(len(self.parts)) + b''.join(
+            _pack_fragment(part, self.schema) for part in self.parts
+        )
+
+class FragmentMap(Fragment):
+    """Objeto cujos valores podem ser fragmentos (ex.: o estado do jogador)"""
+    entries = {}
+
+    def pack(self):
+        return _pack_map(self.entries, schema=self.schema)
+
+def item_json(item):
+    """Fragmento JSON de um item (template), codificado uma única vez"""
+    if item is None:
+        return 'null'
+    return _cached(item, item_to_dict, ITEM_SCHEMA)
+
+def instance_json(instance):
+    """Fragmento JSON de uma instância, recodificado só depois de mudar"""
+    return _cached(instance, instance_to_dict, ITEM_SCHEMA)
+
+def json_list(fragments):
+    parts = list(fragments)
+    fragment = FragmentList('[' + ','.join(parts) + ']')
+    fragment.parts = parts
+    return fragment
+
+class PlayerRevisions:
+    """
+    Revisões do estado do jogador já enviado aos clientes, para respostas
+    delta. Guarda os últimos `history` estados de cada jogador, para no
+    máximo `max_players` jogadores (os usados há mais tempo saem primeiro);
+    os fragmentos dos itens são os mesmos do cache, então cada estado custa
+    pouco. Um cliente que informa uma revisão conhecida recebe só o que
+    mudou desde ela; senão recebe o snapshot completo. Revisões são
+    inteiros em todas as respostas.
+    """
+    def __init__(self, history=32, max_players=1024):
+        self.history = history
+        self.max_players = max_players
+        # player id -> deque de (revisão, estado), do menos ao mais usado
+        self._states = OrderedDict()
+        # Cada jogador é atendido sob a trava dele, mas a ordem LRU é de todos
+        self._lock = threading.Lock()
+
+    def payload(self, player, since=None):
+        """Fragmentos para json_response: player + player_revision, ou player_delta"""
+        with self._lock:
+            states = self._states.get(player.id)
+            if states is None:
+                states = self._states[player.id] = deque(maxlen=self.history)
+                if len(self._states) > self.max_players:
+                    self._states.popitem(last=False)
+            else:
+                self._states.move_to_end(player.id)
+        state = _player_state(player)
+        if states and states[-1][1] == state:
+            revision = states[-1][0]
+        else:
+            revision = next(_REVISIONS)
+            states.append((revision, state))
+
+        base = None
+        if since is not None:
+            base = next((old for old_revision, old in states if old_revision == since), None)
+        if base is None:
+            # Fragmentos são JSON: a revisão vai como número, como base/revision do delta
+            return {'player': _state_json(state), 'player_revision': encode(revision)}
+        return {'player_delta': _delta_json(base, state, since, revision)}
+
+# Revisões crescentes e únicas entre jogadores e reinícios do servidor, para
+# que uma revisão antiga nunca coincida com um estado novo (microssegundos:
+# cabem nos 53 bits dos números do JavaScript)
+_REVISIONS = itertools.count(time.time_ns() // 1000)
+
+def _player_state(player):
+    """(campos escalares, equipamento e inventário como id -> fragmento)"""
+    fields = {
+        'id': player.id,
+        'username': player.username,
+        'stats': stats_to_dict(player.stats),
+        'life_skills': life_skills_to_dict(player.life_skills),
+        'position': {'x': player.x, 'y': player.y},
+        'hp': player.hp,
+        'max_hp': player.max_hp,
+        'max_mana': player.max_mana,
+        'level': player.level,
+        'exp': player.exp,
+        'next_level_exp': player.next_level_exp,
+        'gold': player.gold,
+        'inventory_size': player.inventory_size,
+        'attribute_points': player.attribute_points
+    }
+    equipment = {item.id: instance_json(item) for item in player.equipment}
+    inventory = {item.id: instance_json(item) for item in player.inventory}
+    return fields, equipment, inventory
+
+def _state_json(state):
+    fields, equipment, inventory = state
+    equipment = json_list(equipment.values())
+    inventory = json_list(inventory.values())
+    fragment = FragmentMap(encode(fields)[:-1] + ',"equipment":' + equipment + ',"inventory":' + inventory + '}')
+    fragment.entries = dict(fields, equipment=equipment, inventory=inventory)
+    fragment.schema = PLAYER_SCHEMA
+    return fragment
+
+def _delta_json(base, state, since, revision):
+    """
+    Delta entre dois estados: campos alterados (objetos como stats trazem só
+    as chaves alteradas) e, por slot, ids removidos e itens novos/alterados.
+    Itens novos entram no fim da lista, como no Inventory.
+    """
+    changed = {}
+    for name, value in state[0].items():
+        old = base[0].get(name)
+        if value == old:
+            continue
+        if isinstance(value, dict) and isinstance(old, dict):
+            value = {key: item for key, item in value.items() if old.get(key) != item}
+        changed[name] = value
+
+    parts = ['"base":' + encode(since), '"revision":' + encode(revision), '"changed":' + encode(changed)]
+    for name, old_slots, slots in (('equipment', base[1], state[1]), ('inventory', base[2], state[2])):
+        removed = [item_id for item_id in old_slots if item_id not in slots]
+        upserted = [fragment for item_id, fragment in slots.items() if old_slots.get(item_id) != fragment]
+        if removed or upserted:
+            parts.append(
+                encode(name) + ':{"remove":' + encode(removed) + ',"upsert":' + json_list(upserted) + '}'
+            )
+    fragment = Fragment('{' + ','.join(parts) + '}')
+    fragment.schema = PLAYER_DELTA_SCHEMA
+    return fragment
+
+def json_response(payload, **fragments):
+    """
+    Resposta JSON como jsonify(payload), com campos extras já codificados
+    (ex.: os de PlayerRevisions.payload) inseridos sem passar de novo pelo encoder
+    """
+    parts = [encode(key) + ':' + encode(value) for key, value in payload.items()]
+    parts.extend(encode(key) + ':' + fragment for key, fragment in fragments.items())
+    response = Response('{' + ','.join(parts) + '}\n', mimetype='application/json')
+    # Partes originais, para negotiate_response montar o MessagePack sem decodificar o JSON
+    response.wire_parts = (payload, fragments)
+    return response
+
+def sse_event(event, data):
+    """Evento Server-Sent Events já codificado, para ser enviado a vários assinantes"""
+    return f"event: {event}\ndata: {encode(data)}\n\n".encode('utf-8')
+
+def conditional_response(etag, build):
+    """
+    Responde 304 sem montar o corpo quando o cliente já tem a versão etag
+    (If-None-Match); senão chama build() e marca a resposta com a ETag
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    # O cliente pode guardar a resposta, mas deve revalidar a cada uso
+    response.cache_control.no_cache = True
+    return response
+
+def _cached(domain, to_dict, schema):
+    private = domain.__pydantic_private__
+    fragment = private.get('_encoded')
+    if fragment is None:
+        fragment = Fragment(encode(to_dict(domain)))
+        fragment.schema = schema
+        private['_encoded'] = fragment
+    return fragment
+
+# Formato binário das respostas (MessagePack), negociado pelo Accept.
+#
+# Nas respostas binárias as chaves dos objetos de jogador, item/instância,
+# stats e life skills viram inteiros: o número de uma chave é a posição dela
+# em WIRE_FIELDS (publicado em /api/wire/schema). Só esses objetos, marcados
+# com o schema deles (ITEM_SCHEMA, PLAYER_SCHEMA...) pelos serializadores,
+# são convertidos; o envelope das respostas, mapas por id e dicionários
+# livres mantêm as chaves como estão. A lista só cresce no fim, para não
+# mudar os números que os clientes já conhecem.
+WIRE_FIELDS = (
+    # Player
+    'id', 'username', 'equipment', 'inventory', 'stats', 'life_skills', 'position', 'x', 'y',
+    'hp', 'max_hp', 'level', 'exp', 'next_level_exp', 'gold', 'inventory_size', 'attribute_points',
+    # Item e ItemInstance
+    'name', 'description', 'item_type', 'rarity', 'price', 'sell_price', 'is_tradable',
+    'is_consumable', 'is_equippable', 'is_boostable', 'template_id', 'quantity', 'enhancement',
+    # Stats
+    'strength', 'intelligence', 'dexterity', 'constitution', 'health', 'mana', 'physical_power',
+    'magic_resistance', 'speed', 'magic_power', 'armor', 'critical_chance', 'critical_power', 'luck',
+    # LifeSkill
+    'cooking', 'fishing', 'mining', 'gathering', 'lumbering', 'crafting',
+    # Player
+    'max_mana',
+)
+WIRE_KEYS = {name: number for number, name in enumerate(WIRE_FIELDS)}
+
+# Schemas: campo -> schema do valor dele (None para valores simples). As
+# chaves listadas que estão em WIRE_FIELDS são numeradas; o schema de uma
+# lista vale para cada elemento
+STATS_SCHEMA = dict.fromkeys((
+    'strength', 'intelligence', 'dexterity', 'constitution', 'health', 'mana', 'physical_power',
+    'magic_resistance', 'speed', 'magic_power', 'armor', 'critical_chance', 'critical_power', 'luck'
+))
+LIFE_SKILLS_SCHEMA = dict.fromkeys(('cooking', 'fishing', 'mining', 'gathering', 'lumbering', 'crafting'))
+ITEM_SCHEMA = dict(
+    dict.fromkeys((
+        'id', 'name', 'description', 'item_type', 'rarity', 'price', 'sell_price', 'is_tradable',
+        'is_consumable', 'is_equippable', 'is_boostable', 'template_id', 'quantity', 'enhancement'
+    )),
+    stats=STATS_SCHEMA
+)
+PLAYER_SCHEMA = dict(
+    dict.fromkeys((
+        'id', 'username', 'hp', 'max_hp', 'max_mana', 'level', 'exp', 'next_level_exp', 'gold',
+        'inventory_size', 'attribute_points'
+    )),
+    equipment=ITEM_SCHEMA,
+    inventory=ITEM_SCHEMA,
+    stats=STATS_SCHEMA,
+    life_skills=LIFE_SKILLS_SCHEMA,
+    position=dict.fromkeys(('x', 'y'))
+)
+# Delta do jogador (X-Player-Revision): campos alterados e itens novos
+_SLOTS_DELTA_SCHEMA = {'upsert': ITEM_SCHEMA}
+PLAYER_DELTA_SCHEMA = {'changed': PLAYER_SCHEMA, 'equipment': _SLOTS_DELTA_SCHEMA, 'inventory': _SLOTS_DELTA_SCHEMA}
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+def negotiate_response(response, compress_min_size=1024, compress_level=6):
+    """
+    Ajusta uma resposta JSON ao que o cliente aceita: vira MessagePack com
+    Accept: application/msgpack e, a partir de compress_min_size bytes, vai
+    comprimida com gzip se o Accept-Encoding permitir. Sem esses cabeçalhos
+    a resposta sai como está (JSON).
+    """
+    if response.status_code == 304 or response.is_streamed or response.direct_passthrough:
+        return response
+    if response.mimetype != JSON_MIMETYPE or response.content_encoding:
+        return response
+    response.vary.add('Accept')
+    response.vary.add('Accept-Encoding')
+
+    changed = False
+    if msgpack is not None and request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES) in MSGPACK_MIMETYPES:
+        wire_parts = getattr(response, 'wire_parts', None)
+        if wire_parts is None:
+            response.set_data(_pack_value(json.loads(response.get_data())))
+        else:
+            response.set_data(_pack_map(*wire_parts))
+        response.mimetype = MSGPACK_MIMETYPES[0]
+        changed = True
+    if response.content_length >= compress_min_size and request.accept_encodings['gzip']:
+        response.set_data(gzip.compress(response.get_data(), compress_level))
+        response.content_encoding = 'gzip'
+        changed = True
+
+    # Outra representação do mesmo conteúdo: a ETag continua valendo, mas fraca
+    etag, weak = response.get_etag()
+    if changed and etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def _pack_value(value, schema=None):
+    return msgpack.packb(_wire_value(value, schema))
+
+def _pack_fragment(fragment, schema=None):
+    if isinstance(fragment, Fragment):
+        return fragment.pack()
+    # Fragmento montado à mão: converte sem guardar
+    return _pack_value(json.loads(fragment), schema)
+
+def _pack_map(values, fragments=None, schema=None):
+    """
+    Mapa MessagePack com valores Python (values) e fragmentos JSON
+    (fragments, ou os valores Fragment); schema é o do próprio mapa
+    (None para o envelope da resposta)
+    """
+    fragments = fragments or {}
+    schema = schema or {}
+    # Um Packer por chamada: ele guarda um buffer e não pode ser dividido entre threads
+    packer = msgpack.Packer()
+    parts = [packer.pack_map_header(len(values) + len(fragments))]
+    for key, value in values.items():
+        parts.append(packer.pack(_wire_key(key, schema)))
+        parts.append(value.pack() if isinstance(value, Fragment) else _pack_value(value, schema.get(key)))
+    for key, fragment in fragments.items():
+        parts.append(packer.pack(_wire_key(key, schema)))
+        parts.append(_pack_fragment(fragment, schema.get(key)))
+    return b''.join(parts)
+
+def _wire_key(key, schema):
+    return WIRE_KEYS.get(key, key) if key in schema else key
+
+def _wire_value(value, schema):
+    """Valor com as chaves do schema numeradas; sem schema sai como está"""
+    if schema is None:
+        return value
+    if isinstance(value, list):
+        return [_wire_value(element, schema) for element in value]
+    if isinstance(value, dict):
+        return {_wire_key(key, schema): _wire_value(element, schema.get(key)) for key, element in value.items()}
+    return value
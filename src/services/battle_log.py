@@ -0,0 +1,134 @@
+import math
+from enum import IntEnum
+from typing import Iterator, List, Tuple
+
+class BattleVerbosity(IntEnum):
+    NONE = 0     # sem log
+    SUMMARY = 1  # início, totais e resultado
+    FULL = 2     # todos os golpes, turno a turno
+
+    @classmethod
+    def parse(cls, name: str) -> 'BattleVerbosity':
+        try:
+            return cls[str(name).upper()]
+        except KeyError:
+            raise ValueError(f"Unknown verbosity: {name} (expected none, summary or full)")
+
+# Quem desferiu o golpe
+ACTOR_PLAYER = 0
+ACTOR_NPC = 1
+
+class BattleLog:
+    """
+    Registro de uma batalha. O dano de cada lado é fixo durante a luta e os
+    turnos se alternam sempre na mesma ordem, então basta guardar se cada
+    golpe do jogador foi crítico: um byte por turno, num buffer alocado de
+    uma vez no início. Os eventos (turno, ator, dano, crítico) e o texto
+    são montados a partir dele só quando pedidos, e só até o nível de
+    detalhe gravado: com SUMMARY ficam apenas os totais, com NONE nada.
+    """
+    __slots__ = ('player_name', 'npc_name', 'verbosity', 'player_hp', 'npc_hp',
+                 'player_damage', 'critical_damage', 'npc_damage', 'criticals',
+                 'turns', 'critical_hits', 'final_player_hp', 'final_npc_hp', 'inventory_full')
+
+    def __init__(self, player_name: str, npc_name: str, player_hp: int, npc_hp: int,
+                 player_damage: int, critical_damage: int, npc_damage: int,
+                 verbosity: BattleVerbosity = BattleVerbosity.FULL):
+        self.player_name = player_name
+        self.npc_name = npc_name
+        self.verbosity = verbosity
+        self.player_hp = player_hp
+        self.npc_hp = npc_hp
+        self.player_damage = player_damage
+        self.critical_damage = critical_damage
+        self.npc_damage = npc_damage
+        self.criticals = (
+            bytearray(max_battle_turns(player_hp, npc_hp, player_damage, critical_damage, npc_damage))
+            if verbosity == BattleVerbosity.FULL else None
+        )
+        self.turns = 0
+        self.critical_hits = 0
+        self.final_player_hp = player_hp
+        self.final_npc_hp = npc_hp
+        self.inventory_full = 0
+
+    def finish(self, turns: int, critical_hits: int, player_hp: int, npc_hp: int) -> None:
+        self.turns = turns
+        self.critical_hits = critical_hits
+        self.final_player_hp = player_hp
+        self.final_npc_hp = npc_hp
+
+    @property
+    def damage_dealt(self) -> int:
+        return self.npc_hp - self.final_npc_hp
+
+    @property
+    def damage_taken(self) -> int:
+        return self.player_hp - self.final_player_hp
+
+    def events(self) -> Iterator[Tuple[int, int, int, bool]]:
+        """Golpes da batalha em ordem, como (turno, ator, dano, crítico); vazio abaixo de FULL"""
+        if self.criticals is None:
+            return
+        npc_hp = self.npc_hp
+        for turn in range(1, self.turns + 1):
+            critical = bool(self.criticals[turn - 1])
+            damage = self.critical_damage if critical else self.player_damage
+            yield turn, ACTOR_PLAYER, damage, critical
+            npc_hp -= damage
+            if npc_hp <= 0:
+                return
+            yield turn, ACTOR_NPC, self.npc_damage, False
+
+    def render(self, verbosity: BattleVerbosity = BattleVerbosity.FULL) -> List[str]:
+        """Texto do log (em português), no nível pedido ou no gravado, o que for menor"""
+        verbosity = min(verbosity, self.verbosity)
+        if verbosity == BattleVerbosity.NONE:
+            return []
+        lines = [f"Batalha iniciada: {self.player_name} vs {self.npc_name}"]
+        if verbosity == BattleVerbosity.FULL:
+            self._render_turns(lines)
+        elif self.turns:
+            lines.append(
+                f"{self.turns} turnos: {self.player_name} causou {self.damage_dealt} de dano "
+                f"({self.critical_hits} críticos) e recebeu {self.damage_taken}."
+            )
+            if self.final_npc_hp <= 0:
+                lines.append(f"{self.npc_name} foi derrotado!")
+            elif self.final_player_hp <= 0:
+                lines.append(f"{self.player_name} foi derrotado!")
+        lines.extend(["Seu inventário está cheio!"] * self.inventory_full)
+        return lines
+
+    def _render_turns(self, lines: List[str]) -> None:
+        player, npc = self.player_name, self.npc_name
+        player_hp, npc_hp = self.player_hp, self.npc_hp
+        append = lines.append
+        # As linhas que se repetem a cada turno são montadas uma vez só
+        hit = f"{player} causou {self.player_damage} de dano."
+        critical_hit = f"{player} causou um golpe crítico de {self.critical_damage} de dano!"
+        npc_hit = f"{npc} causou {self.npc_damage} de dano."
+        for turn, actor, damage, critical in self.events():
+            if actor == ACTOR_PLAYER:
+                append(f"Turno {turn}")
+                append(critical_hit if critical else hit)
+                npc_hp -= damage
+                if npc_hp <= 0:
+                    append(f"{npc} foi derrotado!")
+            else:
+                append(npc_hit)
+                player_hp -= damage
+                if player_hp <= 0:
+                    append(f"{player} foi derrotado!")
+                else:
+                    append(f"Status: {player} HP: {player_hp} | {npc} HP: {npc_hp}")
+
+def max_battle_turns(player_hp: int, npc_hp: int, player_damage: int, critical_damage: int, npc_damage: int) -> int:
+    """Limite de turnos da batalha: o jogador cai em no máximo ceil(hp / dano do NPC) turnos"""
+    if player_hp <= 0 or npc_hp <= 0:
+        return 0
+    turns = math.ceil(player_hp / npc_damage)
+    weakest_hit = min(player_damage, critical_damage)
+    if weakest_hit > 0:
+        turns = min(turns, math.ceil(npc_hp / weakest_hit))
+    return turns
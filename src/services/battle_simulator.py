@@ -0,0 +1,134 @@
+from typing import Dict, List, Sequence
+
+try:
+    import numpy
+except ImportError:  # opcional: sem numpy a simulação em lote não está disponível
+    numpy = None
+
+# Atributos de cada lado usados pelo combate (ver GameService.battle)
+PLAYER_FIELDS = ('hp', 'physical_power', 'armor', 'critical_chance', 'critical_power')
+NPC_FIELDS = ('hp', 'physical_power', 'armor')
+
+class BattleOutcomes:
+    """Resultado de N lutas: arrays com uma posição por luta"""
+    __slots__ = ('victory', 'turns', 'player_hp', 'resolved')
+
+    def __init__(self, victory, turns, player_hp, resolved):
+        self.victory = victory      # jogador venceu
+        self.turns = turns          # turno em que a luta acabou (0 se nem começou)
+        self.player_hp = player_hp  # HP restante do jogador
+        self.resolved = resolved    # False se a luta passou de max_turns
+
+    def __len__(self) -> int:
+        return len(self.victory)
+
+class BattleSimulator:
+    """
+    Simula lutas em lote com as mesmas regras de GameService.battle, sem
+    log: cada turno é resolvido para todas as lutas ainda em andamento com
+    operações sobre arrays NumPy, e as que terminam saem do lote.
+    """
+    def __init__(self, max_turns: int = 10000):
+        # Com crítico garantido e dano crítico zero a luta nunca acaba
+        self.max_turns = max_turns
+
+    def simulate(self, player: Dict[str, Sequence], npc: Dict[str, Sequence], rng=None) -> BattleOutcomes:
+        """
+        Resolve N lutas. player e npc mapeiam cada atributo (PLAYER_FIELDS /
+        NPC_FIELDS) para um array de N valores, ou um escalar igual para todas
+        """
+        if numpy is None:
+            raise ValueError("Battle simulation requires numpy")
+        rng = rng if rng is not None else numpy.random.default_rng()
+        size = numpy.broadcast_shapes(*(numpy.shape(player[name]) for name in PLAYER_FIELDS),
+                                      *(numpy.shape(npc[name]) for name in NPC_FIELDS))
+        if len(size) > 1:
+            raise ValueError("Stats must be scalars or one-dimensional arrays")
+
+        def column(values, dtype):
+            return numpy.broadcast_to(numpy.asarray(values, dtype=dtype), size)
+
+        player_hp = column(player['hp'], numpy.int64).copy()
+        npc_hp = column(npc['hp'], numpy.int64).copy()
+        critical_chance = column(player['critical_chance'], numpy.float64)
+        # Mesmas contas de GameService.battle; int() trunca em direção a zero
+        player_damage = numpy.maximum(
+            1, column(player['physical_power'], numpy.int64) - numpy.trunc(column(npc['armor'], numpy.float64) * 0.5).astype(numpy.int64)
+        )
+        npc_damage = numpy.maximum(
+            1, column(npc['physical_power'], numpy.int64) - numpy.trunc(column(player['armor'], numpy.float64) * 0.5).astype(numpy.int64)
+        )
+        critical_damage = numpy.trunc(player_damage * column(player['critical_power'], numpy.float64)).astype(numpy.int64)
+
+        turns = numpy.zeros(size, dtype=numpy.int64)
+        resolved = numpy.ones(size, dtype=bool)
+        # Lutas em andamento: índices e os valores delas, compactados a cada turno
+        active = numpy.flatnonzero((player_hp > 0) & (npc_hp > 0))
+        active_player_hp, active_npc_hp = player_hp[active], npc_hp[active]
+        active_chance, active_damage = critical_chance[active], player_damage[active]
+        active_critical, active_npc_damage = critical_damage[active], npc_damage[active]
+
+        turn = 0
+        while active.size and turn < self.max_turns:
+            turn += 1
+            # Turno do jogador
+            critical = rng.random(active.size) < active_chance
+            active_npc_hp -= numpy.where(critical, active_critical, active_damage)
+            npc_defeated = active_npc_hp <= 0
+            # Turno do NPC, se ele ainda estiver de pé
+            active_player_hp -= numpy.where(npc_defeated, 0, active_npc_damage)
+            finished = npc_defeated | (active_player_hp <= 0)
+            if not finished.any():
+                continue
+
+            done = active[finished]
+            turns[done] = turn
+            player_hp[done] = active_player_hp[finished]
+            going = ~finished
+            active, active_player_hp, active_npc_hp = active[going], active_player_hp[going], active_npc_hp[going]
+            active_chance, active_damage = active_chance[going], active_damage[going]
+            active_critical, active_npc_damage = active_critical[going], active_npc_damage[going]
+
+        if active.size:
+            resolved[active] = False
+            turns[active] = turn
+            player_hp[active] = active_player_hp
+        # Como em battle: o jogador vence se termina com HP positivo (lutas não resolvidas não contam)
+        return BattleOutcomes((player_hp > 0) & resolved, turns, player_hp, resolved)
+
+    def sweep(self, builds: List[dict], npcs: List[dict], fights: int, rng=None) -> List[dict]:
+        """
+        Taxa de vitória e turnos médios de cada build de jogador contra cada
+        NPC, com fights lutas por par, todas resolvidas em um único lote
+        """
+        if numpy is None:
+            raise ValueError("Battle simulation requires numpy")
+        if not builds or not npcs or fights < 1:
+            return []
+        pairs = len(builds) * len(npcs)
+        # Lutas ordenadas por (build, npc, repetição)
+        build_index = numpy.repeat(numpy.arange(len(builds)), len(npcs) * fights)
+        npc_index = numpy.tile(numpy.repeat(numpy.arange(len(npcs)), fights), len(builds))
+        player = {name: numpy.array([build[name] for build in builds])[build_index] for name in PLAYER_FIELDS}
+        npc = {name: numpy.array([target[name] for target in npcs])[npc_index] for name in NPC_FIELDS}
+        outcomes = self.simulate(player, npc, rng)
+
+        victory = outcomes.victory.reshape(pairs, fights)
+        turns = outcomes.turns.reshape(pairs, fights)
+        wins = victory.sum(axis=1)
+        win_turns = numpy.where(victory, turns, 0).sum(axis=1)
+        mean_turns = turns.mean(axis=1)
+        unresolved = fights - outcomes.resolved.reshape(pairs, fights).sum(axis=1)
+
+        results = []
+        for pair in range(pairs):
+            results.append({
+                'build': pair // len(npcs),
+                'npc': pair % len(npcs),
+                'win_rate': float(wins[pair]) / fights,
+                'mean_turns': float(mean_turns[pair]),
+                # Tempo até matar o NPC, só nas vitórias
+                'mean_turns_to_kill': float(win_turns[pair]) / int(wins[pair]) if wins[pair] else None,
+                'unresolved': int(unresolved[pair])
+            })
+        return results
@@ -0,0 +1,157 @@
+import json
+import uuid
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List
+from pydantic import TypeAdapter, ValidationError
+from typing_extensions import NotRequired, TypedDict
+
+from domains.item import Item
+from domains.entity import Harvest
+
+class Position(TypedDict):
+    x: int
+    y: int
+
+class ResourceRecord(TypedDict):
+    id: str
+    name: str
+    type: str
+    position: Position
+    area: str
+
+class ResourceEntry(TypedDict):
+    harvest: Harvest
+    resource: ResourceRecord
+
+class NpcRecord(TypedDict):
+    id: str
+    name: str
+    level: int
+    hp: int
+    max_hp: int
+    position: Position
+    area: str
+    type: str
+    # Atributos de combate; sem eles são derivados do nível (ver npc_stats)
+    damage: NotRequired[int]
+    armor: NotRequired[int]
+
+class CatalogService:
+    """
+    Importação e exportação do conteúdo do jogo em NDJSON (um objeto JSON
+    por linha), no mesmo formato das operações do log de estado:
+
+        items      Item.model_dump(mode='json')
+        resources  {"harvest": Harvest, "resource": {id, name, type, position, area}}
+        npcs       {id, name, level, hp, max_hp, position, area, type[, damage, armor]}
+
+    id e created_at podem faltar em conteúdo novo; são gerados na importação.
+    """
+    COLLECTIONS = ('items', 'resources', 'npcs')
+
+    def __init__(self, batch_size: int = 1000, export_chunk_size: int = 500, read_block_size: int = 64 * 1024):
+        self.batch_size = batch_size
+        self.export_chunk_size = export_chunk_size
+        self.read_block_size = read_block_size
+        # Um validador por coleção, aplicado a um lote inteiro de cada vez
+        self._adapters: Dict[str, TypeAdapter] = {
+            'items': TypeAdapter(List[Item]),
+            'resources': TypeAdapter(List[ResourceEntry]),
+            'npcs': TypeAdapter(List[NpcRecord]),
+        }
+        self._defaults: Dict[str, Callable[[dict], dict]] = {
+            'items': _item_defaults,
+            'resources': _resource_defaults,
+            'npcs': _npc_defaults,
+        }
+
+    def read(self, collection: str, stream: BinaryIO) -> list:
+        """
+        Lê (em blocos) e valida um NDJSON em lotes de batch_size linhas. Qualquer linha
+        inválida interrompe a leitura com ValueError (indicando a linha),
+        antes que algo seja aplicado; linhas em branco são ignoradas.
+        """
+        if collection not in self._adapters:
+            raise ValueError(f"Unknown collection: {collection}")
+        adapter, defaults = self._adapters[collection], self._defaults[collection]
+        entities = []
+        batch, line_numbers = [], []
+        for line_number, line in enumerate(_read_lines(stream, self.read_block_size), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ValueError(f"Line {line_number}: invalid JSON")
+            if not isinstance(record, dict):
+                raise ValueError(f"Line {line_number}: expected an object")
+            try:
+                batch.append(defaults(record))
+            except ValueError as e:
+                raise ValueError(f"Line {line_number}: {e}")
+            line_numbers.append(line_number)
+            if len(batch) >= self.batch_size:
+                entities.extend(_validate(adapter, batch, line_numbers))
+                batch, line_numbers = [], []
+        if batch:
+            entities.extend(_validate(adapter, batch, line_numbers))
+        return entities
+
+    def export(self, records: Iterable, encode: Callable[[object], str]) -> Iterator[bytes]:
+        """Gera o NDJSON dos registros em blocos de export_chunk_size linhas, sem montar o arquivo todo"""
+        chunk = []
+        for record in records:
+            chunk.append(encode(record))
+            if len(chunk) >= self.export_chunk_size:
+                yield ('\n'.join(chunk) + '\n').encode('utf-8')
+                chunk = []
+        if chunk:
+            yield ('\n'.join(chunk) + '\n').encode('utf-8')
+
+def _read_lines(stream: BinaryIO, block_size: int) -> Iterator[bytes]:
+    # Ler linha a linha de um stream WSGI custa uma chamada por byte
+    pending = b''
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        lines = (pending + block).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+def _validate(adapter: TypeAdapter, batch: List[dict], line_numbers: List[int]) -> list:
+    try:
+        return adapter.validate_python(batch)
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = '.'.join(str(part) for part in error['loc'][1:])
+        raise ValueError(f"Line {line_numbers[error['loc'][0]]}: {field}: {error['msg']}")
+
+def _new_domain_defaults(record: dict) -> dict:
+    record.setdefault('id', str(uuid.uuid4()))
+    record.setdefault('created_at', datetime.now())
+    return record
+
+def _item_defaults(record: dict) -> dict:
+    if isinstance(record.get('stats'), dict):
+        _new_domain_defaults(record['stats'])
+    return _new_domain_defaults(record)
+
+def _resource_defaults(record: dict) -> dict:
+    harvest, resource = record.get('harvest'), record.get('resource')
+    if isinstance(harvest, dict) and isinstance(resource, dict):
+        _new_domain_defaults(harvest)
+        resource.setdefault('id', harvest['id'])
+        resource.setdefault('name', harvest.get('name'))
+        resource.setdefault('type', harvest.get('type_entity'))
+        if resource['id'] != harvest['id']:
+            raise ValueError(f"Resource id {resource['id']} does not match its harvest id {harvest['id']}")
+    return record
+
+def _npc_defaults(record: dict) -> dict:
+    record.setdefault('id', str(uuid.uuid4()))
+    record.setdefault('max_hp', record.get('hp'))
+    record.setdefault('type', 'enemy')
+    return record
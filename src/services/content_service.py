@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from pydantic import TypeAdapter, ValidationError
+
+from domains.item import Item, ItemType, Rarity
+from domains.entity import Harvest, TypeEntity
+from domains.stats import FrozenStats, STAT_FIELDS
+from repositories.content_pack import ContentPack, write_content_pack
+from services.catalog_service import NpcRecord, ResourceEntry
+
+AREA_PREFIX = 'area:'
+# Ids do conteúdo derivados das definições (uuid5): recompilar o pacote
+# mantém os ids que o estado salvo já referencia
+_CONTENT_NAMESPACE = uuid.UUID('0b9a3f1e-5c7d-4e2a-8f61-2d4c9b7a1e30')
+
+class ContentService:
+    """
+    Conteúdo do mundo (itens do mercado, recursos e NPCs de cada área) lido
+    de um pacote pré-compilado (ver compile_world). Os registros já foram
+    validados na compilação, então são montados sem passar de novo pelo
+    pydantic, e cada área só é lida do pacote na primeira vez que alguém
+    entra nela. Abrir o pacote lê só o índice dele.
+    """
+    def __init__(self, pack_path: str, source_path: Optional[str] = None):
+        # Recompila quando as definições mudaram depois do pacote
+        if source_path is not None and _is_stale(pack_path, source_path):
+            compile_world(source_path, pack_path)
+        self.pack = ContentPack(pack_path)
+        self._loaded = set()
+        self._lock = threading.Lock()
+
+    @property
+    def areas(self) -> List[str]:
+        return [name[len(AREA_PREFIX):] for name in self.pack.sections() if name.startswith(AREA_PREFIX)]
+
+    @property
+    def loaded_areas(self) -> List[str]:
+        return sorted(self._loaded)
+
+    def mark_loaded(self, areas: List[str]) -> None:
+        """Áreas cujo conteúdo já veio de outro lugar (ex.: restaurado de um snapshot)"""
+        with self._lock:
+            self._loaded.update(areas)
+
+    def market_items(self) -> List[Item]:
+        return [_construct_item(data) for data in self.pack.read('market_items')]
+
+    def load_area(self, area: str, apply: Callable[[str, list, list], None]) -> bool:
+        """
+        Na primeira chamada para uma área do pacote, lê os recursos e NPCs
+        dela e os entrega a apply(area, recursos, npcs). Chamadas
+        seguintes (e áreas fora do pacote) retornam False sem custo.
+        """
+        if area in self._loaded or AREA_PREFIX + area not in self.pack:
+            return False
+        with self._lock:
+            if area in self._loaded:
+                return False
+            content = self.pack.read(AREA_PREFIX + area)
+            resources = [
+                {'harvest': _construct_harvest(entry['harvest']), 'resource': entry['resource']}
+                for entry in content['resources']
+            ]
+            apply(area, resources, content['npcs'])
+            self._loaded.add(area)
+        return True
+
+    def reset(self, clear: Callable[[], None]) -> None:
+        """Roda clear() (que limpa o mundo) sem cargas em andamento; as áreas voltam a ser lidas do pacote"""
+        with self._lock:
+            clear()
+            self._loaded.clear()
+
+def compile_world(source_path: str, pack_path: str) -> Dict[str, int]:
+    """
+    Valida as definições do mundo (JSON: market_items e areas com
+    resources e npcs) e grava o pacote. Retorna quantos registros de cada
+    tipo foram compilados.
+    """
+    with open(source_path, encoding='utf-8') as f:
+        world = json.load(f)
+    created_at = datetime.now().isoformat()
+
+    items = []
+    for definition in world.get('market_items', []):
+        items.append(dict(
+            definition,
+            id=definition.get('id') or _content_id('item', definition['name']),
+            created_at=created_at,
+            stats=FrozenStats.intern(**(definition.get('stats') or {}))
+        ))
+    items = _validated(TypeAdapter(List[Item]), items, 'market_items')
+    if len({item.name for item in items}) != len(items):
+        raise ValueError("market_items: duplicate item name")
+    sections = {'market_items': [item.model_dump(mode='json') for item in items]}
+
+    counts = {'market_items': len(items), 'areas': 0, 'resources': 0, 'npcs': 0}
+    for area, definition in world.get('areas', {}).items():
+        resources = []
+        for position, resource in enumerate(definition.get('resources', [])):
+            harvest_id = resource.get('id') or _content_id('harvest', area, position, resource['name'])
+            resources.append({
+                'harvest': {
+                    'id': harvest_id,
+                    'created_at': created_at,
+                    'name': resource['name'],
+                    'description': resource.get(
+                        'description', f"Um recurso que pode ser coletado através de {resource['type_entity']}"
+                    ),
+                    'type_entity': resource['type_entity'],
+                    'drop_amount': resource['drop_amount'],
+                    'respawn_time': resource['respawn_time'],
+                    'hp': resource.get('hp', 10),
+                    'is_collidable': resource.get('is_collidable', True)
+                },
+                'resource': {
+                    'id': harvest_id,
+                    'name': resource['name'],
+                    'type': resource['type_entity'],
+                    'position': {'x': resource.get('x', 0), 'y': resource.get('y', 0)},
+                    'area': area
+                }
+            })
+        npcs = []
+        for position, npc in enumerate(definition.get('npcs', [])):
+            record = {
+                'id': npc.get('id') or _content_id('npc', area, position, npc['name']),
+                'name': npc['name'],
+                'level': npc['level'],
+                'hp': npc['hp'],
+                'max_hp': npc.get('max_hp', npc['hp']),
+                'position': {'x': npc.get('x', 0), 'y': npc.get('y', 0)},
+                'area': area,
+                'type': npc.get('type', 'enemy')
+            }
+            for stat in ('damage', 'armor'):
+                if stat in npc:
+                    record[stat] = npc[stat]
+            npcs.append(record)
+        resources = _validated(TypeAdapter(List[ResourceEntry]), resources, f"{area}.resources")
+        npcs = _validated(TypeAdapter(List[NpcRecord]), npcs, f"{area}.npcs")
+        sections[AREA_PREFIX + area] = {
+            'resources': [
+                {'harvest': entry['harvest'].model_dump(mode='json'), 'resource': entry['resource']}
+                for entry in resources
+            ],
+            'npcs': npcs
+        }
+        counts['areas'] += 1
+        counts['resources'] += len(resources)
+        counts['npcs'] += len(npcs)
+
+    write_content_pack(pack_path, sections)
+    return counts
+
+def _is_stale(pack_path: str, source_path: str) -> bool:
+    if not os.path.exists(pack_path):
+        return True
+    return os.path.getmtime(pack_path) < os.path.getmtime(source_path)
+
+def _content_id(*parts) -> str:
+    return str(uuid.uuid5(_CONTENT_NAMESPACE, '/'.join(str(part) for part in parts)))
+
+def _validated(adapter: TypeAdapter, records: list, section: str) -> list:
+    try:
+        return adapter.validate_python(records)
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise ValueError(f"{section}: {'.'.join(str(part) for part in error['loc'])}: {error['msg']}")
+
+# Montagem sem validação: os registros do pacote já passaram por ela
+
+def _construct_item(data: dict) -> Item:
+    stats = data.get('stats')
+    return Item.model_construct(**dict(
+        data,
+        created_at=datetime.fromisoformat(data['created_at']),
+        item_type=ItemType(data['item_type']),
+        rarity=Rarity(data['rarity']),
+        stats=FrozenStats.intern(**{name: stats[name] for name in STAT_FIELDS}) if stats else None
+    ))
+
+def _construct_harvest(data: dict) -> Harvest:
+    return Harvest.model_construct(**dict(
+        data,
+        created_at=datetime.fromisoformat(data['created_at']),
+        type_entity=TypeEntity(data['type_entity'])
+    ))
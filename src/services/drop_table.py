@@ -0,0 +1,152 @@
+import random
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:  # opcional: sem numpy os sorteios em lote são feitos um a um
+    numpy = None
+
+from domains.item import Item
+
+# A partir de quantos sorteios de uma vez vale a pena ir para o numpy
+BATCH_THRESHOLD = 64
+
+# Saque resolvido: (item, quantidade), um par por item
+Loot = List[Tuple[Item, int]]
+
+class DropEntry:
+    """
+    Uma linha de uma tabela de drops: um item (com quantidade entre
+    min_amount e max_amount), uma tabela aninhada, ou nada (item e table
+    None), com o peso dela no sorteio
+    """
+    __slots__ = ('item', 'table', 'weight', 'min_amount', 'max_amount')
+
+    def __init__(self, item: Optional[Item] = None, weight: float = 1.0, min_amount: int = 1,
+                 max_amount: Optional[int] = None, table: Optional['DropTable'] = None):
+        if item is not None and table is not None:
+            raise ValueError("A drop entry holds an item or a table, not both")
+        max_amount = min_amount if max_amount is None else max_amount
+        if weight < 0 or min_amount < 0 or max_amount < min_amount:
+            raise ValueError("Invalid drop entry weight or amount range")
+        self.item = item
+        self.table = table
+        self.weight = weight
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+
+class DropTable:
+    """
+    Tabela de drops pré-compilada. Cada abate dá todas as entradas de
+    guaranteed e mais rolls sorteios entre entries, com chance
+    proporcional ao peso de cada uma. Os pesos são compilados uma vez em
+    tabelas de alias (Vose), então cada sorteio custa um número aleatório e
+    uma comparação, qualquer que seja o tamanho da tabela. roll() resolve
+    de uma vez o saque de vários abates: os sorteios são contados por
+    entrada e cada item sai como uma única pilha.
+    """
+    def __init__(self, entries: Sequence[DropEntry] = (), rolls: int = 1, guaranteed: Sequence[DropEntry] = ()):
+        self.entries = tuple(entries)
+        self.guaranteed = tuple(guaranteed)
+        self.rolls = rolls if self.entries else 0
+        total = sum(entry.weight for entry in self.entries)
+        if self.entries and total <= 0:
+            raise ValueError("Drop table weights must add up to more than zero")
+        self._probability, self._alias = _alias_table([entry.weight / total for entry in self.entries])
+        self._numpy_tables = None
+
+    @classmethod
+    def from_drop_items(cls, drop_items: Iterable) -> 'DropTable':
+        """Tabela equivalente a uma lista de DropItem: cada um é uma chance independente de 1 a amount unidades"""
+        guaranteed = []
+        for drop_item in drop_items:
+            if drop_item.chance >= 1:
+                guaranteed.append(DropEntry(drop_item.item, min_amount=1, max_amount=drop_item.amount))
+            elif drop_item.chance > 0:
+                chance_table = cls([
+                    DropEntry(drop_item.item, drop_item.chance, 1, drop_item.amount),
+                    DropEntry(None, 1 - drop_item.chance)
+                ])
+                guaranteed.append(DropEntry(table=chance_table))
+        return cls(guaranteed=guaranteed)
+
+    def roll(self, kills: int = 1, rng=random) -> Loot:
+        """
+        Saque de kills abates, somado por item na ordem em que apareceu.
+        rng é um random.Random (ou o próprio módulo random)
+        """
+        loot: Dict[str, List] = {}
+        self._collect(kills, rng, loot)
+        return [(item, amount) for item, amount in loot.values() if amount > 0]
+
+    def _collect(self, kills: int, rng, loot: Dict[str, List]) -> None:
+        for entry in self.guaranteed:
+            _give(entry, kills, rng, loot)
+        picks = kills * self.rolls
+        if not picks:
+            return
+        for entry, count in zip(self.entries, self._pick_counts(picks, rng)):
+            if count:
+                _give(entry, count, rng, loot)
+
+    def _pick_counts(self, picks: int, rng) -> List[int]:
+        """Quantas vezes cada entrada saiu em picks sorteios"""
+        size = len(self.entries)
+        if size == 1:
+            return [picks]
+        if numpy is not None and picks >= BATCH_THRESHOLD:
+            if self._numpy_tables is None:
+                self._numpy_tables = (numpy.array(self._probability), numpy.array(self._alias))
+            probability, alias = self._numpy_tables
+            generator = numpy.random.default_rng(rng.getrandbits(64))
+            draws = generator.random(picks) * size
+            columns = draws.astype(numpy.int64)
+            chosen = numpy.where(draws - columns < probability[columns], columns, alias[columns])
+            return numpy.bincount(chosen, minlength=size).tolist()
+        counts = [0] * size
+        probability, alias = self._probability, self._alias
+        draw = rng.random
+        for _ in range(picks):
+            # Um só número: a parte inteira escolhe a coluna, a fracionária decide entre ela e o alias
+            value = draw() * size
+            column = int(value)
+            counts[column if value - column < probability[column] else alias[column]] += 1
+        return counts
+
+def _give(entry: DropEntry, count: int, rng, loot: Dict[str, List]) -> None:
+    """Soma ao saque count ocorrências da entrada"""
+    if entry.table is not None:
+        entry.table._collect(count, rng, loot)
+        return
+    if entry.item is None:
+        return
+    if entry.min_amount == entry.max_amount:
+        amount = entry.min_amount * count
+    elif numpy is not None and count >= BATCH_THRESHOLD:
+        generator = numpy.random.default_rng(rng.getrandbits(64))
+        amount = int(generator.integers(entry.min_amount, entry.max_amount + 1, count).sum())
+    else:
+        amount = sum(rng.randint(entry.min_amount, entry.max_amount) for _ in range(count))
+    stack = loot.get(entry.item.id)
+    if stack is None:
+        loot[entry.item.id] = [entry.item, amount]
+    else:
+        stack[1] += amount
+
+def _alias_table(probabilities: List[float]) -> Tuple[List[float], List[int]]:
+    # Vose: cada coluna guarda a chance de ficar com ela mesma e com quem divide o resto
+    size = len(probabilities)
+    probability = [0.0] * size
+    alias = list(range(size))
+    scaled = [p * size for p in probabilities]
+    small = [index for index, value in enumerate(scaled) if value < 1]
+    large = [index for index, value in enumerate(scaled) if value >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        probability[less] = scaled[less]
+        alias[less] = more
+        scaled[more] = scaled[more] + scaled[less] - 1
+        (small if scaled[more] < 1 else large).append(more)
+    for index in small + large:
+        probability[index] = 1.0
+    return probability, alias
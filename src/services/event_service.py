@@ -0,0 +1,102 @@
+import asyncio
+import queue
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+class Subscription(ABC):
+    """
+    Assinatura de um cliente em um conjunto de tópicos. Recebe os eventos
+    já codificados (bytes); um cliente lento demais para acompanhar é
+    marcado como atrasado e deve reconectar e buscar o estado completo.
+    """
+    def __init__(self, topics: Iterable[str], max_pending: int = 256):
+        self.topics = tuple(topics)
+        self.max_pending = max_pending
+        self.lagged = False
+
+    @abstractmethod
+    def push(self, frame: bytes) -> None:
+        """Entrega um evento; não pode bloquear quem publica"""
+
+class QueueSubscription(Subscription):
+    """Assinatura lida por uma thread (servidor WSGI)"""
+    def __init__(self, topics: Iterable[str], max_pending: int = 256):
+        super().__init__(topics, max_pending)
+        self.queue = queue.Queue(max_pending)
+
+    def push(self, frame: bytes) -> None:
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            self.lagged = True
+
+    def get(self, timeout: float) -> Optional[bytes]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class AsyncSubscription(Subscription):
+    """Assinatura lida por uma corrotina no event loop (servidor ASGI)"""
+    def __init__(self, topics: Iterable[str], loop: asyncio.AbstractEventLoop, max_pending: int = 256):
+        super().__init__(topics, max_pending)
+        self.loop = loop
+        self.queue = asyncio.Queue(max_pending)
+
+    def push(self, frame: bytes) -> None:
+        # Só roda dentro do loop (ver EventHub.publish)
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+class EventHub:
+    """
+    Distribui eventos por tópico (ex.: uma área do mapa ou um jogador).
+    Cada evento é codificado uma vez só pelo publicador; para assinantes
+    em um event loop, uma única chamada thread-safe por loop entrega o
+    evento a todos eles, então publicar para milhares de assinantes de
+    uma área custa uma troca de thread e um put por assinante.
+    """
+    def __init__(self):
+        self._topics: Dict[str, Dict[Subscription, None]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscription: Subscription) -> Subscription:
+        with self._lock:
+            for topic in subscription.topics:
+                self._topics.setdefault(topic, {})[subscription] = None
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is None:
+                    continue
+                subscribers.pop(subscription, None)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._topics
+
+    def publish(self, topic: str, frame: bytes) -> int:
+        """Entrega um evento já codificado aos assinantes do tópico; retorna quantos eram"""
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        by_loop: Dict[asyncio.AbstractEventLoop, List[AsyncSubscription]] = {}
+        for subscription in subscribers:
+            if isinstance(subscription, AsyncSubscription):
+                by_loop.setdefault(subscription.loop, []).append(subscription)
+            else:
+                subscription.push(frame)
+        for loop, loop_subscribers in by_loop.items():
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_deliver, loop_subscribers, frame)
+        return len(subscribers)
+
+def _deliver(subscribers: List[AsyncSubscription], frame: bytes) -> None:
+    for subscription in subscribers:
+        subscription.push(frame)
@@ -4,63 +4,64 @@ from datetime import datetime
 from domains.player import Player
 from domains.npc import NPC, DropItem
 from services.player_service import PlayerService
+from services.battle_log import BattleLog, BattleVerbosity
+from services.drop_table import DropTable
 from repositories.player_repository import PlayerRepository
 
 class GameService:
     def __init__(self, player_service: PlayerService):
         self.player_service = player_service
         
-    def battle(self, player: Player, npc: NPC) -> (bool, list):
+    def battle(self, player: Player, npc: NPC, verbosity: BattleVerbosity = BattleVerbosity.FULL,
+               rng=random) -> (bool, BattleLog, list):
         """
         Simula uma batalha entre o jogador e um NPC.
-        Retorna uma tupla com (vitória, recompensas)
+        Retorna uma tupla com (vitória, log, recompensas); o log guarda
+        eventos até o nível verbosity e vira texto com render(). Todos os
+        sorteios (críticos e drops) saem de rng (ver RngService)
         """
         player_hp = player.hp
         npc_hp = npc.hp
         
-        battle_log = []
-        battle_log.append(f"Batalha iniciada: {player.username} vs {npc.name}")
-        
         # Calculando dano do jogador e do NPC
         player_damage = player.stats.physical_power - int(npc.stats.armor * 0.5)
         player_damage = max(1, player_damage)  # Garantir dano mínimo
+        critical_damage = int(player_damage * player.stats.critical_power)
         
         npc_damage = npc.stats.physical_power - int(player.stats.armor * 0.5)
         npc_damage = max(1, npc_damage)  # Garantir dano mínimo
         
+        battle_log = BattleLog(
+            player.username, npc.name, player_hp, npc_hp, player_damage, critical_damage, npc_damage, verbosity
+        )
+        criticals = battle_log.criticals
+        
         # Simulação de turnos
         turn = 0
+        critical_hits = 0
         while player_hp > 0 and npc_hp > 0:
             turn += 1
-            battle_log.append(f"Turno {turn}")
             
             # Turno do jogador
-            crit_chance = random.random() < player.stats.critical_chance
+            crit_chance = rng.random() < player.stats.critical_chance
             actual_damage = player_damage
             
             if crit_chance:
-                actual_damage = int(player_damage * player.stats.critical_power)
-                battle_log.append(f"{player.username} causou um golpe crítico de {actual_damage} de dano!")
-            else:
-                battle_log.append(f"{player.username} causou {actual_damage} de dano.")
+                actual_damage = critical_damage
+                critical_hits += 1
+                if criticals is not None:
+                    criticals[turn - 1] = 1
             
             npc_hp -= actual_damage
             
             # Verificar se o NPC foi derrotado
             if npc_hp <= 0:
-                battle_log.append(f"{npc.name} foi derrotado!")
                 break
                 
             # Turno do NPC
-            battle_log.append(f"{npc.name} causou {npc_damage} de dano.")
             player_hp -= npc_damage
-            
-            # Verificar se o jogador foi derrotado
-            if player_hp <= 0:
-                battle_log.append(f"{player.username} foi derrotado!")
-                break
-                
-            battle_log.append(f"Status: {player.username} HP: {player_hp} | {npc.name} HP: {npc_hp}")
+        
+        battle_log.finish(turn, critical_hits, player_hp, npc_hp)
         
         # Determinar resultado e recompensas
         victory = player_hp > 0
@@ -77,18 +78,20 @@ class GameService:
             player.gold += gold_reward
             rewards.append(f"Gold: {gold_reward}")
             
-            # Drops baseados em chance
-            for drop_item in npc.drop_items:
-                if random.random() < drop_item.chance:
-                    actual_amount = random.randint(1, drop_item.amount)
-                    for _ in range(actual_amount):
-                        try:
-                            self.player_service.add_item_to_inventory(player, drop_item.item)
-                            rewards.append(f"Item: {drop_item.item.name}")
-                        except ValueError:
-                            # Inventário cheio
-                            battle_log.append("Seu inventário está cheio!")
-                            break
+            # Drops: o saque todo sai de um sorteio da tabela e entra no inventário de uma vez
+            drop_table = getattr(npc, 'drop_table', None) or DropTable.from_drop_items(npc.drop_items)
+            loot = drop_table.roll(rng=rng)
+            rejected = self.player_service.add_items_to_inventory(player, loot)
+            # Inventário cheio
+            battle_log.inventory_full += len(rejected)
+            rejected_ids = {item.id for item, _ in rejected}
+            for item, actual_amount in loot:
+                if item.id in rejected_ids:
+                    continue
+                if actual_amount > 1:
+                    rewards.append(f"Item: {item.name} x{actual_amount}")
+                else:
+                    rewards.append(f"Item: {item.name}")
         
         # Atualizar HP do jogador
         player.hp = max(1, player_hp) if victory else 1  # Se derrotado, fica com 1 HP
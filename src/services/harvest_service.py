@@ -1,15 +1,33 @@
 import uuid
 import random
+import threading
 from datetime import datetime
+from typing import Callable, Optional
 from domains.entity import Harvest, TypeEntity
 from domains.player import Player
 from domains.item import Item, ItemType, Rarity
 from services.player_service import PlayerService
+from repositories.item_repository import ItemRepository
+from services.session_service import StripedLock
+
+# Ids dos modelos de recurso derivados do tipo e do nome: o mesmo recurso
+# tem sempre o mesmo id, então as pilhas continuam valendo depois de um reset
+_RESOURCE_NAMESPACE = uuid.UUID('3c7e9a52-1f84-4d6b-b2a0-8e5f4c1d7a93')
+
+def resource_template_id(name: str, type_entity: TypeEntity) -> str:
+    return str(uuid.uuid5(_RESOURCE_NAMESPACE, f"{type_entity.value}/{name}"))
 
 class HarvestService:
-    def __init__(self, player_service: PlayerService):
+    def __init__(self, player_service: PlayerService, item_repository: ItemRepository,
+                 on_new_resource: Optional[Callable[[Item], None]] = None):
         self.player_service = player_service
+        self.item_repository = item_repository
+        # Avisado de cada modelo de recurso criado (ex.: para registrá-lo no log de estado)
+        self.on_new_resource = on_new_resource
         self.active_harvests = {}  # id: (harvest, respawn_time)
+        # Um recurso é colhido por um jogador de cada vez
+        self.harvest_locks = StripedLock()
+        self._resource_lock = threading.Lock()
         
     def register_harvest(self, harvest: Harvest) -> Harvest:
         """Registra um novo objeto de colheita no mundo"""
@@ -17,9 +35,27 @@ class HarvestService:
         return harvest
         
     def create_resource(self, name: str, type_entity: TypeEntity) -> Item:
-        """Cria um novo item de recurso baseado no tipo de entidade"""
+        """Retorna o modelo de item do recurso, criando-o na primeira coleta"""
+        template_id = resource_template_id(name, type_entity)
+        existing = self.item_repository.find_by_id(template_id)
+        if existing is not None:
+            return existing
+        with self._resource_lock:
+            existing = self.item_repository.find_by_id(template_id)
+            if existing is not None:
+                return existing
+            # Modelos criados antes dos ids estáveis são achados pelo nome
+            legacy = self.item_repository.find_where(name=name, item_type=ItemType.RESOURCE)
+            if legacy:
+                return legacy[0]
+            item = self._new_resource(template_id, name, type_entity)
+            if self.on_new_resource is not None:
+                self.on_new_resource(item)
+            return item
+        
+    def _new_resource(self, template_id: str, name: str, type_entity: TypeEntity) -> Item:
         item = Item(
-            id=str(uuid.uuid4()),
+            id=template_id,
             created_at=datetime.now(),
             name=f"{name}",
             description=f"Um recurso obtido por {type_entity.value}",
@@ -33,13 +69,17 @@ class HarvestService:
             is_boostable=False,
             stats=None
         )
-        return item
+        return self.item_repository.save(item)
         
-    def harvest_resource(self, player: Player, harvest_id: str) -> (bool, str, list):
+    def harvest_resource(self, player: Player, harvest_id: str, rng=random) -> (bool, str, list):
         """
-        Tenta colher um recurso de uma entidade de colheita
+        Tenta colher um recurso de uma entidade de colheita, sorteando com rng
         Retorna (sucesso, mensagem, itens)
         """
+        with self.harvest_locks(harvest_id):
+            return self._harvest_locked(player, harvest_id, rng)
+        
+    def _harvest_locked(self, player: Player, harvest_id: str, rng) -> (bool, str, list):
         if harvest_id not in self.active_harvests:
             return False, "Esse recurso não existe ou já foi colhido", []
             
@@ -55,7 +95,7 @@ class HarvestService:
         
         # Calcular chance de sucesso baseada na habilidade
         success_chance = min(0.3 + (player_skill_level * 0.05), 0.95)
-        success = random.random() < success_chance
+        success = rng.random() < success_chance
         
         if not success:
             # Aumentar um pouco a habilidade mesmo com falha
@@ -63,20 +103,17 @@ class HarvestService:
             setattr(player.life_skills, required_skill, player_skill_level + skill_increase)
             return False, f"Você falhou ao tentar coletar {harvest.name}", []
             
-        # Sucesso na coleta
-        items_collected = []
-        drop_amount = random.randint(1, harvest.drop_amount)
-        
-        for _ in range(drop_amount):
-            resource_item = self.create_resource(harvest.name, harvest.type_entity)
-            try:
-                self.player_service.add_item_to_inventory(player, resource_item)
-                items_collected.append(resource_item)
-            except ValueError:
-                return True, "Seu inventário está cheio!", items_collected
+        # Sucesso na coleta: todas as unidades entram na mesma pilha
+        drop_amount = rng.randint(1, harvest.drop_amount)
+        resource_item = self.create_resource(harvest.name, harvest.type_entity)
+        try:
+            stack = self.player_service.add_item_to_inventory(player, resource_item, drop_amount)
+        except ValueError:
+            return True, "Seu inventário está cheio!", []
+        items_collected = [stack]
         
         # Aumentar a habilidade do jogador
-        skill_increase = 0.1 + (random.random() * 0.1)
+        skill_increase = 0.1 + (rng.random() * 0.1)
         new_skill_level = player_skill_level + skill_increase
         setattr(player.life_skills, required_skill, new_skill_level)
         
@@ -85,9 +122,20 @@ class HarvestService:
         
         return True, f"Você coletou {drop_amount} {harvest.name}(s)! (Habilidade de {required_skill}: {new_skill_level:.2f})", items_collected
         
-    def update_respawn_timers(self, seconds: int):
-        """Atualiza os timers de respawn das entidades de colheita"""
+    def update_respawn_timers(self, seconds: int) -> list:
+        """
+        Atualiza os timers de respawn das entidades de colheita
+        Retorna os ids das que voltaram a ficar disponíveis
+        """
+        respawned = []
         for harvest_id, (harvest, timer) in list(self.active_harvests.items()):
             if timer > 0:
-                new_timer = max(0, timer - seconds)
-                self.active_harvests[harvest_id] = (harvest, new_timer) 
\ No newline at end of file
+                with self.harvest_locks(harvest_id):
+                    if harvest_id not in self.active_harvests:
+                        continue
+                    harvest, timer = self.active_harvests[harvest_id]
+                    new_timer = max(0, timer - seconds)
+                    self.active_harvests[harvest_id] = (harvest, new_timer)
+                if new_timer == 0:
+                    respawned.append(harvest_id)
+        return respawned
\ No newline at end of file
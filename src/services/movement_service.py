@@ -0,0 +1,72 @@
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+class MovementService:
+    """
+    Coalesce as posições enviadas pelos clientes. Cada envio (uma posição
+    ou um lote com timestamps) só atualiza a última posição conhecida do
+    jogador; a gravação e a notificação acontecem uma vez por tick do
+    mundo, com a posição mais recente, não uma vez por requisição.
+    """
+    def __init__(self, max_batch_size: int = 256):
+        self.max_batch_size = max_batch_size
+        # player id -> (x, y, area, timestamp) ainda não gravado
+        self._pending: Dict[str, Tuple[int, int, str, float]] = {}
+        # player id -> timestamp da última posição aceita
+        self._last_timestamp: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, player_id: str, area: str, positions: List[dict]) -> Optional[Tuple[int, int, str, float]]:
+        """
+        Recebe posições {'x', 'y', 't'} em qualquer ordem e guarda a mais
+        recente, se for mais nova que a última aceita (lotes atrasados ou
+        repetidos são ignorados). Retorna a posição aceita ou None.
+
+        Os timestamps são sempre os do cliente. Uma posição sem 't' é a mais
+        recente: recebe o instante logo depois da última aceita, então um
+        cliente que mistura os dois tipos de envio não tem movimentos
+        descartados por comparar relógios diferentes. Coordenadas ou
+        timestamps que não são números finitos levantam ValueError ou
+        TypeError.
+        """
+        if not positions:
+            return None
+        if len(positions) > self.max_batch_size:
+            raise ValueError(f"Too many positions in one batch (max {self.max_batch_size})")
+        latest = max(positions, key=_timestamp)
+        x, y = _coordinate(latest['x']), _coordinate(latest['y'])
+        with self._lock:
+            last = self._last_timestamp.get(player_id)
+            if 't' in latest:
+                timestamp = _timestamp(latest)
+                if last is not None and timestamp <= last:
+                    return None
+            else:
+                timestamp = last + 1 if last is not None else 0.0
+            move = (x, y, area, timestamp)
+            self._last_timestamp[player_id] = timestamp
+            self._pending[player_id] = move
+        return move
+
+    def drain(self) -> Dict[str, Tuple[int, int, str, float]]:
+        """Retorna e esquece as posições pendentes (uma por jogador)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+def _timestamp(position: dict) -> float:
+    # Sem 't', a posição é a mais recente do lote
+    if 't' not in position:
+        return math.inf
+    timestamp = float(position['t'])
+    # "inf" ou "nan" congelariam a base de tempo do jogador
+    if not math.isfinite(timestamp):
+        raise ValueError("Invalid timestamp")
+    return timestamp
+
+def _coordinate(value) -> int:
+    try:
+        return int(value)
+    except OverflowError:
+        raise ValueError("Invalid coordinate") from None
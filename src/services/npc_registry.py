@@ -0,0 +1,149 @@
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from domains.item import Item
+from domains.npc import NPC, DropItem
+from domains.stats import FrozenStats
+from services.drop_table import DropTable
+
+# Ids dos templates derivados da definição: o mesmo NPC gera o mesmo template
+_TEMPLATE_NAMESPACE = uuid.UUID('6f1d2c84-93a5-4b7e-a0c2-5e8d17b4f936')
+
+def npc_template_key(record: dict) -> Tuple:
+    """O que define um tipo de NPC; o resto do registro (id, posição, área) é da instância"""
+    return (record['name'], record['level'], record['max_hp'], record.get('damage'), record.get('armor'))
+
+def npc_stats(record: dict) -> FrozenStats:
+    """
+    Atributos de combate de um NPC. damage e armor vêm da definição; NPCs
+    sem eles (conteúdo antigo) usam os valores derivados do nível
+    """
+    level = record['level']
+    damage = record.get('damage')
+    armor = record.get('armor')
+    return FrozenStats.intern(
+        strength=level * 2,
+        intelligence=level,
+        dexterity=int(level * 1.5),
+        constitution=level * 2,
+        health=record['max_hp'],
+        mana=level * 10,
+        physical_power=level * 2 if damage is None else damage,
+        magic_resistance=level,
+        speed=level,
+        magic_power=level,
+        armor=level if armor is None else armor,
+        critical_chance=0.03,
+        critical_power=1.3,
+        luck=1.0
+    )
+
+class NpcEncounter:
+    """
+    Um NPC do mundo numa batalha: só o estado da instância (id, HP atual e
+    posição); nome, nível, atributos e drops são lidos do template
+    """
+    __slots__ = ('template', 'drop_table', 'id', 'hp', 'x', 'y')
+
+    def __init__(self, template: NPC, drop_table: DropTable, npc_id: str, hp: int, x: int, y: int):
+        self.template = template
+        self.drop_table = drop_table
+        self.id = npc_id
+        self.hp = hp
+        self.x = x
+        self.y = y
+
+    @property
+    def name(self) -> str:
+        return self.template.name
+
+    @property
+    def description(self) -> str:
+        return self.template.description
+
+    @property
+    def level(self) -> int:
+        return self.template.level
+
+    @property
+    def max_hp(self) -> int:
+        return self.template.max_hp
+
+    @property
+    def stats(self) -> FrozenStats:
+        return self.template.stats
+
+    @property
+    def drop_items(self) -> list:
+        return self.template.drop_items
+
+class NpcRegistry:
+    """
+    Templates de NPC validados, um por tipo (ver npc_template_key), criados
+    na primeira vez que o tipo aparece e reaproveitados por todos os NPCs
+    do mundo com a mesma definição, junto com a tabela de drops compilada
+    dele. Cada encontro só monta um NpcEncounter.
+    """
+    def __init__(self, drop_item: Callable[[], Optional[Item]]):
+        # Item que os NPCs podem deixar cair (lido ao criar cada template)
+        self.drop_item = drop_item
+        self._templates: Dict[Tuple, NPC] = {}
+        # template id -> tabela de drops compilada
+        self._drop_tables: Dict[str, DropTable] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def template(self, record: dict) -> NPC:
+        key = npc_template_key(record)
+        template = self._templates.get(key)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(key)
+                if template is None:
+                    template = self._build(key, record)
+                    self._drop_tables[template.id] = DropTable.from_drop_items(template.drop_items)
+                    self._templates[key] = template
+        return template
+
+    def register(self, records) -> None:
+        """Cria de antemão os templates dos registros (ex.: ao carregar uma área)"""
+        for record in records:
+            self.template(record)
+
+    def encounter(self, record: dict) -> NpcEncounter:
+        template = self.template(record)
+        return NpcEncounter(
+            template, self._drop_tables[template.id], record['id'], record['hp'],
+            record['position']['x'], record['position']['y']
+        )
+
+    def clear(self) -> None:
+        """Esquece os templates (o item de drop deles pode não existir mais)"""
+        with self._lock:
+            self._templates.clear()
+            self._drop_tables.clear()
+
+    def _build(self, key: Tuple, record: dict) -> NPC:
+        template_id = str(uuid.uuid5(_TEMPLATE_NAMESPACE, repr(key)))
+        created_at = datetime.now()
+        item = self.drop_item()
+        drop_items = []
+        if item is not None:
+            drop_items.append(DropItem(id=template_id, created_at=created_at, item=item, chance=0.5, amount=1))
+        return NPC(
+            id=template_id,
+            created_at=created_at,
+            name=record['name'],
+            description=f"Um {record['name']} hostil",
+            stats=npc_stats(record),
+            x=0,
+            y=0,
+            hp=record['max_hp'],
+            max_hp=record['max_hp'],
+            level=record['level'],
+            drop_items=drop_items
+        )
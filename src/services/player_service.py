@@ -1,17 +1,25 @@
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Tuple
 from domains.player import Player
-from domains.item import Item
-from domains.stats import Stats
-from domains.life_skill import LifeSkill
+from domains.item import Item, ItemInstance
+from domains.stats import Stats, StatsRecord
+from domains.life_skill import LifeSkill, LifeSkillRecord
+from domains.columnar import ColumnTable, CompactRecord
 from repositories.player_repository import PlayerRepository
 
 class PlayerService:
-    def __init__(self, player_repository: PlayerRepository):
+    def __init__(self, player_repository: PlayerRepository, compact_stats: bool = False):
         self.player_repository = player_repository
+        # Compact mode keeps every player's stats and life skills in shared
+        # column tables, so bulk passes can run over whole columns
+        self.stats_table = ColumnTable(StatsRecord) if compact_stats else None
+        self.life_skill_table = ColumnTable(LifeSkillRecord) if compact_stats else None
     
     def create_player(self, account_id: str, username: str) -> Player:
+        if self.player_repository.find_by_username(username):
+            raise ValueError("Username already taken")
+        
         stats = Stats(
             id=str(uuid.uuid4()),
             created_at=datetime.now(),
@@ -55,6 +63,7 @@ class PlayerService:
             y=0,
             hp=100,
             max_hp=100,
+            max_mana=100,
             level=1,
             exp=0,
             next_level_exp=100,
@@ -62,19 +71,125 @@ class PlayerService:
             inventory_size=20,
             attribute_points=0
         )
+        self.compact(player)
         
         return self.player_repository.save(player)
     
-    def add_item_to_inventory(self, player: Player, item: Item) -> Player:
-        if len(player.inventory) >= player.inventory_size:
+    def compact(self, player: Player) -> Player:
+        """Moves the player's stats and life skills into the column tables (compact mode only)"""
+        if self.stats_table is None:
+            return player
+        if not isinstance(player.stats, CompactRecord):
+            self._swap(player, 'stats', self.stats_table.store(player.stats))
+        if not isinstance(player.life_skills, CompactRecord):
+            self._swap(player, 'life_skills', self.life_skill_table.store(player.life_skills))
+        return player
+    
+    def release(self, player: Player) -> None:
+        """Frees the column slots of a player that was replaced or removed (compact mode only)"""
+        for field, table in (('stats', self.stats_table), ('life_skills', self.life_skill_table)):
+            record = player.__dict__.get(field)
+            if table is not None and isinstance(record, CompactRecord) and record._table is table:
+                table.release(record)
+    
+    def regenerate_mana(self, gains: List[Tuple[Player, int, int]]) -> List[Player]:
+        """
+        Adds each (player, amount, cap) amount to the player's mana, never
+        past cap. In compact mode the whole batch is one add and one clamp
+        over the mana column. Returns the players whose mana changed.
+        """
+        gains = [(player, amount, cap) for player, amount, cap in gains if min(player.stats.mana + amount, cap) != player.stats.mana]
+        if not gains:
+            return []
+        if self.stats_table is not None and all(
+            isinstance(player.stats, CompactRecord) and player.stats._table is self.stats_table for player, _, _ in gains
+        ):
+            slots = [player.stats._slot for player, _, _ in gains]
+            self.stats_table.add('mana', [amount for _, amount, _ in gains], slots)
+            self.stats_table.clamp('mana', high=[cap for _, _, cap in gains], slots=slots)
+        else:
+            for player, amount, cap in gains:
+                player.stats.mana = min(player.stats.mana + amount, cap)
+        return [player for player, _, _ in gains]
+    
+    def _swap(self, player: Player, field: str, record: CompactRecord) -> None:
+        # Same values in another representation: not a change worth persisting
+        player.__dict__[field] = record
+    
+    def add_item_to_inventory(self, player: Player, item: Item, quantity: int = 1) -> ItemInstance:
+        """
+        Adds quantity units of a template to the inventory. Stackable items
+        join the existing stack of the same template; other items take one
+        slot per unit. Returns the instance that received the units.
+        """
+        instance = self._place_in_inventory(player, item, quantity)
+        self.player_repository.save(player)
+        return instance
+    
+    def add_items_to_inventory(self, player: Player, items: List[Tuple[Item, int]]) -> List[Tuple[Item, int]]:
+        """
+        Adds several (template, quantity) pairs, e.g. a resolved loot, with
+        a single save. Each pair goes in whole or not at all; returns the
+        pairs that did not fit.
+        """
+        rejected = []
+        for item, quantity in items:
+            try:
+                self._place_in_inventory(player, item, quantity)
+            except ValueError:
+                rejected.append((item, quantity))
+        if len(rejected) < len(items):
+            self.player_repository.save(player)
+        return rejected
+    
+    def _place_in_inventory(self, player: Player, item: Item, quantity: int) -> ItemInstance:
+        if item.is_stackable:
+            stack = player.inventory.find_stack(item.id)
+            if stack:
+                stack.quantity += quantity
+                return stack
+            slots_needed = 1
+        else:
+            slots_needed = quantity
+        
+        if not player.inventory.has_room(slots_needed):
             raise ValueError("Inventory is full")
         
-        player.inventory.append(item)
-        return self.player_repository.save(player)
+        if item.is_stackable:
+            instances = [self._new_instance(item, quantity)]
+        else:
+            instances = [self._new_instance(item, 1) for _ in range(quantity)]
+        for instance in instances:
+            player.inventory.add(instance)
+        return instances[-1]
+    
+    def remove_item_from_inventory(self, player: Player, item_id: str, quantity: int = 1) -> ItemInstance:
+        """Takes units from an inventory instance, dropping it once empty"""
+        instance = player.inventory.get(item_id)
+        
+        if not instance:
+            raise ValueError("Item not found in inventory")
+        
+        if instance.quantity < quantity:
+            raise ValueError("Not enough items")
+        
+        instance.quantity -= quantity
+        if instance.quantity == 0:
+            player.inventory.remove(item_id)
+        self.player_repository.save(player)
+        return instance
+    
+    def _new_instance(self, item: Item, quantity: int) -> ItemInstance:
+        return ItemInstance.of(
+            item,
+            id=str(uuid.uuid4()),
+            created_at=datetime.now(),
+            quantity=quantity
+        )
     
     def equip_item(self, player: Player, item_id: str) -> Player:
         # Find the item in the inventory
-        item_to_equip = next((item for item in player.inventory if item.id == item_id), None)
+        item_to_equip = player.inventory.get(item_id)
         
         if not item_to_equip:
             raise ValueError("Item not found in inventory")
@@ -82,11 +197,8 @@ class PlayerService:
         if not item_to_equip.is_equippable:
             raise ValueError("Item cannot be equipped")
         
-        # Add to equipment
-        player.equipment.append(item_to_equip)
-        
-        # Remove from inventory
-        player.inventory = [item for item in player.inventory if item.id != item_id]
+        # Move from inventory to equipment
+        player.inventory.move_to(player.equipment, item_id)
         
         return self.player_repository.save(player)
     
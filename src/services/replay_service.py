@@ -0,0 +1,120 @@
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Campos que mudam de uma execução para outra mesmo com a mesma semente:
+# ids gerados com uuid4, tokens e revisões do jogador (ver PlayerRevisions)
+# são traduzidos, datas são ignoradas
+ID_KEYS = ('id', 'token', 'session_token', 'player_revision', 'revision', 'base')
+IGNORED_KEYS = ('created_at',)
+# Cabeçalhos que mudam o resultado de uma requisição
+REPLAY_HEADERS = ('X-Session-Token', 'X-Player-Revision')
+
+def is_id_key(key: str) -> bool:
+    return key in ID_KEYS or key.endswith('_id')
+
+class SessionRecorder:
+    """
+    Grava uma sessão em NDJSON: uma linha de cabeçalho com a semente do
+    RngService e uma linha por requisição (método, caminho, query,
+    cabeçalhos de REPLAY_HEADERS, corpo JSON e a resposta JSON) ou por tick
+    do mundo ({"tick": segundos}), na ordem em que terminaram
+    """
+    def __init__(self, path: str, seed: int):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._write({'seed': seed})
+
+    def record(self, method: str, path: str, query: str, headers: Dict[str, str], body: Any, response: Any) -> None:
+        self._write({
+            'method': method,
+            'path': path,
+            'query': query,
+            'headers': headers,
+            'body': body,
+            'response': response
+        })
+
+    def record_tick(self, seconds: int) -> None:
+        self._write({'tick': seconds})
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def _write(self, entry: dict) -> None:
+        line = json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n'
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                self._file.flush()
+
+def read_session(path: str) -> Tuple[int, Iterator[dict]]:
+    """(semente, requisições) de uma sessão gravada"""
+    f = open(path, encoding='utf-8')
+    header = json.loads(f.readline())
+
+    def entries():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    return header['seed'], entries()
+
+class SessionReplayer:
+    """
+    Compara as respostas de uma reexecução com as gravadas. Ids e tokens
+    novos (uuid4) são aprendidos na primeira vez que aparecem na mesma
+    posição das duas respostas e traduzidos nas requisições seguintes;
+    qualquer outra diferença é uma divergência.
+    """
+    def __init__(self):
+        # valor gravado -> valor desta execução
+        self.ids: Dict[str, str] = {}
+
+    def translate(self, value: Any) -> Any:
+        """Requisição gravada com os ids desta execução"""
+        if isinstance(value, str):
+            return self.ids.get(value, value)
+        if isinstance(value, list):
+            return [self.translate(element) for element in value]
+        if isinstance(value, dict):
+            return {key: self.translate(element) for key, element in value.items()}
+        return value
+
+    def compare(self, recorded: Any, live: Any, path: str = '') -> List[str]:
+        """Divergências entre a resposta gravada e a desta execução (vazia se idênticas)"""
+        if isinstance(recorded, dict) and isinstance(live, dict):
+            differences = []
+            for key in recorded.keys() | live.keys():
+                if key in IGNORED_KEYS:
+                    continue
+                if key not in recorded or key not in live:
+                    differences.append(f"{path}.{key}: only in {'recording' if key in recorded else 'replay'}")
+                elif is_id_key(key) and isinstance(recorded[key], (str, int)) and isinstance(live[key], (str, int)):
+                    differences.extend(self._match_id(recorded[key], live[key], f"{path}.{key}"))
+                else:
+                    differences.extend(self.compare(recorded[key], live[key], f"{path}.{key}"))
+            return differences
+        if isinstance(recorded, list) and isinstance(live, list):
+            if len(recorded) != len(live):
+                return [f"{path}: {len(recorded)} elements recorded, {len(live)} replayed"]
+            differences = []
+            for index, (recorded_element, live_element) in enumerate(zip(recorded, live)):
+                differences.extend(self.compare(recorded_element, live_element, f"{path}[{index}]"))
+            return differences
+        if recorded != live:
+            return [f"{path}: recorded {recorded!r}, replayed {live!r}"]
+        return []
+
+    def _match_id(self, recorded, live, path: str) -> List[str]:
+        known = self.ids.get(recorded)
+        if known is None:
+            self.ids[recorded] = live
+            # Cabeçalhos levam o valor como texto
+            self.ids[str(recorded)] = str(live)
+            return []
+        if known != live:
+            return [f"{path}: recorded id {recorded} maps to {known}, replayed {live}"]
+        return []
@@ -0,0 +1,39 @@
+import hashlib
+import random
+import secrets
+import threading
+from typing import Dict, Optional, Tuple
+
+class RngService:
+    """
+    Números aleatórios reproduzíveis. Cada encontro (uma batalha, uma
+    coleta, uma forja) recebe um fluxo próprio, cuja semente deriva da
+    semente mestre, do escopo, da entidade e de quantos encontros a
+    entidade já teve nesse escopo. Assim o resultado de um jogador não
+    depende da ordem em que as requisições dos outros chegam, e com a mesma
+    semente mestre a mesma sequência de requisições dá os mesmos resultados.
+    """
+    def __init__(self, seed: Optional[int] = None):
+        # Sem semente configurada cada execução sorteia a sua
+        self.seed = seed if seed is not None else secrets.randbits(64)
+        # (escopo, entidade) -> encontros já iniciados
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def stream(self, scope: str, entity: str) -> random.Random:
+        """Fluxo do próximo encontro da entidade no escopo"""
+        key = (scope, entity)
+        with self._lock:
+            encounter = self._counters.get(key, 0)
+            self._counters[key] = encounter + 1
+        return random.Random(self.derive(scope, entity, encounter))
+
+    def derive(self, *parts) -> int:
+        """Semente de 64 bits para as partes dadas, estável entre execuções e versões do Python"""
+        material = '/'.join(str(part) for part in (self.seed, *parts)).encode('utf-8')
+        return int.from_bytes(hashlib.blake2b(material, digest_size=8).digest(), 'big')
+
+    def reset(self) -> None:
+        """Volta todas as entidades ao primeiro encontro (ex.: ao reiniciar o jogo)"""
+        with self._lock:
+            self._counters.clear()
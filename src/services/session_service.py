@@ -0,0 +1,57 @@
+import secrets
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class Session:
+    """Sessão de um cliente: o jogador que ela controla e o lock que serializa as requisições dele"""
+    __slots__ = ('token', 'player_id', 'lock', 'last_regen_time')
+
+    def __init__(self, token: str, player_id: str, lock: threading.RLock):
+        self.token = token
+        self.player_id = player_id
+        self.lock = lock
+        self.last_regen_time = datetime.now()  # Para regeneração de vida/mana
+
+class StripedLock:
+    """
+    Conjunto fixo de locks para o estado compartilhado do mundo. Cada chave
+    (ex.: o id de um recurso) usa sempre o mesmo lock, então chaves
+    diferentes raramente disputam o mesmo lock e nenhum lock é criado por chave.
+    """
+    def __init__(self, stripes: int = 16):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def __call__(self, key) -> threading.RLock:
+        return self._locks[hash(key) % len(self._locks)]
+
+class SessionService:
+    """
+    Registro de sessões: token -> jogador. Todas as sessões de um mesmo
+    jogador compartilham um lock, então requisições de jogadores diferentes
+    rodam em paralelo e as de um mesmo jogador, uma de cada vez.
+    """
+    def __init__(self):
+        self._sessions: Dict[str, Session] = {}
+        self._player_locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+
+    def open(self, player_id: str, token: Optional[str] = None) -> Session:
+        """Abre uma sessão para o jogador (com o token informado ao restaurar uma sessão salva)"""
+        token = token or secrets.token_urlsafe(24)
+        with self._lock:
+            lock = self._player_locks.setdefault(player_id, threading.RLock())
+            session = self._sessions[token] = Session(token, player_id, lock)
+        return session
+
+    def get(self, token: Optional[str]) -> Optional[Session]:
+        if not token:
+            return None
+        return self._sessions.get(token)
+
+    def player_lock(self, player_id: str) -> Optional[threading.RLock]:
+        return self._player_locks.get(player_id)
+
+    def find_all(self) -> List[Session]:
+        with self._lock:
+            return list(self._sessions.values())
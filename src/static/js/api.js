@@ -40,6 +40,7 @@ const API = {
     },
     
     BASE_URL: '',  // URL base para as requisições (vazio para relativo)
+    sessionToken: null,  // Token da sessão recebido ao criar o jogador
     
     /**
      * Função para fazer requisições à API
@@ -57,6 +58,11 @@ const API = {
             }
         };
         
+        // Cada requisição identifica o jogador pela sessão dele
+        if (this.sessionToken) {
+            options.headers['X-Session-Token'] = this.sessionToken;
+        }
+        
         if (data) {
             options.body = JSON.stringify(data);
         }
@@ -84,6 +90,7 @@ const API = {
      */
     async createPlayer(username) {
         const result = await this.request('player', 'POST', { username });
+        this.sessionToken = result.session_token;
         return result.player;
     },
     
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do jogo são importados a partir de src, como no servidor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
@@ -0,0 +1,56 @@
+import asyncio
+
+from services.event_service import AsyncSubscription, EventHub, QueueSubscription
+
+SUBSCRIBERS = 5000
+
+def test_publish_fans_out_to_every_queue_subscriber():
+    hub = EventHub()
+    subscriptions = [hub.subscribe(QueueSubscription(['area:forest_1'])) for _ in range(SUBSCRIBERS)]
+    other = hub.subscribe(QueueSubscription(['area:cave_1']))
+
+    assert hub.publish('area:forest_1', b'data: 1\n\n') == SUBSCRIBERS
+
+    assert all(subscription.get(timeout=0) == b'data: 1\n\n' for subscription in subscriptions)
+    assert other.get(timeout=0) is None
+
+def test_publish_from_another_thread_fans_out_to_every_async_subscriber():
+    hub = EventHub()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        subscriptions = [hub.subscribe(AsyncSubscription(['area:forest_1'], loop)) for _ in range(SUBSCRIBERS)]
+        # Como nas rotas: quem publica é uma thread fora do loop
+        published = await asyncio.to_thread(hub.publish, 'area:forest_1', b'data: 1\n\n')
+        frames = await asyncio.wait_for(
+            asyncio.gather(*(subscription.queue.get() for subscription in subscriptions)), timeout=5
+        )
+        return published, frames
+
+    published, frames = asyncio.run(scenario())
+
+    assert published == SUBSCRIBERS
+    assert frames == [b'data: 1\n\n'] * SUBSCRIBERS
+
+def test_subscriber_that_falls_behind_is_marked_lagged_without_blocking_the_others():
+    hub = EventHub()
+    slow = hub.subscribe(QueueSubscription(['area:forest_1'], max_pending=2))
+    fast = hub.subscribe(QueueSubscription(['area:forest_1'], max_pending=10))
+
+    for number in range(3):
+        hub.publish('area:forest_1', f'data: {number}\n\n'.encode())
+
+    assert slow.lagged and not fast.lagged
+    assert [fast.get(timeout=0) for _ in range(3)] == [b'data: 0\n\n', b'data: 1\n\n', b'data: 2\n\n']
+
+def test_topic_without_subscribers_is_forgotten():
+    hub = EventHub()
+    subscription = hub.subscribe(QueueSubscription(['area:forest_1', 'player:1']))
+    assert hub.has_subscribers('player:1')
+
+    hub.unsubscribe(subscription)
+
+    # publish_event só codifica o evento quando há assinantes
+    assert not hub.has_subscribers('area:forest_1')
+    assert not hub.has_subscribers('player:1')
+    assert hub.publish('area:forest_1', b'data: 1\n\n') == 0
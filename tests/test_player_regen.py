@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+
+from domains.columnar import CompactRecord
+from repositories.player_repository import PlayerRepository
+from services.player_service import PlayerService
+
+@pytest.fixture(params=[True, False], ids=['compact', 'objects'])
+def service(request):
+    return PlayerService(PlayerRepository(), compact_stats=request.param)
+
+def test_regenerate_mana_raises_mana_up_to_max(service):
+    player = service.create_player('account', 'mage')
+    player.stats.mana = 10
+
+    changed = service.regenerate_mana([(player, 25, player.max_mana)])
+
+    assert changed == [player]
+    assert player.stats.mana == 35
+    if service.stats_table is not None:
+        # A mana foi somada direto na coluna, não pelo objeto
+        assert isinstance(player.stats, CompactRecord)
+        assert service.stats_table.columns['mana'][player.stats._slot] == 35
+
+    service.regenerate_mana([(player, 1000, player.max_mana)])
+    assert player.stats.mana == player.max_mana == 100
+
+def test_regenerate_mana_batches_players_with_different_caps(service):
+    low = service.create_player('account', 'low')
+    high = service.create_player('account', 'high')
+    high.max_mana = 300
+    low.stats.mana = high.stats.mana = 50
+
+    changed = service.regenerate_mana([(low, 80, low.max_mana), (high, 80, high.max_mana)])
+
+    assert changed == [low, high]
+    assert (low.stats.mana, high.stats.mana) == (100, 130)
+
+def test_regenerate_mana_skips_full_players(service):
+    player = service.create_player('account', 'full')
+
+    assert service.regenerate_mana([(player, 10, player.max_mana)]) == []
+    assert player.stats.mana == 100
+
+@pytest.fixture(scope='module')
+def game(tmp_path_factory):
+    # A configuração é lida na importação do app
+    directory = tmp_path_factory.mktemp('game')
+    patch = pytest.MonkeyPatch()
+    patch.setenv('RPG_DATABASE_PATH', str(directory / 'game.db'))
+    patch.setenv('RPG_STATE_LOG_DIR', str(directory / 'game_state'))
+    patch.setenv('RPG_COMPACT_STATS', '1')
+    app = pytest.importorskip('app')
+    yield app
+    patch.undo()
+
+def test_apply_regen_refills_mana_through_the_column(game):
+    token = game.app.test_client().post('/api/player', json={'username': 'regen'}).get_json()['session_token']
+    session = game.session_service.get(token)
+    player = game.player_repository.find_by_id(session.player_id)
+    player.stats.mana = 10
+    # Um minuto depois da última regeneração: 10% da mana máxima por minuto
+    session.last_regen_time -= timedelta(seconds=game.REGEN_CONFIG['regen_interval'])
+
+    assert game.apply_regen([(session, player)]) == [player]
+    assert isinstance(player.stats, CompactRecord)
+    assert player.stats.mana == 10 + int(player.max_mana * game.REGEN_CONFIG['mana_regen_percent'])